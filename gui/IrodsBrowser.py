@@ -1,6 +1,7 @@
 """Browser tab.
 
 """
+import contextlib
 import logging
 import sys
 
@@ -184,9 +185,9 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
         self.aclBox.setCurrentText('')
         obj = None
         if self.ic.collection_exists(obj_path):
-            obj = self.ic.session.collections.get(obj_path)
+            obj = self.ic.get_collection(obj_path)
         elif self.ic.dataobject_exists(obj_path):
-            obj = self.ic.session.data_objects.get(obj_path)
+            obj = self.ic.get_dataobject(obj_path)
         if obj is not None:
             inheritance = ''
             if self.ic.is_collection(obj):
@@ -220,11 +221,11 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
         self.metaUnitsField.clear()
         obj = None
         if self.ic.collection_exists(obj_path):
-            obj = self.ic.session.collections.get(obj_path)
+            obj = self.ic.get_collection(obj_path)
         elif self.ic.dataobject_exists(obj_path):
-            obj = self.ic.session.data_objects.get(obj_path)
+            obj = self.ic.get_dataobject(obj_path)
         if obj is not None:
-            metadata = obj.metadata.items()
+            metadata = self.ic.get_metadata(obj)
             self.metadataTable.setRowCount(len(metadata))
             for row, avu in enumerate(metadata):
                 self.metadataTable.setItem(
@@ -247,10 +248,11 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
         obj = None
         if self.ic.collection_exists(obj_path):
             obj = self.ic.get_collection(obj_path)
+            subcolls, data_objs = self.ic.get_contents(obj)
             content = ['Collections:', '-----------------']
-            content.extend([sc.name for sc in obj.subcollections])
+            content.extend([sc.name for sc in subcolls])
             content.extend(['\n', 'DataObjects:', '-----------------'])
-            content.extend([do.name for do in obj.data_objects])
+            content.extend([do.name for do in data_objs])
             preview_string = '\n'.join(content)
             self.previewBrowser.append(preview_string)
         elif self.ic.dataobject_exists(obj_path):
@@ -293,13 +295,17 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
             item = self.ic.get_dataobject(full_path)
         return item
 
-    def _get_selected_objects(self):
+    def _get_selected_kinds(self):
+        # resolve the kinds of all selected rows with one batched lookup
         rows = {row.row() for row in self.collTable.selectedIndexes()}
-        objects = []
-        for row in rows:
-            item = self._get_irods_item_of_table_row(row)
-            objects.append(item)
-        return objects
+        paths = [
+            str(utils.utils.IrodsPath(*self._get_object_path_name(row)))
+            for row in rows]
+        stats = self.ic.stat_many(paths)
+        for path in paths:
+            if path not in stats:
+                raise irods.exception.DataObjectDoesNotExist(path)
+        return {path: stats[path].kind for path in paths}
 
     def loadTable(self):
         # loads main browser table
@@ -309,9 +315,10 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
             obj_path = utils.utils.IrodsPath(self.inputPath.text())
             if self.ic.collection_exists(obj_path):
                 coll = self.ic.get_collection(obj_path)
-                self.collTable.setRowCount(len(coll.data_objects)+len(coll.subcollections))
+                subcolls, data_objs = self.ic.get_contents(coll)
+                self.collTable.setRowCount(len(data_objs)+len(subcolls))
                 row = 0
-                for subcoll in coll.subcollections:
+                for subcoll in subcolls:
                     self.collTable.setItem(
                         row, 0, PyQt6.QtWidgets.QTableWidgetItem('C-'))
                     self.collTable.setItem(
@@ -327,7 +334,7 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
                     self.collTable.setItem(
                         row, 5, PyQt6.QtWidgets.QTableWidgetItem(str(subcoll.modify_time)))
                     row += 1
-                for obj in coll.data_objects:
+                for obj in data_objs:
                     statuses = {repl.status: None for repl in obj.replicas}
                     if len(set(statuses.keys())) == 1:
                         status = OBJ_STATUS_SYMBOL[list(statuses.keys())[0]]
@@ -409,10 +416,11 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
             obj_name = self.collTable.item(row, 1).text()
             obj_path = "/"+path_name.strip("/")+"/"+obj_name.strip("/")
             try:
-                if self.ic.session.collections.exists(obj_path):
+                stat = self.ic.stat(obj_path)
+                if stat is not None and stat.kind == 'collection':
                     irodsDict = utils.utils.get_coll_dict(self.ic.session.collections.get(obj_path))
-                elif self.ic.session.data_objects.exists(obj_path):
-                    irodsDict = {self.ic.session.data_objects.get(obj_path).path: []}
+                elif stat is not None:
+                    irodsDict = {stat.path: []}
                 else:
                     self.errorLabel.setText("Load: nothing selected.")
                     pass
@@ -493,14 +501,15 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
             else:
                 parent = self.collTable.item(self.current_browser_row, 0).text()
             try:
-                if self.ic.session.data_objects.exists(parent+'/'+objName):
+                stat = self.ic.stat(parent+'/'+objName)
+                if stat is not None and stat.kind == 'data_object':
                     downloadDir = utils.utils.get_downloads_dir()
                     buttonReply = PyQt6.QtWidgets.QMessageBox.question(
                         self, 'Message Box',
                         'Download\n'+parent+'/'+objName+'\tto\n'+downloadDir)
                     if buttonReply == PyQt6.QtWidgets.QMessageBox.StandardButton.Yes:
-                        obj = self.ic.session.data_objects.get(parent+'/'+objName)
-                        self.ic.download_data(obj, downloadDir, obj.size)
+                        obj = self.ic.session.data_objects.get(stat.path)
+                        self.ic.download_data(obj, downloadDir, stat.size)
                         self.errorLabel.setText("File downloaded to: "+downloadDir)
             except irods.exception.NetworkException:
                 self.errorLabel.setText(
@@ -564,8 +573,13 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
         recursive = self.recurseBox.currentText() == 'True'
         admin = self.aclAdminBox.isChecked()
         try:
-            self.ic.set_permissions(
-                acc_name, obj_path, user_name, user_zone, recursive, admin)
+            if (recursive and not acc_name.endswith('inherit')
+                    and self.ic.collection_exists(obj_path)):
+                self._propagate_acl(
+                    acc_name, obj_path, user_name, user_zone, admin)
+            else:
+                self.ic.set_permissions(
+                    acc_name, obj_path, user_name, user_zone, recursive, admin)
             self._fill_acls_tab(obj_path)
         except irods.exception.NetworkException:
             self.errorLabel.setText(
@@ -573,6 +587,39 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
         except Exception as error:
             self.errorLabel.setText(repr(error))
 
+    def _propagate_acl(self, acc_name, coll_path, user_name, user_zone, admin):
+        # Preview the items whose permission changes before setting it.
+        summary = self.ic.propagate_permissions(
+            acc_name, coll_path, user_name, user_zone, admin, dry_run=True)
+        if not summary.changes:
+            self.errorLabel.setText(
+                f'All {summary.unchanged} items already have {acc_name}')
+            return
+        message = (f'Set {acc_name} for {user_name} on {len(summary.changes)} '
+                   f'items ({summary.unchanged} unchanged)?\n')
+        for change in summary.changes[:5]:
+            message += f'\n{change.path}: {change.before} -> {change.after}'
+        if len(summary.changes) > 5:
+            message += '\n...'
+        reply = PyQt6.QtWidgets.QMessageBox.question(
+            self, 'Change permissions', message,
+            PyQt6.QtWidgets.QMessageBox.StandardButton.Yes,
+            PyQt6.QtWidgets.QMessageBox.StandardButton.No)
+        if reply != PyQt6.QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+
+        def progress(done, total):
+            self.errorLabel.setText(f'Changing permissions: {done} of {total}')
+            PyQt6.QtWidgets.QApplication.processEvents()
+
+        summary = self.ic.propagate_permissions(
+            acc_name, coll_path, user_name, user_zone, admin, progress=progress)
+        report = summary.report
+        message = f'Permissions changed on {len(report.succeeded)} of {len(report)} items'
+        if report.failed:
+            message += f', first failure: {report.failed[0][2]!r}'
+        self.errorLabel.setText(message)
+
     def updateIcatMeta(self):
         if self.current_browser_row == -1:
             self.errorLabel.setText('Please select an object first!')
@@ -638,8 +685,60 @@ class IrodsBrowser(PyQt6.QtWidgets.QWidget, gui.ui_files.tabBrowser.Ui_tabBrowse
             'Metadata files (*.csv *.json *.xml);;All files (*)')
         if path:
             self.errorLabel.clear()
-            items = self._get_selected_objects()
+            with contextlib.closing(
+                    meta.metadataFileParser.iter_entries(path)) as entries:
+                has_paths = any(entry[0] for entry in entries)
+            if has_paths:
+                self._import_metadata_file(path)
+                return
+            kinds = self._get_selected_kinds()
             avus = meta.metadataFileParser.parse(path)
-            if len(items) and len(avus):
-                self.ic.addMultipleMetadata(items, avus)
-                self._fill_metadata_tab(items[0].path)
+            if len(kinds) and len(avus):
+                operations = utils.metadata.add_operations(avus)
+                report = self.ic.apply_metadata(
+                    (item_path, kind, operations)
+                    for item_path, kind in kinds.items())
+                if report.failed:
+                    self.errorLabel.setText(
+                        f"Metadata added to {len(report.succeeded)} of "
+                        f"{len(report)} items, first failure: "
+                        f"{report.failed[0][2]!r}")
+                self._fill_metadata_tab(next(iter(kinds)))
+
+    def _import_metadata_file(self, path):
+        # Files with a path column target their own items: summarize
+        # them first, then apply after confirmation.  Entries without a
+        # path go to the selected item, or to the current collection.
+        base = self.inputPath.text()
+        target = base
+        rows = {index.row() for index in self.collTable.selectedIndexes()}
+        if len(rows) == 1:
+            target = str(utils.utils.IrodsPath(
+                *self._get_object_path_name(rows.pop())))
+
+        def entries():
+            with contextlib.closing(
+                    meta.metadataFileParser.iter_entries(path)) as file_entries:
+                for entry_path, name, value, units in file_entries:
+                    yield entry_path or target, name, value, units
+
+        try:
+            summary = self.ic.import_metadata(entries(), base, dry_run=True)
+            message = (f"Add {summary.avus} AVUs to {summary.items} items?"
+                       f"\n\n{len(summary.missing)} paths not found")
+            if summary.missing:
+                message += ", e.g.\n" + "\n".join(summary.missing[:5])
+            reply = PyQt6.QtWidgets.QMessageBox.question(
+                self, 'Import metadata', message,
+                PyQt6.QtWidgets.QMessageBox.StandardButton.Yes,
+                PyQt6.QtWidgets.QMessageBox.StandardButton.No)
+            if reply != PyQt6.QtWidgets.QMessageBox.StandardButton.Yes:
+                return
+            summary = self.ic.import_metadata(entries(), base)
+            report = summary.report
+            message = f"Metadata added to {len(report.succeeded)} of {len(report)} items"
+            if report.failed:
+                message += f", first failure: {report.failed[0][2]!r}"
+            self.errorLabel.setText(message)
+        except Exception as error:
+            self.errorLabel.setText(repr(error))
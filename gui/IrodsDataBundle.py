@@ -272,7 +272,7 @@ class IrodsDataBundle(PyQt6.QtWidgets.QWidget,
         self.statusLabel.setText(
             f'EXTRACT STATUS: Extracting {coll_name}')
         self.worker_extract = RuleRunner(
-            self.ic, io.StringIO(EXTRACT_RULE), params, 'EXTRACT')
+            self.ic, io.StringIO(utils.bundles.EXTRACT_RULE), params, 'EXTRACT')
         self.worker_extract.moveToThread(self.thread_extract)
         self.thread_extract.started.connect(self.worker_extract.run)
         self.worker_extract.finished.connect(self.thread_extract.quit)
@@ -355,15 +355,3 @@ CREATE_RULE = '''create_rule {
 }
 OUTPUT ruleExecOut
 '''
-
-EXTRACT_RULE = """extract_rule {
-    msiTarFileExtract(*objPath, *collName, *rescName, *retExt);
-    if(bool(*retExt)) {
-        writeLine("stderr", "Error extracting *objPath to *collName");
-    }
-    else {
-        writeLine("stdout", "Extracted *objPath into *collName");
-    }
-}
-OUTPUT ruleExecOut
-"""
@@ -6,7 +6,7 @@ import logging
 import os
 import sys
 
-from PyQt6.QtWidgets import QDialog
+from PyQt6.QtWidgets import QDialog, QMessageBox
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
 from PyQt6 import QtCore
 from PyQt6.QtGui import QMovie
@@ -16,6 +16,19 @@ from gui.ui_files.dataTransferState import Ui_dataTransferState
 import utils
 
 
+def transfer_journal(upload, localFsPath, coll):
+    """Journal of the transfer between `localFsPath` and `coll`.
+
+    """
+    if upload:
+        return utils.journal.TransferJournal(
+            'upload', utils.utils.LocalPath(localFsPath),
+            utils.utils.IrodsPath(coll.path, os.path.basename(localFsPath)))
+    return utils.journal.TransferJournal(
+        'download', utils.utils.IrodsPath(coll.path),
+        utils.utils.LocalPath(localFsPath, coll.name))
+
+
 class dataTransfer(QDialog, Ui_dataTransferState):
     """
 
@@ -66,9 +79,23 @@ class dataTransfer(QDialog, Ui_dataTransferState):
         self.loadingLbl.setMovie(self.loading_movie)
         self.loading_movie.start()
 
+        # Resuming an interrupted transfer skips the diff, so ask first.
+        resume = False
+        journal = transfer_journal(upload, localFsPath, irodsColl)
+        if journal.resumable and (not upload or os.path.isdir(localFsPath)):
+            reply = QMessageBox.question(
+                self, 'Resume transfer',
+                f'An interrupted transfer with {len(journal.pending())} items '
+                'left was found. Resume it?\n\nOtherwise all data is compared '
+                'again.',
+                QMessageBox.StandardButton.Yes, QMessageBox.StandardButton.No)
+            resume = reply == QMessageBox.StandardButton.Yes
+        if not resume and journal.exists:
+            journal.discard()
+
         # Get information in separate thread
         self.thread = QThread()
-        self.worker = getDataState(self.ic, localFsPath, irodsColl, upload)
+        self.worker = getDataState(self.ic, localFsPath, irodsColl, upload, resume)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
         self.worker.updLabels.connect(self.updLabels)
@@ -206,7 +233,7 @@ class getDataState(QObject):
     # Lists with size in bytes
     finished = pyqtSignal(list, list, str, str)
 
-    def __init__(self, ic, localFsPath, coll, upload):
+    def __init__(self, ic, localFsPath, coll, upload, resume=False):
         """
 
         Parameters
@@ -215,12 +242,14 @@ class getDataState(QObject):
         localFsPath
         coll
         upload
+        resume
         """
         super().__init__()
         self.ic = ic
         self.localFsPath = localFsPath
         self.coll = coll
         self.upload = upload
+        self.resume = resume
 
     def run(self):
         # Diff
@@ -229,7 +258,13 @@ class getDataState(QObject):
             if self.upload:
                 # Data is placed inside of coll, check if dir or file is inside
                 newPath = self.coll.path + "/" + os.path.basename(self.localFsPath)
-                if os.path.isdir(self.localFsPath):
+                journal = transfer_journal(True, self.localFsPath, self.coll)
+                if os.path.isdir(self.localFsPath) and self.resume:
+                    # Resume an interrupted upload instead of a new diff.
+                    logging.info("Resuming upload from %s", journal.path)
+                    diff = [(irods_path, local_path) for local_path, irods_path
+                            in journal.pending()]
+                elif os.path.isdir(self.localFsPath):
                     if self.ic.session.collections.exists(newPath):
                         subColl = self.ic.session.collections.get(newPath)
                     else:
@@ -244,7 +279,12 @@ class getDataState(QObject):
             else:
                 # Data is placed inside fsDir, check if obj or coll is inside
                 newPath = os.path.join(self.localFsPath, self.coll.name)
-                if self.ic.session.collections.exists(self.coll.path):
+                journal = transfer_journal(False, self.localFsPath, self.coll)
+                if self.resume:
+                    # Resume an interrupted download instead of a new diff.
+                    logging.info("Resuming download from %s", journal.path)
+                    diff = journal.pending()
+                elif self.ic.session.collections.exists(self.coll.path):
                     if not os.path.isdir(newPath):
                         FsPath = None
                     else:
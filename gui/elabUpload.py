@@ -5,6 +5,7 @@ import logging
 import os
 import sys
 import logging
+import threading
 
 from utils.elabConnector import elabConnector
 from PyQt6 import QtCore, QtGui, QtWidgets
@@ -61,6 +62,7 @@ class elabUpload(QWidget, Ui_tabELNData):
         self.elnGroupTable.clicked.connect(self.loadExperiments)
         self.elnExperimentTable.clicked.connect(self.selectExperiment)
         self.elnUploadButton.clicked.connect(self.upload_data)
+        self.elnCancelButton.clicked.connect(self.cancel_upload)
 
 
     def connectElab(self):
@@ -126,14 +128,29 @@ class elabUpload(QWidget, Ui_tabELNData):
     def reportProgress(self):
         self.errorLabel.setText("ELN UPLOAD STATUS: Uploading ...")
 
+    def reportTagged(self, count):
+        self.errorLabel.setText(f"ELN UPLOAD STATUS: Tagged {count} items ...")
+
     def reportFinished(self):
         # self.elnUploadButton.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.ArrowCursor))
         self.elnUploadButton.setEnabled(True)
+        self.elnCancelButton.setEnabled(False)
         self.showPreview()
         self.elnIrodsPath.setText(self.coll.path.split('/ELN')[0])
-        self.errorLabel.setText("ELN UPLOAD STATUS: Uploaded to "+self.coll.path)
+        if self.worker.cancelled.is_set():
+            self.errorLabel.setText(
+                "ELN UPLOAD STATUS: Uploaded to "+self.coll.path+", tagging cancelled")
+        else:
+            self.errorLabel.setText("ELN UPLOAD STATUS: Uploaded to "+self.coll.path)
         self.thread.quit()
 
+    def cancel_upload(self):
+        # The upload is completed, only the tagging stops early.
+        if self.worker is not None:
+            self.worker.stop()
+            self.elnCancelButton.setEnabled(False)
+            self.errorLabel.setText("ELN UPLOAD STATUS: Cancelling ...")
+
     def showPreview(self):
         irodsDict = get_coll_dict(self.coll)
         for key in list(irodsDict.keys())[:50]:
@@ -191,6 +208,7 @@ class elabUpload(QWidget, Ui_tabELNData):
             if upload:
                 # self.elnUploadButton.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.WaitCursor))
                 self.elnUploadButton.setEnabled(False)
+                self.elnCancelButton.setEnabled(True)
                 # start own thread for the upload
                 self.thread = QThread()
                 self.worker = Worker(
@@ -202,6 +220,7 @@ class elabUpload(QWidget, Ui_tabELNData):
                 self.worker.finished.connect(self.worker.deleteLater)
                 self.thread.finished.connect(self.thread.exit)
                 self.worker.progress.connect(self.reportProgress)
+                self.worker.tagged.connect(self.reportTagged)
                 self.thread.start()
                 self.thread.finished.connect(self.reportFinished)
             # else:
@@ -220,6 +239,7 @@ class Worker(QObject):
     """
     finished = pyqtSignal()
     progress = pyqtSignal(int)
+    tagged = pyqtSignal(int)
 
     def __init__(self, ic, elab, coll, size, filePath, expUrl,
                  elnPreviewBrowser, errorLabel):
@@ -245,8 +265,13 @@ class Worker(QObject):
         self.expUrl = expUrl
         self.elab = elab
         self.errorLabel = errorLabel
+        self.cancelled = threading.Event()
         print("Start worker: ")
 
+    def stop(self):
+        # Items being tagged are finished, no new ones are started.
+        self.cancelled.set()
+
     def run(self):
         try:
             if os.path.isfile(self.filePath):
@@ -257,13 +282,10 @@ class Worker(QObject):
                 self.ic.addMetadata([item], 'ELN', self.expUrl)
             elif os.path.isdir(self.filePath):
                 self.ic.upload_data(self.filePath, self.coll, None, self.size, force=True)
-                upColl = self.ic.session.collections.get(
-                            self.coll.path+'/'+os.path.basename(self.filePath))
-                items = [upColl]
-                for c, _, objs in upColl.walk():
-                    items.append(c)
-                    items.extend(objs)
-                self.ic.addMetadata(items, 'ELN', self.expUrl)
+                self.ic.tag_collection(
+                    self.coll.path+'/'+os.path.basename(self.filePath),
+                    [('ELN', self.expUrl, None)], self.tagged.emit,
+                    self.cancelled)
             self.progress.emit(3)
             self.finished.emit()
         except Exception as error:
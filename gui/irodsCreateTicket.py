@@ -46,7 +46,7 @@ class irodsCreateTicket(QWidget, Ui_tabticketCreate):
         obj_path = ''
         if len(indexes):
             obj_path = self.irodsmodel.irods_path_from_tree_index(indexes[0])
-        if not self.ic.session.collections.exists(obj_path):
+        if not self.ic.collection_exists(obj_path):
             self.infoLabel.setText('ERROR: Please select a collection.')
             self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.ArrowCursor))
             self.createTicketButton.setEnabled(True)
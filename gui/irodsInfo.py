@@ -46,6 +46,7 @@ class irodsInfo(PyQt6.QtWidgets.QWidget, gui.ui_files.tabInfo.Ui_tabInfo):
         self.versionLabel.setText(
             '.'.join((str(num) for num in self.ic.session.server_version)))
         # irods resources
+        self.ic.refresh_resources()
         resc_info = self.ic.list_resources(['name', 'status', 'free_space'])
         self.rescTable.setRowCount(len(resc_info[0]))
         for row, (name, status, space) in enumerate(zip(*resc_info)):
@@ -1,6 +1,7 @@
 """iRODS search dialog.
 
 """
+import itertools
 import logging
 import os
 import sys
@@ -34,6 +35,8 @@ class irodsSearch(QDialog, Ui_searchDialog):
             loadUi("gui/ui_files/searchDialog.ui", self)
         self.ic = ic
         self.collTable = collTable
+        # Generator of further search results, fetched while scrolling.
+        self.searchResults = iter(())
         self.keys = [self.key1, self.key2, self.key3, self.key4, self.key5]
         self.vals = [self.val1, self.val2, self.val3, self.val4, self.val5]
 
@@ -42,6 +45,8 @@ class irodsSearch(QDialog, Ui_searchDialog):
         self.selectSearchButton.clicked.connect(self.loadSearchResults)
         self.downloadButton.clicked.connect(self.download_data)
         self.searchExitButton.released.connect(self.close)
+        self.searchResultTable.verticalScrollBar().valueChanged.connect(
+            self.scrolled)
 
     def enableButtons(self, enabled=True):
         """
@@ -76,25 +81,61 @@ class irodsSearch(QDialog, Ui_searchDialog):
             if keyVals[key]:
                 criteria[key] = keyVals[key]
         
-        # get search results as [[collname, objname, checksum]...[]]
-        results = self.ic.search(criteria)
-        
-        row = 0 
-        if len(results) == 0:
+        # Counts as header rows, results are fetched page by page.
+        numColls, numObjs = self.ic.search_count(criteria)
+        self.searchResults = self.ic.iter_search(criteria)
+        if numObjs == 0 and not numColls:
             self.searchResultTable.setRowCount(1)
-            self.searchResultTable.setItem(row, 0, 
+            self.searchResultTable.setItem(0, 0, 
                     QtWidgets.QTableWidgetItem('No search results found'))
         else:
-            self.searchResultTable.setRowCount(len(results))
-            for collName, objName, checksum in results:
-                self.searchResultTable.setItem(row, 0, QtWidgets.QTableWidgetItem(collName))
-                self.searchResultTable.setItem(row, 1, QtWidgets.QTableWidgetItem(objName))
-                self.searchResultTable.setItem(row, 2, QtWidgets.QTableWidgetItem(checksum))
-                row = row + 1
+            header = [['', '', ''], [f'Objects found: {numObjs}', '', ''], ['', '', '']]
+            if numColls is not None:
+                header[0] = [f'Collections found: {numColls}', '', '']
+            self.addResults(header)
+            self.fetchResults()
         self.searchResultTable.resizeColumnsToContents()
         self.startSearchButton.setDisabled(False)
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.ArrowCursor))
 
+    def addResults(self, results):
+        """Append rows to the result table.
+
+        Parameters
+        ----------
+        results : list
+            [[collname, objname, checksum]...[]]
+
+        """
+        row = self.searchResultTable.rowCount()
+        self.searchResultTable.setRowCount(row + len(results))
+        for collName, objName, checksum in results:
+            self.searchResultTable.setItem(row, 0, QtWidgets.QTableWidgetItem(collName))
+            self.searchResultTable.setItem(row, 1, QtWidgets.QTableWidgetItem(objName))
+            self.searchResultTable.setItem(row, 2, QtWidgets.QTableWidgetItem(checksum))
+            row = row + 1
+
+    def fetchResults(self):
+        """Show the next page of search results, if any.
+
+        """
+        results = list(itertools.islice(
+            self.searchResults, utils.IrodsConnector.SEARCH_PAGE_SIZE))
+        if results:
+            self.addResults(results)
+
+    def scrolled(self, value):
+        """Fetch more results when the table is scrolled to the bottom.
+
+        Parameters
+        ----------
+        value : int
+            Position of the vertical scroll bar.
+
+        """
+        if value >= self.searchResultTable.verticalScrollBar().maximum():
+            self.fetchResults()
+
     def loadSearchResults(self):
         rows = set(
             [idx.row() for idx in self.searchResultTable.selectedIndexes()
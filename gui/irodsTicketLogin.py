@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import QHeaderView, QWidget
 from PyQt6 import QtCore
 from PyQt6.uic import loadUi
 
+import utils.catalog
 import utils.utils
 from gui.checkableFsTree import checkableFsTreeModel
 from gui.dataTransfer import dataTransfer
@@ -176,15 +177,7 @@ class irodsTicketLogin(QWidget, Ui_tabTicketAccess):
 
     def __fillMetadata(self, value, path):
         newPath = "/"+path.strip("/")+"/"+value.strip("/")
-        if value.endswith("/") and self.ic.session.collections.exists(newPath):
-            coll = self.ic.session.collections.get(
-                        "/"+path.strip("/")+"/"+value.strip("/")
-                        )
-            metadata = coll.metadata.items()
-        else:
-            subcoll = self.ic.session.collections.get(path)
-            obj = [o for o in subcoll.data_objects if o.name == value][0]
-            metadata = obj.metadata.items()
+        metadata = utils.catalog.item_metadata(self.ic.session, newPath)
         self.metadataTable.setRowCount(len(metadata))
         row = 0
         for item in metadata:
@@ -103,7 +103,8 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
         }
         data = [row]
         # Get content of the home collection.
-        for sub_coll in coll.subcollections:
+        subcolls, data_objs = self.ic.get_contents(coll)
+        for sub_coll in subcolls:
             level = 1
             row = {
                 'level': level,
@@ -113,7 +114,7 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
                 'type': 'C',
             }
             data.append(row)
-            if sub_coll.data_objects != [] or sub_coll.subcollections != []:
+            if self.ic.get_contents(sub_coll) != ([], []):
                 row = {
                     'level': level+1,
                     'irodsID': 'test',
@@ -122,7 +123,7 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
                     'type': 'd',
                 }
                 data.append(row)
-        for obj in coll.data_objects:
+        for obj in data_objs:
             level = 1
             row = {
                 'level': level,
@@ -215,7 +216,8 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
 
         """
         data = []
-        for sub_coll in coll.subcollections:
+        subcolls, data_objs = self.ic.get_contents(coll)
+        for sub_coll in subcolls:
             level = len(sub_coll.path.split('/')) - len(self.base_path.split('/'))
             row = {
                 'level': level,
@@ -225,7 +227,7 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
                 'type': 'C',
             }
             data.append(row)
-            if sub_coll.data_objects != [] or sub_coll.subcollections != []:
+            if self.ic.get_contents(sub_coll) != ([], []):
                 row = {
                     'level': level+1,
                     'irodsID': 'test',
@@ -234,7 +236,7 @@ class IrodsModel(PyQt6.QtGui.QStandardItemModel):
                     'type': 'd',
                 }
                 data.append(row)
-        for obj in coll.data_objects:
+        for obj in data_objs:
             level = len(obj.path.split('/')) - len(self.base_path.split('/'))
             row = {
                 'level': level,
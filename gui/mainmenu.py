@@ -9,6 +9,7 @@ import PyQt6.QtWidgets
 import PyQt6.uic
 
 import gui
+import meta
 import utils
 
 
@@ -43,12 +44,13 @@ class mainmenu(PyQt6.QtWidgets.QMainWindow, gui.ui_files.MainMenu.Ui_MainWindow)
         if not ienv or not ic:
             self.actionSearch.setEnabled(False)
             self.actionSaveConfig.setEnabled(False)
+            self.actionExportMetadata.setEnabled(False)
             self.ticketAccessTab = gui.irodsTicketLogin.irodsTicketLogin()
             self.tabWidget.addTab(self.ticketAccessTab, 'Ticket Access')
         else:
             self.actionSearch.triggered.connect(self.search)
             self.actionSaveConfig.triggered.connect(self.saveConfig)
-            # self.actionExportMetadata.triggered.connect(self.exportMeta)
+            self.actionExportMetadata.triggered.connect(self.exportMeta)
             ui_tabs_lookup = {
                 'tabBrowser': self.setupTabBrowser,
                 'tabUpDownload': self.setupTabUpDownload,
@@ -150,4 +152,28 @@ class mainmenu(PyQt6.QtWidgets.QMainWindow, gui.ui_files.MainMenu.Ui_MainWindow)
         self.globalErrorLabel.setText("Environment saved to: "+path)
 
     def exportMeta(self):
-        print("TODO: Metadata export")
+        # export the metadata below the collection shown in the browser
+        coll_path = self.irodsBrowser.inputPath.text()
+        if not self.ic.collection_exists(coll_path):
+            self.globalErrorLabel.setText("Export: not a collection: "+coll_path)
+            return
+        file_path, _ = PyQt6.QtWidgets.QFileDialog.getSaveFileName(
+            self, 'Export metadata of '+coll_path, '',
+            'CSV (*.csv);;JSON (*.json);;XML (*.xml)')
+        if not file_path:
+            return
+        self.setCursor(PyQt6.QtGui.QCursor(PyQt6.QtCore.Qt.CursorShape.WaitCursor))
+
+        def progress(count):
+            self.globalErrorLabel.setText(f"Exporting metadata: {count} AVUs")
+            PyQt6.QtWidgets.QApplication.processEvents()
+
+        try:
+            count = meta.metadataFileWriter.write(
+                file_path, self.ic.iter_metadata(coll_path), progress)
+            self.globalErrorLabel.setText(
+                f"Exported {count} AVUs to: "+file_path)
+        except Exception as error:
+            logging.info('METADATA EXPORT ERROR', exc_info=True)
+            self.globalErrorLabel.setText("Export failed: "+repr(error))
+        self.setCursor(PyQt6.QtGui.QCursor(PyQt6.QtCore.Qt.CursorShape.ArrowCursor))
@@ -80,10 +80,15 @@ class Ui_MainWindow(object):
         font = QtGui.QFont()
         self.actionSaveConfig.setFont(font)
         self.actionSaveConfig.setObjectName("actionSaveConfig")
+        self.actionExportMetadata = QtGui.QAction(MainWindow)
+        font = QtGui.QFont()
+        self.actionExportMetadata.setFont(font)
+        self.actionExportMetadata.setObjectName("actionExportMetadata")
         self.menuMenu.addAction(self.actionCloseSession)
         self.menuMenu.addAction(self.actionExit)
         self.menuOptions.addAction(self.actionSearch)
         self.menuOptions.addAction(self.actionSaveConfig)
+        self.menuOptions.addAction(self.actionExportMetadata)
         self.menubar.addAction(self.menuMenu.menuAction())
         self.menubar.addAction(self.menuOptions.menuAction())
 
@@ -100,6 +105,7 @@ class Ui_MainWindow(object):
         self.actionExit.setText(_translate("MainWindow", "Exit"))
         self.actionSearch.setText(_translate("MainWindow", "Search"))
         self.actionSaveConfig.setText(_translate("MainWindow", "Save configuration"))
+        self.actionExportMetadata.setText(_translate("MainWindow", "Export metadata"))
 
 
 if __name__ == "__main__":
@@ -148,6 +148,10 @@ class Ui_tabELNData(object):
         self.elnUploadButton = QtWidgets.QPushButton(tabELNData)
         self.elnUploadButton.setObjectName("elnUploadButton")
         self.horizontalLayout_9.addWidget(self.elnUploadButton)
+        self.elnCancelButton = QtWidgets.QPushButton(tabELNData)
+        self.elnCancelButton.setEnabled(False)
+        self.elnCancelButton.setObjectName("elnCancelButton")
+        self.horizontalLayout_9.addWidget(self.elnCancelButton)
         spacerItem4 = QtWidgets.QSpacerItem(10, 20, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Minimum)
         self.horizontalLayout_9.addItem(spacerItem4)
         self.elnPathLabel = QtWidgets.QVBoxLayout()
@@ -206,6 +210,8 @@ class Ui_tabELNData(object):
         self.label_14.setText(_translate("tabELNData", "Project"))
         self.label_15.setText(_translate("tabELNData", "Experiment"))
         self.elnUploadButton.setText(_translate("tabELNData", "Upload"))
+        self.elnCancelButton.setToolTip(_translate("tabELNData", "Stop tagging the uploaded data with the experiment"))
+        self.elnCancelButton.setText(_translate("tabELNData", "Cancel"))
         self.label_16.setText(_translate("tabELNData", "iRODS Path (adjust for YODA)"))
         self.elnIrodsPath.setText(_translate("tabELNData", "/zone/home/user"))
 
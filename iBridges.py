@@ -3,6 +3,7 @@
 
 """
 import logging
+import multiprocessing
 import os
 import setproctitle
 import subprocess
@@ -241,4 +242,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Checksums are calculated in worker processes.
+    multiprocessing.freeze_support()
     main()
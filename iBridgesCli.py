@@ -14,15 +14,18 @@ from utils.elabConnector import elabConnector
 from utils.IrodsConnector import IrodsConnector
 from utils.IrodsConnector import FreeSpaceNotSet
 from utils.IrodsConnectorIcommands import IrodsConnectorIcommands
+from utils.journal import TransferJournal
 from irods.exception import ResourceDoesNotExist, NoResultFound
+from meta.metadataFileWriter import write as writeMetadata
 
 import configparser
 import os
 import sys
 import json
 import getopt
+import multiprocessing
 import getpass
-from utils.utils import setup_logger, get_local_size, ensure_dir
+from utils.utils import setup_logger, get_local_size, ensure_dir, IrodsPath, LocalPath
 
 RED = '\x1b[1;31m'
 DEFAULT = '\x1b[0m'
@@ -140,7 +143,10 @@ def setupIRODS(config, operation):
     Connects to iRODS and sets up the environment.
     """
     ic = connectIRODS(config)
-    if operation == 'download':
+    # Number of files transferred concurrently
+    if config['iRODS'].get('transfer_workers', ''):
+        ic.ienv['transfer_workers'] = int(config['iRODS']['transfer_workers'])
+    if operation in ['download', 'export']:
         return ic
 
     # set iRODS path
@@ -258,16 +264,14 @@ def prepareUpload(dataPath, ic, config):
 
 
 def prepareDownload(irodsItemPath, ic, config):
-    if not ic.session.data_objects.exists(irodsItemPath) and \
-       not ic.session.collections.exists(irodsItemPath):
+    if ic.stat(irodsItemPath) is None:
         print(RED+'iRODS path does not exist'+DEFAULT)
         menu = input('Do you want to specify a new iRODS path? (Y/N)')
         if menu in ['YES', 'Yes', 'Y', 'y', '']:
             success = False
             while not success:
                 irodsItemPath = input('Full data path: ')
-                success = ic.session.data_objects.exists(irodsItemPath) or \
-                    ic.session.collections.exists(irodsItemPath)
+                success = ic.stat(irodsItemPath) is not None
             config["iRODS"]["downloadItem"] = irodsItemPath
         else:
             print('Aborted: iRODS path not given')
@@ -304,9 +308,11 @@ def printHelp():
     print('Usage: ./iBridgesCli.py -c, --config= \t config file')
     print('\t\t    -d, --data= \t datapath')
     print('\t\t    -i, --irods= \t irodspath (download)')
+    print('\t\t    -m, --metadata= \t export the metadata of irodspath to a .csv, .json or .xml file')
     print('Examples:')
     print('Downloading: ./iBridgesCli.py -c <yourConfigFile> --irods=/npecZone/home')
     print('Uploading: ./iBridgesCli.py -c <yourConfigFile> --data=/my/data/path')
+    print('Exporting metadata: ./iBridgesCli.py -c <yourConfigFile> --irods=/npecZone/home --metadata=meta.csv')
 
 
 def main(argv):
@@ -315,7 +321,7 @@ def main(argv):
     setup_logger(irodsEnvPath, "iBridgesCli")
 
     try:
-        opts, args = getopt.getopt(argv, "hc:d:i:", ["config=", "data=", "irods="])
+        opts, args = getopt.getopt(argv, "hc:d:i:m:", ["config=", "data=", "irods=", "metadata="])
     except getopt.GetoptError:
         print(RED+"ERROR: incorrect usage."+DEFAULT)
         printHelp()
@@ -323,6 +329,7 @@ def main(argv):
 
     config = None
     operation = None
+    metadataPath = None
 
     for opt, arg in opts:
         if opt == '-h':
@@ -346,10 +353,14 @@ def main(argv):
                 dataPath = arg[:-1]
             else:
                 dataPath = arg
+        elif opt in ['-m', '--metadata']:
+            metadataPath = arg
         else:
             printHelp()
             sys.exit(2)
 
+    if metadataPath is not None and operation == 'download':
+        operation = 'export'
     # initialise iRODS
     if operation is None:
         print(RED+"ERROR: missing parameter."+DEFAULT)
@@ -376,8 +387,14 @@ def main(argv):
                 iPath = config['iRODS']['irodscoll']
             iColl = ic.session.collections.get(iPath)
             dataPath = config["iRODS"]["uploadItem"]
+            journal = TransferJournal(
+                'upload', LocalPath(dataPath),
+                IrodsPath(iColl.path, os.path.basename(dataPath)))
+            resume = os.path.isdir(dataPath) and journal.resumable and input(
+                YEL+'Resume interrupted upload, '+str(len(journal.pending()))+ \
+                ' files left (Y/N): '+DEFAULT) in ['Y', 'y']
             ic.upload_data(dataPath, iColl, config['iRODS']['irodsresc'],
-                           get_local_size([dataPath]), force=True)
+                           get_local_size([dataPath]), force=True, resume=resume)
         else:
             ic.session.cleanup()
             sys.exit(2)
@@ -399,13 +416,14 @@ def main(argv):
                     coll.path+'/'+os.path.basename(dataPath))
                 ic.addMetadata([item], 'ELN', md.metadataUrl)
             elif os.path.isdir(dataPath):
-                upColl = ic.session.collections.get(
-                            coll.path+'/'+os.path.basename(dataPath))
-                items = [upColl]
-                for c, _, objs in upColl.walk():
-                    items.append(c)
-                    items.extend(objs)
-                ic.addMetadata(items, 'ELN', md.metadataUrl)
+                report = ic.tag_collection(
+                    coll.path+'/'+os.path.basename(dataPath),
+                    [('ELN', md.metadataUrl, None)],
+                    lambda count: print(f'\rTagged {count} items', end=''))
+                print()
+                if not report.ok:
+                    print(RED+'Tagging failed for '+str(len(report.failed))+ \
+                          ' items, see the log.'+DEFAULT)
 
         print()
         print(BLUE+'Upload complete with the following parameters:')
@@ -416,16 +434,24 @@ def main(argv):
         if prepareDownload(irodsPath, ic, config):
             downloadDir = config['DOWNLOAD']['path']
             irodsDataPath = config["iRODS"]["downloadItem"]
+            irodsDataSize = ic.get_irods_size([irodsDataPath])
             print(YEL,
                   'Downloading: ' + irodsDataPath + ', ' + \
-                  str(ic.get_irods_size([irodsDataPath]) * ic.multiplier) + 'GB',
+                  str(irodsDataSize * ic.multiplier) + 'GB',
                   DEFAULT)
-            try:
+            if ic.stat(irodsDataPath).kind == 'collection':
                 item = ic.session.collections.get(irodsDataPath)
-            except Exception:
+            else:
                 item = ic.session.data_objects.get(irodsDataPath)
             print(item, downloadDir)
-            ic.download_data(item, downloadDir, ic.get_irods_size([irodsDataPath]), force=False)
+            journal = TransferJournal(
+                'download', IrodsPath(item.path),
+                LocalPath(downloadDir, item.name))
+            resume = journal.resumable and input(
+                YEL+'Resume interrupted download, '+str(len(journal.pending()))+ \
+                ' data objects left (Y/N): '+DEFAULT) in ['Y', 'y']
+            ic.download_data(item, downloadDir, irodsDataSize, force=False,
+                             resume=resume)
             print()
             print(BLUE+'Download complete with the following parameters:')
             print(json.dumps(config, indent=4))
@@ -434,10 +460,29 @@ def main(argv):
         else:
             ic.session.cleanup()
             sys.exit(2)
+    elif operation == 'export':
+        stat = ic.stat(irodsPath)
+        if stat is None or stat.kind != 'collection':
+            print(RED+'iRODS collection does not exist: '+irodsPath+DEFAULT)
+            ic.session.cleanup()
+            sys.exit(2)
+        try:
+            count = writeMetadata(
+                metadataPath, ic.iter_metadata(irodsPath),
+                lambda count: print('\rExported AVUs: '+str(count), end=''))
+        except ValueError as error:
+            print(RED+str(error)+DEFAULT)
+            ic.session.cleanup()
+            sys.exit(2)
+        print()
+        print(BLUE+'Exported '+str(count)+' AVUs of '+irodsPath+' to '+metadataPath+DEFAULT)
+        ic.session.cleanup()
     else:
         print('Not an implemented operation.')
         sys.exit(2)
 
 
 if __name__ == "__main__":
+    # Checksums are calculated in worker processes.
+    multiprocessing.freeze_support()
     main(sys.argv[1:])
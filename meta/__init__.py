@@ -3,4 +3,5 @@
 from . import csv_parser
 from . import json_parser
 from . import metadataFileParser
+from . import metadataFileWriter
 from . import xml_parser
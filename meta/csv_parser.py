@@ -1,27 +1,41 @@
 import csv
 
 
+def iter_metadata_csv(file_path):
+    """Generate the AVUs of a CSV file one row at a time.
+    Parameters
+    ----------
+    file_path : str
+        Name of the CSV file. Each row contains 2 or 3 elements, or 4
+        with the path of the AVU.
+
+    Yields
+    ------
+    tuple
+        (path, attribute, value, units), path '' without a 4th column.
+    """
+    with open(file_path, newline='') as csvfile:
+        avus_reader = csv.reader(csvfile, delimiter=',')
+        for avu_row in avus_reader:
+            if len(avu_row) == 4:
+                yield avu_row[3], avu_row[0], avu_row[1], avu_row[2]
+            elif len(avu_row) == 3:
+                yield '', avu_row[0], avu_row[1], avu_row[2]
+            elif len(avu_row) == 2:
+                yield '', avu_row[0], avu_row[1], ''
+
+
 def get_metadata_list_csv(file_path):
     """Extract columns from a CSV file.
     Parameters
     ----------
     filename : str
         Name of the CSV file containing the columns to extract. Each 
-        row contains 2 or 3 elements
+        row contains 2 or 3 elements, or 4 when exported with a path
     
     Returns
     -------
     list of triplets
         Extracted metadata in a list of triplets format. 
     """
-    avus = []
-    with open(file_path, newline='') as csvfile:
-        avus_reader = csv.reader(csvfile, delimiter=',')
-        for avu_row in avus_reader:
-            if len(avu_row) == 3:
-                avus.append(avu_row)
-            elif len(avu_row) == 2:
-                avus.append(avu_row + [''])
-            else:
-                continue
-    return avus
+    return [list(avu[1:]) for avu in iter_metadata_csv(file_path)]
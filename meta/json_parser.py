@@ -2,7 +2,26 @@ import json
 
 
 # {"avus": [{"attribute": "a", "value": "b", "units": "c"},
-#           {"attribute": "x", "value": "y"}]}
+#           {"attribute": "x", "value": "y", "path": "/zone/home/x"}]}
+
+
+def iter_metadata_json(file_path):
+    """Generate the AVUs of a JSON file.  The json module reads the
+    whole document, only the conversion is incremental.
+
+    Yields
+    ------
+    tuple
+        (path, attribute, value, units), path '' if absent.
+    """
+    with open(file_path) as json_file:
+        avus_dict = json.load(json_file)
+    for avu in avus_dict.get("avus", []):
+        try:
+            yield (avu.get("path", ''), avu["attribute"], avu["value"],
+                   avu.get("units", ''))
+        except KeyError:
+            continue
 
 
 def get_metadata_list_json(file_path):
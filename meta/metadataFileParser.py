@@ -1,20 +1,23 @@
-from meta.csv_parser import get_metadata_list_csv
-from meta.xml_parser import get_metadata_list_xml
-from meta.json_parser import get_metadata_list_json
+from meta.csv_parser import get_metadata_list_csv, iter_metadata_csv
+from meta.xml_parser import get_metadata_list_xml, iter_metadata_xml
+from meta.json_parser import get_metadata_list_json, iter_metadata_json
 
 from pathlib import Path
 
 type_mapper = {
     '.csv': {
         'func': get_metadata_list_csv,
+        'iter': iter_metadata_csv,
         'description': 'CSV file containing triplets with a,v,u'
     },
     '.json': {
         'func': get_metadata_list_json,
+        'iter': iter_metadata_json,
         'description': 'Json file containing '
         },
     '.xml': {
         'func': get_metadata_list_xml,
+        'iter': iter_metadata_xml,
         'description': ''
     },
 }
@@ -42,3 +45,22 @@ def parse(file_path):
         return type_mapper[file_extension]['func'](file_path)
     else:
         return []
+
+
+def iter_entries(file_path):
+    """Generates the AVUs of the metadata file specified by the file path
+    together with their paths, using the parser of its file extension.
+    Files in an unknown format or that do not exist yield nothing.
+
+    Parameters
+    ----------
+        file_path (str): string containing the full path of the metadata file.
+
+    Yields
+    ------
+        tuple: (path, attribute, value, units), path '' if the file does
+        not specify it
+    """
+    file_extension = Path(file_path).suffix
+    if Path(file_path).exists() and file_extension in type_mapper:
+        yield from type_mapper[file_extension]['iter'](file_path)
@@ -0,0 +1,150 @@
+"""Streaming export of metadata to the CSV, JSON and XML formats read by
+the metadata file parsers, extended with the iRODS path of each AVU.
+
+"""
+import csv
+import json
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# Misc
+# Entries written between progress reports.
+PROGRESS_INTERVAL = 1000
+
+
+def write_csv(fileobj, entries):
+    """Write rows of attribute, value, units and path.
+
+    Parameters
+    ----------
+    fileobj : file
+        Text file opened with newline=''.
+    entries : iterable
+        (path, attribute, value, units) tuples.
+
+    """
+    writer = csv.writer(fileobj, delimiter=',')
+    for path, attribute, value, units in entries:
+        writer.writerow([attribute, value, units or '', path])
+
+
+def write_json(fileobj, entries):
+    """Write {"avus": [{"attribute": ..., "value": ..., "units": ...,
+    "path": ...}]} one AVU at a time.
+
+    Parameters
+    ----------
+    fileobj : file
+        Text file.
+    entries : iterable
+        (path, attribute, value, units) tuples.
+
+    """
+    fileobj.write('{"avus": [')
+    separator = '\n'
+    for path, attribute, value, units in entries:
+        avu = {
+            'attribute': attribute,
+            'value': value,
+            'units': units or '',
+            'path': path,
+        }
+        fileobj.write(f'{separator}  {json.dumps(avu)}')
+        separator = ',\n'
+    fileobj.write('\n]}\n')
+
+
+def write_xml(fileobj, entries):
+    """Write <avu> elements with attribute, value, optional units and
+    path children one AVU at a time.
+
+    Parameters
+    ----------
+    fileobj : file
+        Text file.
+    entries : iterable
+        (path, attribute, value, units) tuples.
+
+    """
+    fileobj.write('<?xml version="1.0" encoding="utf-8"?>\n<metadata>\n')
+    for path, attribute, value, units in entries:
+        # Empty elements would be read as None, leave them out.
+        units = f'<units>{escape(units)}</units>' if units else ''
+        fileobj.write(
+            f'  <avu><attribute>{escape(attribute)}</attribute>'
+            f'<value>{escape(value)}</value>{units}'
+            f'<path>{escape(path)}</path></avu>\n')
+    fileobj.write('</metadata>\n')
+
+
+type_mapper = {
+    '.csv': {
+        'func': write_csv,
+        'description': 'CSV file containing rows with a,v,u,path'
+    },
+    '.json': {
+        'func': write_json,
+        'description': 'Json file containing a list of AVUs with path'
+    },
+    '.xml': {
+        'func': write_xml,
+        'description': 'XML file containing avu elements with path'
+    },
+}
+
+
+def _counted(entries, progress):
+    """Pass `entries` on while reporting the number passed to
+    `progress`.
+
+    """
+    count = 0
+    for count, entry in enumerate(entries, start=1):
+        if count % PROGRESS_INTERVAL == 0:
+            progress(count)
+        yield entry
+    progress(count)
+
+
+def write(file_path, entries, progress=None):
+    """Write the metadata `entries` to the file specified by the file
+    path in the format of its extension, without holding more than one
+    entry in memory.
+
+    Parameters
+    ----------
+    file_path : str
+        Full path of the metadata file, ending in .csv, .json or .xml.
+    entries : iterable
+        (path, attribute, value, units) tuples, e.g. from
+        IrodsConnector.iter_metadata.
+    progress : callable
+        Optional, called as progress(count) with the number of entries
+        written so far.
+
+    Returns
+    -------
+    int
+        Number of entries written.
+
+    Raises
+    ------
+    ValueError
+        If the file extension is not supported.
+
+    """
+    file_extension = Path(file_path).suffix
+    if file_extension not in type_mapper:
+        raise ValueError(f'Unsupported metadata file type: {file_extension}')
+    written = 0
+
+    def report(count):
+        nonlocal written
+        written = count
+        if progress is not None:
+            progress(count)
+
+    with open(file_path, 'w', newline='', encoding='utf-8') as fileobj:
+        type_mapper[file_extension]['func'](
+            fileobj, _counted(entries, report))
+    return written
@@ -1,6 +1,26 @@
 import xml.etree.ElementTree as ET
 
 
+def iter_metadata_xml(file_path):
+    """Generate the AVUs of an XML file, parsing one avu element at a
+    time.
+
+    Yields
+    ------
+    tuple
+        (path, attribute, value, units), path '' without a path element.
+    """
+    for _, element in ET.iterparse(file_path):
+        if element.tag != 'avu':
+            continue
+        path_el = element.find('path')
+        unit_el = element.find('units')
+        yield (path_el.text or '' if path_el is not None else '',
+               element.find('attribute').text, element.find('value').text,
+               unit_el.text or '' if unit_el is not None else '')
+        element.clear()
+
+
 def get_metadata_list_xml(file_path):
     """Extract columns from a CSV file.
     Parameters
@@ -0,0 +1,50 @@
+"""Test iBridges in-memory caches.
+
+"""
+import sys
+sys.path.append('..')
+import utils
+
+
+class TestCaches:
+    """
+
+    """
+
+    def test_ttl_cache(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(utils.caches.time, 'monotonic', lambda: now[0])
+        cache = utils.caches.TTLCache(ttl=10, max_entries=2)
+        assert cache.get_or_load('a', lambda: 1) == 1
+        assert cache.get_or_load('a', lambda: 2) == 1
+        cache.put('b', 2)
+        cache.put('c', 3)
+        # Least recently used entry evicted.
+        assert cache.get('a') == (False, None)
+        now[0] = 11.0
+        assert cache.get('c') == (False, None)
+        assert cache.stats() == {
+            'hits': 1, 'misses': 3, 'evictions': 1, 'entries': 1}
+        disabled = utils.caches.TTLCache(ttl=0, max_entries=2)
+        disabled.put('a', 1)
+        assert len(disabled) == 0
+
+    def test_search_invalidation(self):
+        cache = utils.caches.TTLCache(ttl=10, max_entries=10)
+        key = utils.caches.search_key({'path': '/zone/home/%', 'k': None})
+        assert key == utils.caches.search_key({'k': '', 'path': '/zone/home/%'})
+        cache.put((key, 'count'), (0, 1))
+        other = utils.caches.search_key({'path': '/zone/trash'})
+        cache.put((other, 'count'), (0, 2))
+        cache.invalidate(
+            lambda key: utils.caches.search_affected(key[0], ['/zone/home/a']))
+        assert not cache.get((key, 'count'))[0]
+        assert cache.get((other, 'count'))[0]
+
+    def test_path_affected(self):
+        changed = ['/zone/home/coll/obj']
+        assert utils.caches.path_affected('/zone/home/coll/obj', changed)
+        assert utils.caches.path_affected('/zone/home/coll', changed)
+        assert not utils.caches.path_affected('/zone/home', changed)
+        assert not utils.caches.path_affected('/zone/home/coll/obj2', changed)
+        assert utils.caches.path_affected('/zone/home/coll/sub/x', ['/zone/home/coll'])
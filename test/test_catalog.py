@@ -0,0 +1,282 @@
+"""Test iBridges catalog helpers.
+
+"""
+import re
+import sys
+sys.path.append('..')
+import utils
+
+
+class FakeQuery:
+    """Query returning canned rows regardless of its conditions.
+
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def order_by(self, column):
+        return self
+
+    def count(self, column):
+        return self
+
+    def sum(self, column):
+        return self
+
+    def first(self):
+        return next(iter(self.rows), None)
+
+    def get_results(self):
+        return iter(self.rows)
+
+
+class FakeSession:
+    """Session answering queries with the rows of the first of its key
+    columns that is selected.
+
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *columns):
+        for key, rows in self.rows:
+            # Columns compare into query criteria, so check identity.
+            if any(col is key for col in columns):
+                return FakeQuery(rows)
+        return FakeQuery([])
+
+
+class FilteringQuery(FakeQuery):
+    """Query applying its '=' and 'like' conditions to the canned rows.
+
+    """
+
+    def filter(self, *criteria):
+        rows = self.rows
+        for criterion in criteria:
+            rows = [row for row in rows if self._matches(criterion, row)]
+        return FilteringQuery(rows)
+
+    @staticmethod
+    def _matches(criterion, row):
+        value = next((value for key, value in row.items()
+                      if key is criterion.query_key), None)
+        if value is None:
+            return True
+        if criterion.op == 'like':
+            pattern = re.escape(criterion._value).replace(
+                '%', '.*').replace('_', '.')
+            return re.fullmatch(pattern, value) is not None
+        if criterion.op == '=':
+            return value == criterion._value
+        return True
+
+
+class FilteringSession(FakeSession):
+    """Session whose queries apply their conditions.
+
+    """
+
+    def query(self, *columns):
+        return FilteringQuery(super().query(*columns).rows)
+
+
+class TestCatalog:
+    """
+
+    """
+
+    def test_hierarchy_free_space(self):
+        def resc(parent, free_space=None):
+            return {
+                'parent': parent, 'status': None, 'context': None,
+                'free_space': free_space}
+        table = {
+            'repl': resc(None),
+            'pt': resc('repl'),
+            'leaf1': resc('pt', 100),
+            'leaf2': resc('repl', 50),
+            'annotated': resc(None, 7),
+            'child': resc('annotated', 1000),
+            'empty': resc(None),
+        }
+        spaces = utils.catalog.hierarchy_free_space(table)
+        assert spaces['repl'] == 150
+        assert spaces['pt'] == 100
+        assert spaces['annotated'] == 7
+        assert spaces['empty'] == 0
+
+    def test_search_count(self):
+        cat = utils.catalog
+        session = FakeSession([
+            (cat.COLL_ID, [{cat.COLL_ID: '1'}]),
+            (cat.DATA_ID, [{cat.DATA_ID: '2'}]),
+        ])
+        assert cat.search_count(session, {'path': '/zone/%'}) == (1, 2)
+        assert cat.search_count(session, {'object': 'a%'}) == (None, 2)
+
+    def test_snapshot_wildcard_sibling(self):
+        cat = utils.catalog
+
+        def obj(coll, name):
+            return {cat.COLL_NAME: coll, cat.DATA_NAME: name,
+                    cat.DATA_SIZE: 1, cat.DATA_CHECKSUM: None,
+                    cat.DATA_MODIFY_TIME: 0}
+        session = FilteringSession([(cat.DATA_NAME, [
+            obj('/zone/my_data', 'f'), obj('/zone/my_data/sub', 'g'),
+            obj('/zone/myXdata/sub', 'x'), obj('/zone/my_data_old', 'h')])])
+        assert sorted(cat.snapshot(session, '/zone/my_data/')) == [
+            'f', 'sub/g']
+
+    def test_iter_subtree(self):
+        cat = utils.catalog
+        colls = ['/zone/my_coll/sub', '/zone/myXcoll/sub']
+        objs = [{cat.COLL_NAME: coll, cat.DATA_NAME: 'obj'}
+                for coll in ['/zone/my_coll'] + colls]
+        session = FilteringSession([
+            (cat.DATA_NAME, objs),
+            (cat.COLL_NAME, [{cat.COLL_NAME: coll} for coll in colls])])
+        assert list(cat.iter_subtree(session, '/zone/my_coll')) == [
+            ('/zone/my_coll', 'collection'),
+            ('/zone/my_coll/sub', 'collection'),
+            ('/zone/my_coll/obj', 'data_object'),
+            ('/zone/my_coll/sub/obj', 'data_object')]
+
+    def test_subtree_size(self):
+        cat = utils.catalog
+        colls = ['/zone/my_data', '/zone/my_data/sub', '/zone/myXdata/sub']
+        # The first object has two good replicas.
+        counts = [{cat.COLL_NAME: coll, cat.DATA_ID: 1} for coll in colls]
+        groups = [
+            {cat.COLL_NAME: coll, cat.DATA_REPL_NUM: num, cat.DATA_ID: 1,
+             cat.DATA_SIZE: size}
+            for coll, num, size in [
+                (colls[0], 0, 10), (colls[0], 1, 10), (colls[1], 0, 5),
+                (colls[2], 0, 100)]]
+        rows = [{cat.COLL_NAME: coll, cat.DATA_ID: data_id, cat.DATA_SIZE: size}
+                for coll, data_id, size in zip(colls, [1, 2, 3], [10, 5, 100])]
+        session = FilteringSession([
+            (cat.DATA_REPL_NUM, groups), (cat.DATA_SIZE, rows),
+            (cat.DATA_ID, counts)])
+        assert cat.subtree_size(session, '/zone/my_data') == (15, 2)
+
+    def test_stat_many(self):
+        cat = utils.catalog
+        colls = [{cat.COLL_NAME: '/zone/coll', cat.COLL_CREATE_TIME: 1,
+                  cat.COLL_MODIFY_TIME: 2}]
+
+        def obj(name, num, status, checksum, size=10):
+            return {
+                cat.COLL_NAME: '/zone/coll', cat.DATA_NAME: name,
+                cat.DATA_SIZE: size, cat.DATA_CHECKSUM: checksum,
+                cat.DATA_CREATE_TIME: 3, cat.DATA_MODIFY_TIME: 4,
+                cat.DATA_REPL_NUM: num, cat.DATA_REPL_STATUS: status}
+        objs = [obj('a', 0, '0', '', size=5), obj('a', 1, '1', 'sha2:x'),
+                obj('b', 0, '1', '')]
+        stats = cat.stat_many(
+            FakeSession([(cat.COLL_CREATE_TIME, colls),
+                         (cat.DATA_CREATE_TIME, objs)]),
+            ['/zone/coll/', '/zone/coll/a', '/zone/missing'])
+        assert set(stats) == {'/zone/coll', '/zone/coll/a'}
+        assert stats['/zone/coll'].kind == 'collection'
+        stat = stats['/zone/coll/a']
+        assert stat.kind == 'data_object'
+        assert (stat.size, stat.checksum) == (10, 'sha2:x')
+        assert stat.replicas == {0: '0', 1: '1'}
+
+    def test_paths_acls(self):
+        cat = utils.catalog
+        users = [{cat.USER_ID: 1, cat.USER_NAME: 'alice',
+                  cat.USER_ZONE: 'zone', cat.USER_TYPE: 'rodsuser'}]
+        coll_acls = [{cat.COLL_NAME: '/zone/coll', cat.ACL_COLL_NAME: 'own',
+                      cat.ACL_COLL_USER_ID: 1}]
+        data_acls = [
+            {cat.COLL_NAME: '/zone/coll', cat.DATA_NAME: name,
+             cat.ACL_DATA_NAME: 'read object', cat.ACL_DATA_USER_ID: user_id}
+            for name, user_id in [('a', 1), ('a', 2), ('b', 1)]]
+        session = FakeSession([
+            (cat.USER_ID, users), (cat.ACL_COLL_NAME, coll_acls),
+            (cat.ACL_DATA_NAME, data_acls)])
+        acls = cat.paths_acls(session, ['/zone/coll', '/zone/coll/a', '/zone/x'])
+        assert set(acls) == {'/zone/coll', '/zone/coll/a', '/zone/x'}
+        assert [(acl.user_name, acl.access_name) for acl in acls['/zone/coll']] \
+            == [('alice', 'own')]
+        assert [acl.user_name for acl in acls['/zone/coll/a']] == ['alice', '2']
+        assert acls['/zone/x'] == []
+        acls = list(cat.iter_acls(session, '/zone/coll'))
+        assert acls[0].path == '/zone/coll'
+        assert acls[-1].path == '/zone/coll/b'
+
+    def test_iter_metadata(self):
+        cat = utils.catalog
+        coll_meta = [{cat.COLL_NAME: '/zone/coll', cat.META_COLL_ATTR_NAME: 'a',
+                      cat.META_COLL_ATTR_VALUE: '1', cat.META_COLL_ATTR_UNITS: None}]
+        data_meta = [{cat.COLL_NAME: '/zone/coll', cat.DATA_NAME: 'obj',
+                      cat.META_DATA_ATTR_NAME: 'b', cat.META_DATA_ATTR_VALUE: '2',
+                      cat.META_DATA_ATTR_UNITS: 'kg'}]
+        session = FakeSession([
+            (cat.META_COLL_ATTR_NAME, coll_meta),
+            (cat.META_DATA_ATTR_NAME, data_meta)])
+        entries = list(cat.iter_metadata(session, '/zone/coll/', recursive=False))
+        assert entries == [
+            ('/zone/coll', 'a', '1', None), ('/zone/coll/obj', 'b', '2', 'kg')]
+        assert cat.item_metadata(session, '/zone/coll') == entries[:1]
+        coll_meta = [
+            {cat.COLL_NAME: coll, cat.META_COLL_ATTR_NAME: 'a',
+             cat.META_COLL_ATTR_VALUE: '1', cat.META_COLL_ATTR_UNITS: None}
+            for coll in ['/zone/my_coll', '/zone/my_coll/sub', '/zone/myXcoll/sub']]
+        session = FilteringSession([
+            (cat.META_COLL_ATTR_NAME, coll_meta),
+            (cat.META_DATA_ATTR_NAME, [])])
+        assert [entry.path for entry in cat.iter_metadata(
+            session, '/zone/my_coll')] == ['/zone/my_coll', '/zone/my_coll/sub']
+
+    def test_propagate_dry_run(self):
+        cat = utils.catalog
+        users = [{cat.USER_ID: 1, cat.USER_NAME: 'alice',
+                  cat.USER_ZONE: 'zone', cat.USER_TYPE: 'rodsuser'}]
+        coll_acls = [
+            {cat.COLL_NAME: path, cat.ACL_COLL_NAME: name,
+             cat.ACL_COLL_USER_ID: 1}
+            for path, name in [('/zone/coll', 'own'), ('/zone/coll/sub', 'read object')]]
+        session = FakeSession([
+            (cat.USER_ID, users), (cat.ACL_COLL_NAME, coll_acls),
+            (cat.ACL_DATA_NAME, []), (cat.DATA_NAME, []),
+            (cat.COLL_NAME, [{cat.COLL_NAME: '/zone/coll/sub'}])])
+        summary = utils.permissions.propagate(
+            session, '/zone/coll', 'read', 'alice', '', 2, dry_run=True)
+        assert summary.changes == [
+            ('/zone/coll', 'collection', 'own', 'read')]
+        assert summary.unchanged == 1
+        assert summary.report is None
+
+    def test_propagate_wildcard_sibling(self):
+        cat = utils.catalog
+        users = [{cat.USER_ID: 1, cat.USER_NAME: 'alice',
+                  cat.USER_ZONE: 'zone', cat.USER_TYPE: 'rodsuser'}]
+        coll_acls = [
+            {cat.COLL_NAME: path, cat.ACL_COLL_NAME: name,
+             cat.ACL_COLL_USER_ID: 1}
+            for path, name in [('/zone/my_coll', 'read object'),
+                               ('/zone/myXcoll/sub', 'own')]]
+        data_acls = [{cat.COLL_NAME: '/zone/myXcoll/sub', cat.DATA_NAME: 'obj',
+                      cat.ACL_DATA_NAME: 'own', cat.ACL_DATA_USER_ID: 1}]
+        objs = [{cat.COLL_NAME: coll, cat.DATA_NAME: name}
+                for coll, name in [('/zone/my_coll', 'a'),
+                                   ('/zone/myXcoll/sub', 'obj')]]
+        colls = [{cat.COLL_NAME: coll}
+                 for coll in ['/zone/my_coll/sub', '/zone/myXcoll/sub']]
+        session = FilteringSession([
+            (cat.USER_ID, users), (cat.ACL_COLL_NAME, coll_acls),
+            (cat.ACL_DATA_NAME, data_acls), (cat.DATA_NAME, objs),
+            (cat.COLL_NAME, colls)])
+        summary = utils.permissions.propagate(
+            session, '/zone/my_coll', 'write', 'alice', '', 2, dry_run=True)
+        assert sorted(change.path for change in summary.changes) == [
+            '/zone/my_coll', '/zone/my_coll/a', '/zone/my_coll/sub']
+        assert summary.unchanged == 0
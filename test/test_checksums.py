@@ -0,0 +1,82 @@
+"""Test iBridges local checksums.
+
+"""
+import base64
+import hashlib
+import sys
+sys.path.append('..')
+import utils
+
+
+class TestChecksums:
+    """
+
+    """
+
+    def test_local_checksum_formats(self, tmp_path, monkeypatch):
+        # Use a chunk size that does not divide the file size.
+        monkeypatch.setattr(utils.checksums, 'CHUNK_SIZE', 7)
+        data = b'iBridges checksum test data'
+        path = tmp_path.joinpath('file')
+        path.write_bytes(data)
+        sha2 = 'sha2:' + base64.b64encode(hashlib.sha256(data).digest()).decode()
+        md5 = hashlib.md5(data).hexdigest()
+        assert utils.checksums.local_checksum(path) == sha2
+        assert utils.checksums.local_checksum(path, 'md5') == md5
+        assert utils.checksums.same_checksum(sha2, path)
+        assert utils.checksums.same_checksum(md5, path)
+        assert not utils.checksums.same_checksum('sha2:AAAA', path)
+
+    def test_compare_checksums_parallel(self, tmp_path):
+        items = []
+        for num in range(6):
+            path = tmp_path.joinpath(f'file{num}')
+            path.write_bytes(b'x' * num)
+            checksum = utils.checksums.local_checksum(path, 'md5')
+            if num % 2:
+                checksum = utils.checksums.local_checksum(path)
+            if num == 5:
+                checksum = 'sha2:AAAA'
+            items.append((f'/zone/coll/file{num}', str(path), checksum))
+        cache = utils.checksums.ChecksumCache(tmp_path.joinpath('cache.sqlite'))
+        diff, same = utils.checksums.compare_checksums(
+            items, workers=2, cache=cache)
+        assert diff == [items[5][:2]]
+        assert same == [item[:2] for item in items[:5]]
+
+
+    def test_cache_identity_and_invalidation(self, tmp_path):
+        cache = utils.checksums.ChecksumCache(
+            tmp_path.joinpath('cache.sqlite'), max_entries=2)
+        paths = []
+        for num in range(3):
+            path = tmp_path.joinpath('data', f'file{num}')
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(b'x' * num)
+            paths.append(str(path))
+        items = [(path, 'md5') for path in paths[:2]]
+        checksums, stats = cache.lookup(items)
+        assert checksums == {}
+        cache.store({item: 'cached' for item in items}, stats)
+        assert cache.lookup(items)[0] == {item: 'cached' for item in items}
+        # A changed file is a cache miss.
+        with open(paths[0], 'ab') as fileobj:
+            fileobj.write(b'changed')
+        assert list(cache.lookup(items)[0]) == [items[1]]
+        # The least recently used entry is evicted.
+        checksums, stats = cache.lookup([(paths[2], 'md5')])
+        cache.store({(paths[2], 'md5'): 'cached'}, stats)
+        assert len(cache.lookup(items)[0]) == 1
+        cache.invalidate(str(tmp_path.joinpath('data')))
+        assert cache.lookup([(path, 'md5') for path in paths])[0] == {}
+
+    def test_cache_path_spelling(self, tmp_path):
+        cache = utils.checksums.ChecksumCache(tmp_path.joinpath('cache.sqlite'))
+        path = tmp_path.joinpath('data', 'file')
+        path.parent.mkdir()
+        path.write_bytes(b'x')
+        item = (str(tmp_path.joinpath('data', '.', 'file')), 'md5')
+        cache.store({item: 'cached'}, cache.lookup([item])[1])
+        assert cache.lookup([(str(path), 'md5')])[0] == {(str(path), 'md5'): 'cached'}
+        cache.invalidate(str(path))
+        assert cache.lookup([item])[0] == {}
@@ -0,0 +1,48 @@
+"""Test iBridges transfer journal.
+
+"""
+import sys
+sys.path.append('..')
+import utils
+
+
+class TestJournal:
+    """
+
+    """
+
+    def test_resume_pending(self, tmp_path):
+        transfers = [(f'/local/file{num}', f'/zone/coll/file{num}')
+                     for num in range(4)]
+        journal = utils.journal.TransferJournal(
+            'upload', '/local', '/zone/coll', journal_dir=tmp_path)
+        assert not journal.exists
+        journal.plan(transfers)
+        journal.started(*transfers[0])
+        journal.done(*transfers[0])
+        journal.started(*transfers[1])
+        journal.failed(*transfers[2])
+        journal.close()
+        # Simulate a line truncated by an interruption.
+        with open(journal.path, 'a', encoding='utf-8') as journalfd:
+            journalfd.write('{"event": "do')
+        resumed = utils.journal.TransferJournal(
+            'upload', '/local', '/zone/coll', journal_dir=tmp_path)
+        assert resumed.exists
+        assert sorted(resumed.pending()) == transfers[1:]
+        resumed.finish()
+        assert not resumed.exists
+
+    def test_resumable_expiry(self, tmp_path):
+        journal = utils.journal.TransferJournal(
+            'download', '/zone/coll', '/local', journal_dir=tmp_path)
+        assert not journal.resumable
+        journal.plan([('/zone/coll/a', '/local/a')])
+        journal.close()
+        assert journal.resumable
+        stale = utils.journal.TransferJournal(
+            'download', '/zone/coll', '/local', journal_dir=tmp_path,
+            max_age=-1)
+        assert stale.exists and not stale.resumable
+        stale.discard()
+        assert not journal.exists
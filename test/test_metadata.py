@@ -0,0 +1,162 @@
+"""Test iBridges metadata files.
+
+"""
+import sys
+import threading
+sys.path.append('..')
+import irods.exception
+import meta
+import utils
+
+
+class TestMetadataFiles:
+    """
+
+    """
+
+    def test_export_round_trip(self, tmp_path):
+        entries = [
+            ('/zone/coll', 'a', '1', None),
+            ('/zone/coll/obj', 'b<&>', 'x,"y"', 'kg'),
+        ]
+        avus = [['a', '1', ''], ['b<&>', 'x,"y"', 'kg']]
+        for suffix in ['.csv', '.json', '.xml']:
+            path = str(tmp_path.joinpath('meta' + suffix))
+            reported = []
+            count = meta.metadataFileWriter.write(
+                path, iter(entries), reported.append)
+            assert count == 2
+            assert reported[-1] == 2
+            assert meta.metadataFileParser.parse(path) == avus
+
+
+class FakeMetadataManager:
+    """Records atomic requests, failing the ones for `denied` paths.
+
+    """
+
+    def __init__(self, denied):
+        self.denied = denied
+        self.requests = []
+
+    def apply_atomic_operations(self, model, path, *operations):
+        if path in self.denied:
+            raise irods.exception.CAT_NO_ACCESS_PERMISSION()
+        self.requests.append((model, path, operations))
+
+
+class FakeQuery:
+    def filter(self, *criteria):
+        return self
+
+    def get_results(self):
+        return iter([])
+
+
+class FakeSession:
+    def __init__(self, denied=()):
+        self.metadata = FakeMetadataManager(denied)
+
+    def query(self, *columns):
+        return FakeQuery()
+
+
+class TestBulkMetadata:
+    """
+
+    """
+
+    def test_apply_operations(self):
+        session = FakeSession(denied=['/zone/b'])
+        operations = utils.metadata.add_operations([('A', '1', None)])
+        targets = [
+            ('/zone/a', 'collection', operations),
+            ('/zone/b', 'data_object', operations),
+            ('/zone/c', 'data_object', operations),
+        ]
+        report = utils.metadata.apply_operations(session, targets, 2)
+        assert sorted(report.succeeded) == [
+            ('/zone/a', 'collection'), ('/zone/c', 'data_object')]
+        assert [item[:2] for item in report.failed] == [
+            ('/zone/b', 'data_object')]
+        assert len(session.metadata.requests) == 2
+        assert all(len(request[2]) == 1 for request in session.metadata.requests)
+
+    def test_apply_operations_same_path(self):
+        session = FakeSession()
+        targets = [
+            ('/zone/a', 'collection',
+             utils.metadata.add_operations([('A', '1', None)])),
+            ('/zone/a', 'collection',
+             utils.metadata.add_operations([('B', '2', None)])),
+        ]
+        report = utils.metadata.apply_operations(session, targets, 1)
+        assert report.succeeded == [('/zone/a', 'collection')] * 2
+        assert sorted(request[2][0].avu.name
+                      for request in session.metadata.requests) == ['A', 'B']
+
+    def test_upsert_operations(self):
+        current = [
+            utils.catalog.MetaEntry('/zone/a', 'A', '1', ''),
+            utils.catalog.MetaEntry('/zone/a', 'A', '2', 'kg'),
+            utils.catalog.MetaEntry('/zone/a', 'B', '1', None),
+            utils.catalog.MetaEntry('/zone/a', 'C', '3', None),
+        ]
+        operations = utils.metadata.upsert_operations(
+            current, [('A', '1', None), ('B', '2', None), ('D', '4', 'm')])
+        assert [(op.operation, op.avu.name, op.avu.value)
+                for op in operations] == [
+            ('remove', 'A', '2'), ('remove', 'B', '1'),
+            ('add', 'B', '2'), ('add', 'D', '4')]
+        assert utils.metadata.upsert_operations(
+            current, [('C', '3', '')]) == []
+
+    def test_group_entries(self, tmp_path):
+        path = str(tmp_path.joinpath('meta.csv'))
+        meta.metadataFileWriter.write(path, iter([
+            ('/zone/coll', 'a', '1', None),
+            ('obj', 'b', '2', 'kg'),
+            ('obj', 'c', '3', ''),
+            ('/zone/gone', 'd', '4', ''),
+        ]))
+        groups = list(utils.metadata.group_entries(
+            meta.metadataFileParser.iter_entries(path), '/zone/coll'))
+        assert groups == [
+            ('/zone/coll', [('a', '1', '')]),
+            ('/zone/coll/obj', [('b', '2', 'kg'), ('c', '3', '')]),
+            ('/zone/gone', [('d', '4', '')]),
+        ]
+
+    def test_import_entries_merged(self, monkeypatch):
+        def stat_many(session, paths):
+            return {path: utils.catalog.PathStat(
+                path, 'data_object', 0, None, None, None, {})
+                for path in paths if path != '/zone/gone'}
+
+        monkeypatch.setattr(utils.catalog, 'stat_many', stat_many)
+        session = FakeSession()
+        summary = utils.metadata.import_entries(session, [
+            ('/zone/a', 'x', '1', None),
+            ('/zone/b', 'y', '2', None),
+            ('/zone/a', 'z', '3', None),
+            ('/zone/gone', 'x', '4', None),
+        ], 1)
+        assert (summary.items, summary.avus) == (2, 3)
+        assert summary.missing == ['/zone/gone']
+        assert sorted((request[1], len(request[2]))
+                      for request in session.metadata.requests) == [
+            ('/zone/a', 2), ('/zone/b', 1)]
+
+    def test_tag_tree_cancel(self):
+        session = FakeSession()
+        counts = []
+        report = utils.metadata.tag_tree(
+            session, '/zone/coll/', [('ELN', 'url', None)], 2, counts.append)
+        assert report.succeeded == [('/zone/coll', 'collection')]
+        assert counts == [1]
+        cancel = threading.Event()
+        cancel.set()
+        report = utils.metadata.tag_tree(
+            session, '/zone/coll', [('ELN', 'url', None)], 2, cancel=cancel)
+        assert len(report) == 0
+        assert len(session.metadata.requests) == 1
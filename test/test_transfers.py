@@ -0,0 +1,115 @@
+"""Test iBridges transfer scheduling.
+
+"""
+import os
+import sys
+import tarfile
+import threading
+sys.path.append('..')
+import utils
+
+
+class TestTransfers:
+    """
+
+    """
+
+    def test_scheduler_all_succeed(self):
+        done = []
+        lock = threading.Lock()
+
+        def transfer(src, dst):
+            with lock:
+                done.append((src, dst))
+
+        items = [(f'src{num}', f'dst{num}') for num in range(100)]
+        scheduler = utils.transfers.TransferScheduler(transfer, workers=8)
+        report = scheduler.run(items)
+        assert report.ok
+        assert len(report) == 100
+        assert sorted(done) == sorted(items)
+
+    def test_scheduler_failure_does_not_abort(self):
+        def transfer(src, dst):
+            if src == 'bad':
+                raise OSError('broken')
+
+        items = [('good1', 'a'), ('bad', 'b'), ('good2', 'c')]
+        calls = []
+        scheduler = utils.transfers.TransferScheduler(transfer, workers=2)
+        report = scheduler.run(
+            items, callback=lambda src, dst, error: calls.append(src))
+        assert not report.ok
+        assert len(report.succeeded) == 2
+        assert report.failed[0][0] == 'bad'
+        assert sorted(calls) == ['bad', 'good1', 'good2']
+        assert '2 of 3 items transferred' in report.summary()
+
+    def test_run_job_journal(self, tmp_path):
+        journal = utils.journal.TransferJournal(
+            'upload', str(tmp_path.joinpath('src')), '/zone/coll',
+            journal_dir=str(tmp_path))
+
+        def transfer(src, dst):
+            if src == 'bad':
+                raise OSError('broken')
+
+        items = [('good', 'a'), ('bad', 'b')]
+        journal.plan(items)
+        try:
+            utils.transfers.run_job(transfer, items, 'upload', 2, journal)
+        except utils.transfers.TransferError as error:
+            assert error.report.failed[0][0] == 'bad'
+        else:
+            raise AssertionError('no TransferError')
+        assert journal.pending() == [('bad', 'b')]
+
+    def test_bundle_split_and_stream(self, tmp_path):
+        transfers = []
+        for num, size in enumerate([1, 10, 1000]):
+            local_path = tmp_path.joinpath(f'file{num}')
+            local_path.write_bytes(b'x' * size)
+            transfers.append((str(local_path), f'/zone/coll/file{num}'))
+        small, large = utils.bundles.split_by_size(transfers, 100)
+        assert len(small) == 2
+        assert len(large) == 1
+        tar_path = tmp_path.joinpath(utils.bundles.bundle_name())
+        with open(tar_path, 'wb') as tarfd:
+            utils.bundles.stream_tar(
+                tarfd, [(local, f'sub/{os.path.basename(local)}')
+                        for local, _ in small])
+        with tarfile.open(tar_path) as tar:
+            assert tar.getnames() == ['sub/file0', 'sub/file1']
+
+    def test_icommands_output_parsing(self):
+        stdout = ('   file 1.txt    0.012 MB | 0.05 sec | 0 thr |  0.2 MB/s\n'
+                  '   file2.txt     0.000 MB | 0.01 sec | 0 thr |  0.0 MB/s\n')
+        assert utils.icommands.parse_progress(stdout) == {
+            'file 1.txt', 'file2.txt'}
+        batch = [('/data/file1', '/zone/coll/file1'),
+                 ('/data/file10', '/zone/coll/file10')]
+        stderr = ('ERROR: putUtil: put error for /zone/coll/file10, '
+                  'status = -312000 status = -312000 OVERWRITE_WITHOUT_FORCE_FLAG\n')
+        assert list(utils.icommands.parse_errors(stderr, batch)) == [
+            '/data/file10']
+
+    def test_thread_policy_autotune(self, tmp_path):
+        policy = utils.transfers.ThreadPolicy(
+            max_threads=8, threshold=1000,
+            history_path=tmp_path.joinpath('history.json'))
+        assert policy.threads(10) == 1
+        assert policy.threads(None) == 8
+        assert policy.candidates == [8, 4, 2]
+        # Candidates are tried in turn until each has enough samples.
+        speeds = {8: 2.0, 4: 4.0, 2: 1.0}
+        for _ in range(len(policy.candidates) * utils.transfers.MIN_SAMPLES):
+            threads = policy.threads(5000)
+            policy.record(5000, threads, 1 / speeds[threads])
+        assert policy.threads(5000) == 4
+        policy.save()
+        reloaded = utils.transfers.ThreadPolicy(
+            max_threads=8, threshold=1000,
+            history_path=tmp_path.joinpath('history.json'))
+        assert reloaded.threads(5000) == 4
+        # Other size classes are tuned separately.
+        assert reloaded.threads(10**6) == 8
@@ -1,8 +1,6 @@
 """IrodsConnector base
 
 """
-import base64
-import hashlib
 import json
 import logging
 import os
@@ -10,7 +8,7 @@ import random
 import shutil
 import ssl
 import string
-import subprocess
+import time
 
 import irods.access
 import irods.collection
@@ -32,22 +30,10 @@ import utils
 ALL_KW = irods.keywords.ALL_KW
 FORCE_FLAG_KW = irods.keywords.FORCE_FLAG_KW
 NUM_THREADS_KW = irods.keywords.NUM_THREADS_KW  # 'num_threads'
-DEST_RESC_NAME_KW = irods.keywords.DEST_RESC_NAME_KW
 RESC_NAME_KW = irods.keywords.RESC_NAME_KW
 VERIFY_CHKSUM_KW = irods.keywords.VERIFY_CHKSUM_KW
 REG_CHKSUM_KW = irods.keywords.REG_CHKSUM_KW
 # Map model names to iquest attribute names
-COLL_NAME = irods.models.Collection.name
-DATA_NAME = irods.models.DataObject.name
-DATA_CHECKSUM = irods.models.DataObject.checksum
-META_COLL_ATTR_NAME = irods.models.CollectionMeta.name
-META_COLL_ATTR_VALUE = irods.models.CollectionMeta.value
-META_DATA_ATTR_NAME = irods.models.DataObjectMeta.name
-META_DATA_ATTR_VALUE = irods.models.DataObjectMeta.value
-RESC_NAME = irods.models.Resource.name
-RESC_PARENT = irods.models.Resource.parent
-RESC_STATUS = irods.models.Resource.status
-RESC_CONTEXT = irods.models.Resource.context
 USER_GROUP_NAME = irods.models.UserGroup.name
 USER_NAME = irods.models.User.name
 USER_TYPE = irods.models.User.type
@@ -62,6 +48,8 @@ YEL = '\x1b[1;33m'
 BUFF_SIZE = 10**9
 MULTIPLIER = 1 / 10**9
 NUM_THREADS = 4
+RESOURCE_CACHE_TTL = 600
+SEARCH_PAGE_SIZE = 50
 
 
 class FreeSpaceNotSet(Exception):
@@ -80,11 +68,15 @@ class IrodsConnector():
     """Create a connection to an iRODS system.
 
     """
+    _catalog_cache = None
     _ienv = {}
     _password = ''
     _permissions = None
     _resources = None
+    _resources_time = 0.0
+    _search_cache = None
     _session = None
+    _thread_policy = None
 
     def __init__(self, irods_env_file='', password='', application_name=None):
         """iRODS authentication with Python client.
@@ -116,6 +108,60 @@ class IrodsConnector():
         self.application_name = application_name
         self.multiplier = MULTIPLIER
 
+    @property
+    def bundle_threshold(self):
+        """Size below which files of a folder upload are bundled.
+
+        Returns
+        -------
+        int
+            Value of the 'bundle_threshold' setting in bytes, 0 means
+            bundling is disabled.
+
+        """
+        return int(self.ienv.get('bundle_threshold', 0))
+
+    @property
+    def cache_stats(self):
+        """Hit and miss statistics of the catalog and search caches.
+
+        Returns
+        -------
+        dict
+            Statistics per cache, see TTLCache.stats.
+
+        """
+        return {
+            'catalog': self.catalog_cache.stats(),
+            'search': self.search_cache.stats(),
+        }
+
+    @property
+    def catalog_cache(self):
+        """Read-through cache of catalog lookups per path: existence,
+        collections, data objects, their contents, ACLs and metadata.
+
+        Returns
+        -------
+        TTLCache
+            Configured by the 'catalog_cache_ttl' (seconds, 0 disables)
+            and 'catalog_cache_size' settings.
+
+        """
+        if self._catalog_cache is None:
+            self._catalog_cache = utils.caches.TTLCache(
+                ttl=float(self.ienv.get(
+                    'catalog_cache_ttl', utils.caches.CATALOG_CACHE_TTL)),
+                max_entries=int(self.ienv.get(
+                    'catalog_cache_size', utils.caches.CATALOG_CACHE_SIZE)))
+        return self._catalog_cache
+
+    def _cached(self, lookup, path, loader):
+        """Read `lookup` of `path` through the catalog cache.
+
+        """
+        return self.catalog_cache.get_or_load((lookup, str(path)), loader)
+
     @property
     def davrods(self):
         """DavRODS server URL.
@@ -148,9 +194,78 @@ class IrodsConnector():
         Returns
         -------
         bool
-            Are the iCommands available?
+            Are the iCommands enabled with the 'use_icommands' setting
+            and available?
+
+        """
+        return bool(self.ienv.get('use_icommands', False)) and \
+            utils.icommands.available()
+
+    @property
+    def search_cache(self):
+        """Cache of search results keyed by normalized criteria.
+
+        Returns
+        -------
+        TTLCache
+            Configured by the 'search_cache_ttl' (seconds, 0 disables)
+            and 'search_cache_size' settings.
+
+        """
+        if self._search_cache is None:
+            self._search_cache = utils.caches.TTLCache(
+                ttl=float(self.ienv.get(
+                    'search_cache_ttl', utils.caches.SEARCH_CACHE_TTL)),
+                max_entries=int(self.ienv.get(
+                    'search_cache_size', utils.caches.SEARCH_CACHE_SIZE)))
+        return self._search_cache
+
+    def _invalidate(self, *paths):
+        """Drop the cached results that changes to `paths` may affect,
+        all of them if no or many paths are given.
+
         """
-        return subprocess.call(['which', 'iinit'], shell=True, stderr=subprocess.PIPE) == 0
+        if not paths or len(paths) > utils.caches.MAX_INVALIDATE_PATHS:
+            self.catalog_cache.invalidate()
+            self.search_cache.invalidate()
+            return
+        paths = [str(path) for path in paths]
+        self.catalog_cache.invalidate(
+            lambda key: utils.caches.path_affected(key[1], paths))
+        self.search_cache.invalidate(
+            lambda key: utils.caches.search_affected(key[0], paths))
+
+    @property
+    def thread_policy(self):
+        """Policy choosing the number of streams per file transfer.
+
+        Returns
+        -------
+        ThreadPolicy
+            Configured by the 'transfer_threads', 'parallel_threshold'
+            and 'transfer_autotune' settings.
+
+        """
+        if self._thread_policy is None:
+            self._thread_policy = utils.transfers.ThreadPolicy(
+                max_threads=self.ienv.get('transfer_threads', NUM_THREADS),
+                threshold=self.ienv.get(
+                    'parallel_threshold', utils.transfers.PARALLEL_THRESHOLD),
+                autotune=self.ienv.get('transfer_autotune', True))
+        return self._thread_policy
+
+    @property
+    def transfer_workers(self):
+        """Number of concurrent workers for multi-file transfers.
+
+        Returns
+        -------
+        int
+            Value of the 'transfer_workers' setting or the default.
+
+        """
+        return max(1, int(self.ienv.get(
+            'transfer_workers', utils.transfers.DEFAULT_WORKERS)))
 
     @property
     def ienv(self):
@@ -248,26 +363,29 @@ class IrodsConnector():
               so annotated, otherwise it is the sum of the free_space of
               all its children.
 
+        The resources are fetched in one query and reused for the
+        number of seconds of the 'resource_cache_ttl' setting, see
+        refresh_resources.
+
         """
-        if self._resources is None:
-            query = self.session.query(
-                RESC_NAME, RESC_PARENT, RESC_STATUS, RESC_CONTEXT)
+        ttl = float(self.ienv.get('resource_cache_ttl', RESOURCE_CACHE_TTL))
+        if (self._resources is None
+                or time.monotonic() - self._resources_time > ttl):
+            table = utils.catalog.resource_table(self.session)
+            spaces = utils.catalog.hierarchy_free_space(table)
             resc_list = []
-            for item in query.get_results():
-                name, parent, status, context = item.values()
-                free_space = 0
-                if parent is None:
-                    free_space = self.get_free_space(name, multiplier=MULTIPLIER)
+            for name, resc in table.items():
                 metadata = {
-                    'parent': parent,
-                    'status': status,
-                    'context': context,
-                    'free_space': free_space,
+                    'parent': resc['parent'],
+                    'status': resc['status'],
+                    'context': resc['context'],
+                    'free_space': round(spaces[name] * MULTIPLIER),
                 }
                 resc_list.append((name, metadata))
             resc_dict = dict(
                 sorted(resc_list, key=lambda item: str.casefold(item[0])))
             self._resources = resc_dict
+            self._resources_time = time.monotonic()
             # Check for inclusion of default resource.
             resc_names = []
             for name, metadata in self._resources.items():
@@ -291,6 +409,13 @@ class IrodsConnector():
                 print('    -=WARNING=-    '*4)
         return self._resources
 
+    def refresh_resources(self):
+        """Discard the cached resources, so that they are queried
+        again upon next use.
+
+        """
+        self._resources = None
+
     @property
     def session(self):
         """iRODS session.
@@ -444,17 +569,51 @@ class IrodsConnector():
         """
         logging.info('GET PERMISSIONS')
         if isinstance(path, str) and path:
-            try:
-                return self.session.permissions.get(
-                    self.session.collections.get(path))
-            except irods.exception.CollectionDoesNotExist:
-                return self.session.permissions.get(
-                    self.session.data_objects.get(path))
+            return self._cached('permissions', path, lambda: (
+                self.session.permissions.get(self.get_collection(path))
+                if self.collection_exists(path) else
+                self.session.permissions.get(self.get_dataobject(path))))
         if self.is_dataobject_or_collection(obj):
-            return self.session.permissions.get(obj)
+            return self._cached(
+                'permissions', obj.path,
+                lambda: self.session.permissions.get(obj))
         print('WARNING -- `obj` must be or `path` must resolve into, a collection or data object')
         return []
 
+    def get_permissions_many(self, paths):
+        """Discover the ACLs of many collections and/or data objects
+        with a few batched queries.
+
+        Parameters
+        ----------
+        paths : list
+            Paths of iRODS collections and/or data objects.
+
+        Returns
+        -------
+        dict
+            List of iRODSAccess per path, see utils.catalog.paths_acls.
+
+        """
+        return utils.catalog.paths_acls(self.session, paths)
+
+    def iter_permissions(self, coll_path):
+        """Generate the ACLs of everything in and below `coll_path`,
+        e.g. for permission audits of large collections.
+
+        Parameters
+        ----------
+        coll_path : str
+            Path of an iRODS collection.
+
+        Returns
+        -------
+        generator
+            iRODSAccess per path and user, see utils.catalog.iter_acls.
+
+        """
+        return utils.catalog.iter_acls(self.session, coll_path)
+
     def set_permissions(self, perm, path, user='', zone='', recursive=False, admin=False):
         """Set permissions (ACL) for an iRODS collection or data object.
 
@@ -476,8 +635,9 @@ class IrodsConnector():
         """
         acl = irods.access.iRODSAccess(perm, path, user, zone)
         try:
-            if self.dataobject_exists(path) or self.collection_exists(path):
+            if self.stat(path) is not None:
                 self.session.permissions.set(acl, recursive=recursive, admin=admin)
+                self._invalidate(path)
         except irods.exception.CAT_INVALID_USER as ciu:
             print(f'{RED}ACL ERROR: user unknown{DEFAULT}')
             raise ciu
@@ -488,6 +648,43 @@ class IrodsConnector():
                 perm, path, exc_info=True)
             raise cia
 
+    def propagate_permissions(self, perm, path, user, zone='', admin=False,
+                              dry_run=False, progress=None):
+        """Set a permission on a collection and everything below it,
+        only for the items whose permission differs, see
+        utils.permissions.propagate.
+
+        Parameters
+        ----------
+        perm : str
+            Name of permission string: own, read, write, or null.
+        path : str
+            Path of the root collection.
+        user : str
+            Name of user.
+        zone : str
+            Name of user's zone.
+        admin : bool
+            If a 'rodsadmin' apply ACL for another user.
+        dry_run : bool
+            Only compute the changes.
+        progress : callable
+            Optional, called as progress(done, total).
+
+        Returns
+        -------
+        AclSummary
+            Changes, number of unchanged items and the report.
+
+        """
+        try:
+            return utils.permissions.propagate(
+                self.session, str(path), perm, user, zone,
+                self.transfer_workers, admin, dry_run, progress)
+        finally:
+            if not dry_run:
+                self._invalidate(str(path))
+
     def ensure_coll(self, coll_name):
         """Optimally create a collection with `coll_name` if one does
         not exist.
@@ -509,11 +706,86 @@ class IrodsConnector():
         try:
             if self.session.collections.exists(coll_name):
                 return self.session.collections.get(coll_name)
+            self._invalidate(coll_name)
             return self.session.collections.create(coll_name)
         except irods.exception.CAT_NO_ACCESS_PERMISSION as cnap:
             logging.info('ENSURE COLLECTION', exc_info=True)
             raise cnap
 
+    def search_count(self, key_vals=None):
+        """Count the collections and data objects fulfilling the search
+        criteria `key_vals` on the server, see search.
+
+        Parameters
+        ----------
+        key_vals : dict
+            Attribute name mapping to values.
+
+        Returns
+        -------
+        tuple
+            Number of collections (None when not searched for) and
+            number of data objects: (num_colls, num_objs).
+
+        """
+        return self.search_cache.get_or_load(
+            (utils.caches.search_key(key_vals), 'count'),
+            lambda: utils.catalog.search_count(self.session, key_vals or {}))
+
+    def search_page(self, key_vals=None, kind='data_objects', offset=0,
+                    limit=SEARCH_PAGE_SIZE):
+        """Fetch one page of the collections or data objects fulfilling
+        the search criteria `key_vals`, see search.
+
+        Parameters
+        ----------
+        key_vals : dict
+            Attribute name mapping to values.
+        kind : str
+            One of 'collections' or 'data_objects'.
+        offset : int
+            Number of results to skip.
+        limit : int
+            Maximum number of results.
+
+        Returns
+        -------
+        list: [[Collection name, Object name, checksum]], ordered by
+        collection and object name.  Pages are cached, see
+        search_cache.
+
+        """
+        return self.search_cache.get_or_load(
+            (utils.caches.search_key(key_vals), kind, offset, limit),
+            lambda: utils.catalog.search_page(
+                self.session, key_vals or {}, kind, offset, limit))
+
+    def iter_search(self, key_vals=None, page_size=SEARCH_PAGE_SIZE):
+        """Generate the collections, followed by the data objects,
+        fulfilling the search criteria `key_vals`, see search.  Results
+        are fetched from the server one page at a time when consumed.
+
+        Parameters
+        ----------
+        key_vals : dict
+            Attribute name mapping to values.
+        page_size : int
+            Number of results fetched per query.
+
+        Yields
+        ------
+        list: [Collection name, Object name, checksum]
+
+        """
+        for kind in ('collections', 'data_objects'):
+            offset = 0
+            while True:
+                page = self.search_page(key_vals, kind, offset, page_size)
+                yield from page
+                if len(page) < page_size:
+                    break
+                offset += page_size
+
     def search(self, key_vals=None):
         """Given a dictionary with metadata attribute names as keys and
         associated values, query for collections and data objects that
@@ -542,63 +814,19 @@ class IrodsConnector():
         -------
         list: [[Collection name, Object name, checksum]]
 
+        The first three rows hold the numbers found, followed by at
+        most one page of collections and one of data objects.  Use
+        iter_search to page through all results.
+
         """
-        coll_query = None
-        data_query = None
-        # data query
-        if 'checksum' in key_vals or 'object' in key_vals:
-            data_query = self.session.query(
-                COLL_NAME, DATA_NAME, DATA_CHECKSUM)
-            if 'object' in key_vals:
-                if key_vals['object']:
-                    data_query = data_query.filter(
-                        LIKE(DATA_NAME, key_vals['object']))
-            if 'checksum' in key_vals:
-                if key_vals['checksum']:
-                    data_query = data_query.filter(LIKE(
-                        DATA_CHECKSUM, key_vals['checksum']))
-        else:
-            coll_query = self.session.query(COLL_NAME)
-            data_query = self.session.query(
-                COLL_NAME, DATA_NAME, DATA_CHECKSUM)
-
-        if 'path' in key_vals and key_vals['path']:
-            if coll_query:
-                coll_query = coll_query.filter(LIKE(
-                    COLL_NAME, key_vals['path']))
-            data_query = data_query.filter(LIKE(
-                COLL_NAME, key_vals['path']))
-        for key in key_vals:
-            if key not in ['checksum', 'path', 'object']:
-                if data_query:
-                    data_query.filter(META_DATA_ATTR_NAME == key)
-                if coll_query:
-                    coll_query.filter(META_COLL_ATTR_NAME == key)
-                if key_vals[key]:
-                    if data_query:
-                        data_query.filter(
-                            META_DATA_ATTR_VALUE == key_vals[key])
-                    if coll_query:
-                        coll_query.filter(
-                            META_COLL_ATTR_VALUE == key_vals[key])
+        key_vals = key_vals or {}
+        num_colls, num_objs = self.search_count(key_vals)
         results = [['', '', ''], ['', '', ''], ['', '', '']]
-        coll_batch = [[]]
-        data_batch = [[]]
-        # Return only 100 results.
-        if coll_query:
-            num_colls = len(list(coll_query))
+        if num_colls is not None:
             results[0] = [f'Collections found: {num_colls}', '', '']
-            coll_batch = list(coll_query.get_batches())
-        if data_query:
-            num_objs = len(list(data_query))
-            results[1] = [f'Objects found: {num_objs}', '', '']
-            data_batch = list(data_query.get_batches())
-        for res in coll_batch[0][:50]:
-            results.append([res[list(res.keys())[0]], '', ''])
-        for res in data_batch[0][:50]:
-            results.append([res[list(res.keys())[0]],
-                            res[list(res.keys())[1]],
-                            res[list(res.keys())[2]]])
+        results[1] = [f'Objects found: {num_objs}', '', '']
+        results.extend(self.search_page(key_vals, 'collections'))
+        results.extend(self.search_page(key_vals, 'data_objects'))
         return results
 
     def list_resources(self, attr_names: list = None) -> tuple:
@@ -734,18 +962,12 @@ class IrodsConnector():
                resource tree
 
         """
-        try:
-            resc = self.session.resources.get(resc_name)
-        except irods.exception.ResourceDoesNotExist:
+        table = utils.catalog.resource_table(self.session)
+        if resc_name not in table:
             print(f'Resource with name {resc_name} not found')
             return -1
-        if resc.free_space is not None:
-            return round(int(resc.free_space) * multiplier)
-        children = get_resource_children(resc)
-        free_space = sum((
-            int(child.free_space) for child in children
-            if child.free_space is not None))
-        return round(free_space * multiplier)
+        spaces = utils.catalog.hierarchy_free_space(table)
+        return round(spaces[resc_name] * multiplier)
 
     def dataobject_exists(self, path):
         """Check if an iRODS data object exists.
@@ -761,7 +983,9 @@ class IrodsConnector():
             Existence of the data object with `path`.
 
         """
-        return self.session.data_objects.exists(path)
+        return self._cached(
+            'dataobject_exists', path,
+            lambda: self.session.data_objects.exists(path))
 
     def collection_exists(self, path):
         """Check if an iRODS collection exists.
@@ -777,7 +1001,9 @@ class IrodsConnector():
             Existance of the collection with `path`.
 
         """
-        return self.session.collections.exists(path)
+        return self._cached(
+            'collection_exists', path,
+            lambda: self.session.collections.exists(path))
 
     def get_dataobject(self, path):
         """Instantiate an iRODS data object.
@@ -794,7 +1020,9 @@ class IrodsConnector():
 
         """
         if self.dataobject_exists(path):
-            return self.session.data_objects.get(path)
+            return self._cached(
+                'dataobject', path,
+                lambda: self.session.data_objects.get(path))
         raise irods.exception.DataObjectDoesNotExist(path)
 
     def get_collection(self, path):
@@ -812,9 +1040,101 @@ class IrodsConnector():
 
         """
         if self.collection_exists(path):
-            return self.session.collections.get(path)
+            return self._cached(
+                'collection', path,
+                lambda: self.session.collections.get(path))
         raise irods.exception.CollectionDoesNotExist(path)
 
+    def stat(self, path):
+        """Look up a collection or data object in the catalog, see
+        stat_many.
+
+        Parameters
+        ----------
+        path : str
+            Path of an iRODS collection or data object.
+
+        Returns
+        -------
+        PathStat
+            Kind, size, checksum, times and replica statuses, or None if
+            `path` does not exist.
+
+        """
+        return self._cached('stat', path, lambda: next(
+            iter(utils.catalog.stat_many(self.session, [path]).values()),
+            None))
+
+    def stat_many(self, paths):
+        """Look up many collections and/or data objects with a few
+        batched queries.
+
+        Parameters
+        ----------
+        paths : list
+            Paths of iRODS collections and/or data objects.
+
+        Returns
+        -------
+        dict
+            PathStat per existing path, see utils.catalog.stat_many.
+
+        """
+        return utils.catalog.stat_many(self.session, paths)
+
+    def get_contents(self, coll):
+        """List the subcollections and data objects of a collection.
+
+        Parameters
+        ----------
+        coll : iRODSCollection
+            Instance of an iRODS collection.
+
+        Returns
+        -------
+        tuple
+            Lists of iRODSCollection and iRODSDataObject instances:
+            (subcollections, data_objects).
+
+        """
+        return self._cached('contents', coll.path, lambda: (
+            coll.subcollections, coll.data_objects))
+
+    def iter_metadata(self, coll_path, recursive=True):
+        """Stream the metadata of a collection and everything in it.
+
+        Parameters
+        ----------
+        coll_path : str
+            Path of an iRODS collection.
+        recursive : bool
+            Include everything below its subcollections.
+
+        Returns
+        -------
+        generator
+            MetaEntry (path, name, value, units) per AVU, see
+            utils.catalog.iter_metadata.
+
+        """
+        return utils.catalog.iter_metadata(self.session, coll_path, recursive)
+
+    def get_metadata(self, item):
+        """List the metadata of a collection or data object.
+
+        Parameters
+        ----------
+        item : iRODSCollection, iRODSDataObject
+            Instance of an iRODS collection or data object.
+
+        Returns
+        -------
+        list
+            iRODSMeta instances.
+
+        """
+        return self._cached('metadata', item.path, item.metadata.items)
+
     def irods_put(self, local_path: str, irods_path: str, resc_name: str = ''):
         """Upload `local_path` to `irods_path` following iRODS
         `options`.
@@ -829,10 +1149,15 @@ class IrodsConnector():
             Optional resource name.
 
         """
+        size = None
+        if os.path.isfile(local_path):
+            size = os.path.getsize(local_path)
+        num_threads = self.thread_policy.threads(size)
+        start = time.monotonic()
         if not self.icommands:
             options = {
                 ALL_KW: '',
-                NUM_THREADS_KW: NUM_THREADS,
+                NUM_THREADS_KW: num_threads,
                 REG_CHKSUM_KW: '',
                 VERIFY_CHKSUM_KW: ''
             }
@@ -840,13 +1165,15 @@ class IrodsConnector():
                  options[RESC_NAME_KW] = resc_name
             self.session.data_objects.put(local_path, irods_path, **options)
         else:
-            commands = [f'iput -aK -N {NUM_THREADS}']
+            command = ['iput', '-aK', '-N', str(num_threads)]
             if resc_name:
-                commands.append(f'-R {resc_name}')
-            commands.append(f'{local_path} {irods_path}')
-            subprocess.call(' '.join(commands), shell=True)
+                command.extend(['-R', resc_name])
+            utils.icommands.run(command + [str(local_path), str(irods_path)])
+        if size is not None:
+            self.thread_policy.record(
+                size, num_threads, time.monotonic() - start)
 
-    def irods_get(self, irods_path, local_path, options=None):
+    def irods_get(self, irods_path, local_path, options=None, size=None):
         """Download `irods_path` to `local_path` following iRODS
         `options`.
 
@@ -858,19 +1185,27 @@ class IrodsConnector():
             Path of local file or directory/folder.
         options : dict
             iRODS transfer options.
+        size : int
+            Optional size of the data object in bytes, used to choose
+            the number of streams.
 
         """
         if options is None:
             options = {}
+        num_threads = self.thread_policy.threads(size)
+        start = time.monotonic()
         if not self.icommands:
             options.update({
-                NUM_THREADS_KW: NUM_THREADS,
+                NUM_THREADS_KW: num_threads,
                 VERIFY_CHKSUM_KW: '',
                 })
             self.session.data_objects.get(irods_path, local_path, **options)
         else:
-            commands = [f'iget -K -N {NUM_THREADS} {irods_path} {local_path}']
-            subprocess.call(' '.join(commands), shell=True)
+            utils.icommands.run(['iget', '-K', '-N', str(num_threads),
+                                 str(irods_path), str(local_path)])
+        if size is not None:
+            self.thread_policy.record(
+                size, num_threads, time.monotonic() - start)
 
     @staticmethod
     def is_dataobject(obj):
@@ -926,7 +1261,7 @@ class IrodsConnector():
             irods.collection.iRODSCollection))
 
     def upload_data(self, src_path, dst_coll, resc_name, size, buff=BUFF_SIZE,
-                    force=False, diffs=None):
+                    force=False, diffs=None, resume=False):
         """Upload data from the local `src_path` to the iRODS
         `dst_coll`.
 
@@ -952,6 +1287,20 @@ class IrodsConnector():
             `resc_name`.
         diffs : list
             Output of diff functions.
+        resume : bool
+            Continue a resumable journaled job (see
+            TransferJournal.resumable) instead of a new diff.
+
+        Returns
+        -------
+        TransferReport
+            Per-file results when uploading a folder/directory.
+
+        Files are uploaded concurrently by `transfer_workers` threads.
+        A failed file does not abort the others, instead a
+        TransferError holding the report is raised at the end.  The
+        progress of a folder upload is kept in a TransferJournal, so
+        that a rerun with `resume` continues an interrupted job.
 
         """
         logging.info(
@@ -968,10 +1317,17 @@ class IrodsConnector():
                 'ERROR iRODS upload: not a valid source path')
         if resc_name in [None, '']:
             resc_name = self.default_resc
+        journal = utils.journal.TransferJournal('upload', src_path, cmp_path)
         if diffs is None:
             if src_path.is_file():
                 diff, only_fs, _, _ = self.diffObjFile(
                     cmp_path, src_path, scope='checksum')
+            elif resume and journal.resumable:
+                # Resume an interrupted job without a new diff.
+                logging.info('IRODS UPLOAD resuming %s', journal.path)
+                diff = [(irods_path, local_path)
+                        for local_path, irods_path in journal.pending()]
+                only_fs = []
             else:
                 cmp_coll = self.ensure_coll(cmp_path)
                 diff, only_fs, _, _ = self.diffIrodsLocalfs(
@@ -992,34 +1348,45 @@ class IrodsConnector():
                 logging.info(
                     'IRODS UPLOADING file %s to %s', src_path, cmp_path)
                 self.irods_put(src_path, cmp_path, resc_name)
+                self.thread_policy.save()
             # Collection
             else:
                 logging.info('IRODS UPLOAD started:')
-                for irods_path, local_path in diff:
-                    # Upload files to distinct data objects.
-                    _ = self.ensure_coll(irods_dirname(irods_path))
-                    logging.info(
-                        'REPLACE: %s with %s', irods_path, local_path)
-                    self.irods_put(local_path, irods_path, resc_name)
-                # Variable `only_fs` can contain files and folders.
-                for rel_path in only_fs:
-                    # Create subcollections and upload.
-                    rel_path = utils.utils.PurePath(rel_path)
-                    local_path = src_path.joinpath(rel_path)
-                    if len(rel_path.parts) > 1:
-                        new_path = cmp_path.joinpath(rel_path.parent)
-                    else:
-                        new_path = cmp_path
-                    _ = self.ensure_coll(new_path)
-                    logging.info('UPLOAD: %s to %s', local_path, new_path)
-                    irods_path = new_path.joinpath(rel_path.name)
-                    logging.info('CREATE %s', irods_path)
-                    self.irods_put(local_path, irods_path, resc_name)
+                transfers, new_transfers = utils.transfers.upload_plan(
+                    src_path, cmp_path, diff, only_fs)
+                # Create each (sub)collection once instead of per file.
+                coll_names = {
+                    str(irods_dirname(irods_path))
+                    for _, irods_path in transfers + new_transfers}
+                for coll_name in sorted(coll_names):
+                    _ = self.ensure_coll(coll_name)
+                journal.plan(transfers + new_transfers)
+                # Only new files can be bundled, extraction does not
+                # overwrite existing data objects.
+                if self.bundle_threshold > 0:
+                    remaining = utils.bundles.upload_bundle(
+                        self, new_transfers, cmp_path, resc_name)
+                    for local_path, irods_path in new_transfers:
+                        if (local_path, irods_path) not in remaining:
+                            journal.done(local_path, irods_path)
+                    new_transfers = remaining
+                transfers.extend(new_transfers)
+                command = [
+                    'iput', '-aKfv', '-N', str(self.thread_policy.max_threads)]
+                if resc_name:
+                    command.extend(['-R', resc_name])
+                return self._run_transfers(
+                    lambda local_path, irods_path: self.irods_put(
+                        local_path, irods_path, resc_name),
+                    transfers, 'upload', journal, command)
         except Exception as error:
             logging.info('UPLOAD ERROR', exc_info=True)
             raise error
+        finally:
+            self._invalidate(cmp_path)
 
-    def download_data(self, src_obj, dst_path, size, buff=BUFF_SIZE, force=False, diffs=None):
+    def download_data(self, src_obj, dst_path, size, buff=BUFF_SIZE, force=False, diffs=None,
+                      resume=False):
         """Dowload data from an iRODS `src_obj` to the local `dst_path`.
 
         When `src_obj` is a collection, download its contents
@@ -1043,6 +1410,19 @@ class IrodsConnector():
             Ignore storage capacity on the storage system of `dst_path`.
         diffs : list
             Output of diff functions.
+        resume : bool
+            Continue a resumable journaled job (see
+            TransferJournal.resumable) instead of a new diff.
+
+        Returns
+        -------
+        TransferReport
+            Per-object results when downloading a collection.
+
+        Data objects are downloaded concurrently by `transfer_workers`
+        threads sharing the session's connection pool.  The progress of
+        a collection download is kept in a TransferJournal, so that a
+        rerun with `resume` continues an interrupted job.
 
         """
         logging.info('iRODS DOWNLOAD: %s-->%s', src_obj.path, dst_path)
@@ -1069,14 +1449,22 @@ class IrodsConnector():
         # TODO perhaps treat this path as part of the diff
         if self.is_collection(src_obj) and not cmp_path.is_dir():
             os.mkdir(cmp_path)
+        journal = utils.journal.TransferJournal('download', src_path, cmp_path)
+        # Snapshot of the collection, shared by the diff and the sizes.
+        catalog = None
         # Only download if not present or difference in files.
         if diffs is None:
             if self.is_dataobject(src_obj):
                 diff, _, only_irods, _ = self.diffObjFile(
                     src_path, cmp_path, scope="checksum")
+            elif resume and journal.resumable:
+                # Resume an interrupted job without a new diff.
+                logging.info('IRODS DOWNLOAD resuming %s', journal.path)
+                diff, only_irods = journal.pending(), []
             else:
+                catalog = utils.catalog.snapshot(self.session, src_path)
                 diff, _, only_irods, _ = self.diffIrodsLocalfs(
-                    src_obj, cmp_path, scope="checksum")
+                    src_obj, cmp_path, scope="checksum", catalog=catalog)
         else:
             diff, _, only_irods, _ = diffs
         # Check space on destination.
@@ -1098,224 +1486,293 @@ class IrodsConnector():
                     'IRODS DOWNLOADING object: %s to %s',
                     src_path, cmp_path)
                 self.irods_get(
-                    src_path, cmp_path, options=options)
+                    src_path, cmp_path, options=options, size=src_obj.size)
+                self.thread_policy.save()
             # Collection
             # TODO add support for "downloading" empty collections?
             else:
                 logging.info("IRODS DOWNLOAD started:")
-                for irods_path, local_path in diff:
-                    # Download data objects to distinct files.
-                    logging.info(
-                        'REPLACE: %s with %s', local_path, irods_path)
-                    self.irods_get(irods_path, local_path, options=options)
-                # Variable `only_irods` can contain data objects and
-                # collections.
-                for rel_path in only_irods:
-                    # Create subdirectories and download.
-                    rel_path = utils.utils.PurePath(rel_path)
-                    irods_path = src_path.joinpath(rel_path)
-                    local_path = cmp_path.joinpath(rel_path)
-                    if not local_path.parent.is_dir():
-                        local_path.parent.mkdir(parents=True, exist_ok=True)
-                    logging.info(
-                        'INFO: Downloading %s to %s', irods_path,
-                        local_path)
-                    self.irods_get(irods_path, local_path, options=options)
+                transfers = utils.transfers.download_plan(
+                    src_path, cmp_path, diff, only_irods)
+                # Create the local directory skeleton before any data
+                # moves.
+                dir_names = {
+                    os.path.dirname(local_path) for _, local_path in transfers}
+                for dir_name in sorted(dir_names):
+                    utils.utils.LocalPath(dir_name).mkdir(
+                        parents=True, exist_ok=True)
+                journal.plan(transfers)
+                if catalog is None:
+                    # Given or resumed diffs: look up only what moves.
+                    catalog = self.stat_many([src for src, _ in transfers])
+                sizes = {
+                    entry.path: entry.size for entry in catalog.values()}
+                return self._run_transfers(
+                    lambda irods_path, local_path: self.irods_get(
+                        irods_path, local_path, options=dict(options),
+                        size=sizes.get(str(irods_path))),
+                    transfers, 'download', journal,
+                    ['iget', '-Kfv', '-N', str(self.thread_policy.max_threads)])
         except Exception as error:
             logging.info('DOWNLOAD ERROR', exc_info=True)
             raise error
 
+    def _run_transfers(self, transfer_func, transfers, operation,
+                       journal=None, command=None):
+        """Run `transfer_func` for all `transfers` concurrently, see
+        utils.transfers.run_job.  With the iCommands enabled, `command`
+        is run once per destination directory instead.
+
+        Parameters
+        ----------
+        transfer_func : callable
+            Called as transfer_func(src, dst) for every item.
+        transfers : list
+            Pairs of (source, destination) paths.
+        operation : str
+            One of 'upload' or 'download' for reference.
+        journal : TransferJournal
+            Optional, records the progress of every item and is removed
+            when all items succeeded.
+        command : list
+            Optional iCommand and options accepting multiple sources and
+            a target directory.
+
+        Returns
+        -------
+        TransferReport
+            Per-item results of the job.
+
+        Raises:
+            TransferError when one or more items failed.
+
+        """
+        scheduler = None
+        if command is not None and self.icommands:
+            scheduler = utils.icommands.BulkCommand(command)
+        try:
+            return utils.transfers.run_job(
+                transfer_func, transfers, operation, self.transfer_workers,
+                journal, scheduler)
+        finally:
+            self.thread_policy.save()
+
+    def ensure_checksums(self, coll_path, progress=None):
+        """Calculate the checksums of all data objects in and below
+        `coll_path` that have none yet, so that later diffs are pure
+        catalog comparisons.
+
+        Parameters
+        ----------
+        coll_path : str
+            Path of the collection.
+        progress : callable
+            Optional, called as progress(done, total) after every data
+            object.
+
+        Returns
+        -------
+        dict
+            New checksum per data object path.
+
+        """
+        missing = [
+            entry.path for entry in utils.catalog.snapshot(
+                self.session, coll_path).values()
+            if not entry.checksum]
+        logging.info(
+            'IRODS CHECKSUMS: %d data objects in %s without checksum',
+            len(missing), coll_path)
+        checksums = utils.catalog.compute_checksums(
+            self.session, missing, self.transfer_workers, progress)
+        self._invalidate(coll_path)
+        return checksums
+
     def diffObjFile(self, objPath, fsPath, scope="size"):
         """
         Compares and iRODS object to a file system file.
         returns ([diff], [only_irods], [only_fs], [same])
         """
-        if os.path.isdir(fsPath) and not os.path.isfile(fsPath):
-            raise IsADirectoryError("IRODS FS DIFF: file is a directory.")
-        if self.session.collections.exists(objPath):
-            raise IsADirectoryError("IRODS FS DIFF: object exists already as collection. "+objPath)
-
-        if not os.path.isfile(fsPath) and self.session.data_objects.exists(objPath):
-            return ([], [], [objPath], [])
+        return utils.diffs.diff_object(self.session, objPath, fsPath, scope)
 
-        elif not self.session.data_objects.exists(objPath) and os.path.isfile(fsPath):
-            return ([], [fsPath], [], [])
-
-        #both, file and object exist
-        obj = self.session.data_objects.get(objPath)
-        if scope == "size":
-            objSize = obj.size
-            fSize = os.path.getsize(fsPath)
-            if objSize != fSize:
-                return ([(objPath, fsPath)], [], [], [])
-            else:
-                return ([], [], [], [(objPath, fsPath)])
-        elif scope == "checksum":
-            objCheck = obj.checksum
-            if objCheck == None:
-                try:
-                    obj.chksum()
-                    objCheck = obj.checksum
-                except:
-                    logging.info('No checksum for '+obj.path)
-                    return([(objPath, fsPath)], [], [], [])
-            if objCheck.startswith("sha2"):
-                sha2Obj = base64.b64decode(objCheck.split('sha2:')[1])
-                with open(fsPath, "rb") as f:
-                    stream = f.read()
-                    sha2 = hashlib.sha256(stream).digest()
-                if sha2Obj != sha2:
-                    return([(objPath, fsPath)], [], [], [])
-                else:
-                    return ([], [], [], [(objPath, fsPath)])
-            elif objCheck:
-                #md5
-                with open(fsPath, "rb") as f:
-                    stream = f.read()
-                    md5 = hashlib.md5(stream).hexdigest()
-                if objCheck != md5:
-                    return([(objPath, fsPath)], [], [], [])
-                else:
-                    return ([], [], [], [(objPath, fsPath)])
-
-
-    def diffIrodsLocalfs(self, coll, dirPath, scope="size"):
+    def diffIrodsLocalfs(self, coll, dirPath, scope="size", catalog=None):
         '''
         Compares and iRODS tree to a directory and lists files that are not in sync.
         Syncing scope can be 'size' or 'checksum'
         Returns: zip([dataObjects][files]) where ther is a difference
         collection: iRODS collection
+        catalog: (optional) snapshot of collection, see utils.catalog.snapshot
         '''
-
-        listDir = []
-        if not dirPath == None:
-            if not os.access(dirPath, os.R_OK):
-                raise PermissionError("IRODS FS DIFF: No rights to write to destination.")
-            if not os.path.isdir(dirPath):
-                raise IsADirectoryError("IRODS FS DIFF: directory is a file.")
-            for root, dirs, files in os.walk(dirPath, topdown=False):
-                for name in files:
-                    listDir.append(os.path.join(root.split(dirPath)[1], name).strip(os.sep))
-        listColl = []
-        if not coll == None:
-            for root, subcolls, obj in coll.walk():
-                for o in obj:
-                    listColl.append(os.path.join(root.path.split(coll.path)[1], o.name).strip('/'))
-        diff = []
-        same = []
-        for locPartialPath in set(listDir).intersection(listColl):
-            iPartialPath = locPartialPath.replace(os.sep, "/")
-            if scope == "size":
-                objSize = self.session.data_objects.get(coll.path + '/' + iPartialPath).size
-                fSize = os.path.getsize(os.path.join(dirPath, iPartialPath))
-                if objSize != fSize:
-                    diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                else:
-                    same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-            elif scope == "checksum":
-                objCheck = self.session.data_objects.get(coll.path + '/' + iPartialPath).checksum
-                if objCheck == None:
-                    try:
-                        self.session.data_objects.get(coll.path + '/' + iPartialPath).chksum()
-                        objCheck = self.session.data_objects.get(
-                                    coll.path + '/' + iPartialPath).checksum
-                    except:
-                        logging.info('No checksum for '+coll.path + '/' + iPartialPath)
-                        diff.append((coll.path + '/' + iPartialPath, 
-                                        os.path.join(dirPath, locPartialPath)))
-                        continue
-                if objCheck.startswith("sha2"):
-                    sha2Obj = base64.b64decode(objCheck.split('sha2:')[1])
-                    with open(os.path.join(dirPath, locPartialPath), "rb") as f:
-                        stream = f.read()
-                        sha2 = hashlib.sha256(stream).digest()
-                    if sha2Obj != sha2:
-                        diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                    else:
-                        same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                elif objCheck:
-                    #md5
-                    with open(os.path.join(dirPath, locPartialPath), "rb") as f:
-                        stream = f.read()
-                        md5 = hashlib.md5(stream).hexdigest()
-                    if objCheck != md5:
-                        diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                    else:
-                        same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-            else: #same paths, no scope
-                diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-
-        #adding files that are not on iRODS, only present on local FS
-        #adding files that are not on local FS, only present in iRODS
-        #adding files that are stored on both devices with the same checksum/size
-        irodsOnly = list(set(listColl).difference(listDir))
-        for i in range(0, len(irodsOnly)):
-            irodsOnly[i] = irodsOnly[i].replace(os.sep, "/")
-        return (diff, list(set(listDir).difference(listColl)), irodsOnly, same)
+        return utils.diffs.diff_tree(
+            self.session, coll, dirPath, scope, self.transfer_workers, catalog)
 
     def addMetadata(self, items, key, value, units = None):
         """
-        Adds metadata to all items
+        Adds metadata to all items, see addMultipleMetadata
         items: list of iRODS data objects or iRODS collections
         key: string
         value: string
         units: (optional) string 
 
         Throws:
-            CATALOG_ALREADY_HAS_ITEM_BY_THAT_NAME
+            CAT_NO_ACCESS_PERMISSION
         """
-        for item in items:
-            try:
-                item.metadata.add(key.upper(), value, units)
-            except irods.exception.CATALOG_ALREADY_HAS_ITEM_BY_THAT_NAME:
-                print(RED+"INFO ADD META: Metadata already present"+DEFAULT)
-            except irods.exception.CAT_NO_ACCESS_PERMISSION as cnap:
-                print("ERROR UPDATE META: no permissions")
-                raise cnap
+        return self.addMultipleMetadata(items, [(key.upper(), value, units)])
 
     def addMultipleMetadata(self, items, avus):
-        list_of_tags = [
-            irods.meta.AVUOperation(operation='add',
-                                    avu=irods.meta.iRODSMeta(a, v, u))
-            for (a, v, u) in avus]
-        for item in items:
-            try:
-                item.metadata.apply_atomic_operations(*list_of_tags)
-            except irods.meta.BadAVUOperationValue:
-                print(f"{RED}INFO ADD MULTIPLE META: bad metadata value{DEFAULT}")
-            except Exception as e:
-                print(f"{RED}INFO ADD MULTIPLE META: unexpected error{DEFAULT}")
-            except irods.exception.CAT_NO_ACCESS_PERMISSION as cnap:
+        """
+        Adds metadata to all items in one atomic request per item, the
+        items processed concurrently.  Already present AVUs are skipped.
+        items: list of iRODS data objects or iRODS collections
+        avus: list of (key, value, units) triplets
+
+        Returns: TransferReport of the items
+
+        Throws:
+            CAT_NO_ACCESS_PERMISSION, once all items are processed
+        """
+        operations = utils.metadata.add_operations(avus)
+        report = self.apply_metadata(
+            (item.path, utils.metadata.item_kind(item), operations)
+            for item in items)
+        for _, _, error in report.failed:
+            if isinstance(error, irods.exception.CAT_NO_ACCESS_PERMISSION):
                 print("ERROR UPDATE META: no permissions")
-                raise cnap
+                raise error
+        return report
+
+    def apply_metadata(self, targets, callback=None):
+        """Apply AVU operations to many collections and/or data objects
+        concurrently, one atomic request per item, without aborting on
+        failed items.
+
+        Parameters
+        ----------
+        targets : iterable
+            Triples of (path, kind, operations), see
+            utils.metadata.apply_operations.
+        callback : callable
+            Optional, called as callback(path, kind, error) per item.
+
+        Returns
+        -------
+        TransferReport
+            (path, kind) per succeeded or failed item.
+
+        """
+        report = utils.metadata.apply_operations(
+            self.session, targets, self.transfer_workers, callback)
+        self._invalidate(*(
+            item[0] for item in report.succeeded + report.failed))
+        return report
+
+    def import_metadata(self, entries, base='', dry_run=False,
+                        callback=None):
+        """Add path-mapped metadata in one atomic request per item,
+        without holding all entries in memory.
+
+        Parameters
+        ----------
+        entries : iterable
+            (path, attribute, value, units) tuples, e.g. from
+            meta.metadataFileParser.iter_entries.
+        base : str
+            Collection of relative paths and entries without a path.
+        dry_run : bool
+            Only summarize what would be added.
+        callback : callable
+            Optional, called as callback(path, kind, error) per item.
+
+        Returns
+        -------
+        ImportSummary
+            See utils.metadata.import_entries.
+
+        """
+        summary = utils.metadata.import_entries(
+            self.session, entries, self.transfer_workers, base, dry_run,
+            callback)
+        if summary.report is not None:
+            self._invalidate(*(
+                item[0] for item in
+                summary.report.succeeded + summary.report.failed))
+        return summary
+
+    def tag_collection(self, coll_path, avus, progress=None, cancel=None):
+        """Add metadata to a collection and to all collections and data
+        objects below it, see utils.metadata.tag_tree.
+
+        Parameters
+        ----------
+        coll_path : str
+            Path of the root collection.
+        avus : list
+            (attribute, value, units) triplets.
+        progress : callable
+            Optional, called as progress(count) with the number of
+            items done.
+        cancel : threading.Event
+            Optional, stop starting new items once set.
+
+        Returns
+        -------
+        TransferReport
+            (path, kind) per tagged or failed item.
+
+        """
+        try:
+            return utils.metadata.tag_tree(
+                self.session, str(coll_path), avus, self.transfer_workers,
+                progress, cancel)
+        finally:
+            self._invalidate(str(coll_path))
 
     def updateMetadata(self, items, key, value, units=None):
         """
-        Updates a metadata entry to all items
+        Sets the metadata entry of all items to exactly value and units,
+        see upsert_metadata
         items: list of iRODS data objects or iRODS collections
-        key: string
+        key: string, stored in upper case like in addMetadata
         value: string
         units: (optional) string
 
         Throws: CAT_NO_ACCESS_PERMISSION
         """
-        try:
-            for item in items:
-                if key in item.metadata.keys():
-                    meta = item.metadata.get_all(key)
-                    valuesUnits = [(m.value, m.units) for m in meta]
-                    if (value, units) not in valuesUnits:
-                        #remove all iCAT entries with that key
-                        for m in meta:
-                            item.metadata.remove(m)
-                        #add key, value, units
-                        self.addMetadata(items, key, value, units)
-
-                else:
-                    self.addMetadata(items, key, value, units)
-        except irods.exception.CAT_NO_ACCESS_PERMISSION as cnap:
-            print(f"ERROR UPDATE META: no permissions {item.path}")
-            raise cnap
+        report = self.upsert_metadata(
+            {item.path: utils.metadata.item_kind(item) for item in items},
+            [(key.upper(), value, units)])
+        for path, _, error in report.failed:
+            if isinstance(error, irods.exception.CAT_NO_ACCESS_PERMISSION):
+                print(f"ERROR UPDATE META: no permissions {path}")
+                raise error
+        return report
+
+    def upsert_metadata(self, targets, avus, callback=None):
+        """Give attributes of many collections and/or data objects
+        exactly the values and units of `avus`, with one catalog query
+        per chunk of items and one atomic request per changed item.
+
+        Parameters
+        ----------
+        targets : dict
+            Kind, 'collection' or 'data_object', per path.
+        avus : list
+            (attribute, value, units) triplets, one per attribute.
+        callback : callable
+            Optional, called as callback(path, kind, error) per changed
+            item.
+
+        Returns
+        -------
+        TransferReport
+            (path, kind) per changed item.
+
+        """
+        report = utils.metadata.upsert(
+            self.session, targets, avus, self.transfer_workers, callback)
+        self._invalidate(*(
+            item[0] for item in report.succeeded + report.failed))
+        return report
 
     def deleteMetadata(self, items, key, value, units):
         """
@@ -1328,6 +1785,7 @@ class IrodsConnector():
         Throws:
             CAT_SUCCESS_BUT_WITH_NO_INFO: metadata did not exist
         """
+        self._invalidate(*(item.path for item in items))
         for item in items:
             try:
                 item.metadata.remove(key, value, units)
@@ -1342,7 +1800,7 @@ class IrodsConnector():
         Delete a data object or a collection recursively.
         item: iRODS data object or collection
         """
-
+        self._invalidate(item.path)
         if self.session.collections.exists(item.path):
             logging.info("IRODS DELETE: "+item.path)
             try:
@@ -1398,6 +1856,9 @@ class IrodsConnector():
         except Exception as error:
             logging.info('RULE EXECUTION ERROR', exc_info=True)
             return '', repr(error)
+        finally:
+            # Rules may change anything.
+            self._invalidate()
         stdout, stderr = '', ''
         if len(out.MsParam_PI) > 0:
             buffers = out.MsParam_PI[0].inOutStruct
@@ -1422,19 +1883,11 @@ class IrodsConnector():
             Total size [bytes] of all iRODS objects found from the
             logical paths in `path_names`.
 
+        Sizes are summed by the server over good replicas, with the
+        queries batched for all `path_names`.
+
         """
-        irods_sizes = []
-        for path_name in path_names:
-            irods_name = utils.utils.IrodsPath(path_name)
-            if self.collection_exists(irods_name):
-                irods_sizes.append(
-                    utils.utils.get_coll_size(
-                        self.get_collection(irods_name)))
-            elif self.dataobject_exists(irods_name):
-                irods_sizes.append(
-                    utils.utils.get_data_size(
-                        self.get_dataobject(irods_name)))
-        return sum(irods_sizes)
+        return utils.catalog.paths_size(self.session, path_names)[0]
 
     def create_ticket(self, obj_path: str, expiry_string: str = '') -> tuple:
         """Create an iRODS ticket to allow read access to the object
@@ -1485,33 +1938,13 @@ class IrodsConnector():
         # TODO improve error handling, if necessary
         if not self.icommands:
             return ticket.modify('expire', expiry_string) == ticket
-        else:
-            command = f'iticket mod {ticket.ticket} expire {expiry_string}'
-            p = subprocess.Popen(
-                command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                shell=True)
-            out, err = p.communicate()
-            return err == b''
-
-
-def get_resource_children(resc):
-    """Get all the children for the resource `resc`.
-
-    Parameters
-    ----------
-    resc : instance
-        iRODS resource instance.
-
-    Returns
-    -------
-    list
-        Instances of child resources.
-
-    """
-    children = []
-    for child in resc.children:
-        children.extend(get_resource_children(child))
-    return resc.children + children
+        try:
+            utils.icommands.run(
+                ['iticket', 'mod', ticket.ticket, 'expire', expiry_string])
+        except RuntimeError as error:
+            logging.info('MODIFY TICKET ERROR: %r', error)
+            return False
+        return True
 
 
 def irods_dirname(path):
@@ -8,12 +8,11 @@ import irods
 import uuid
 
 from utils.IrodsConnector import IrodsConnector
+from utils.checksums import compare_checksums
 from utils.utils import ensure_dir
 
 import os
-from base64 import b64decode
 from shutil import disk_usage
-import hashlib
 import logging
 #import subprocess
 from subprocess         import Popen, PIPE
@@ -287,24 +286,9 @@ class IrodsConnectorAnonymous(IrodsConnector):
                 #objCheck = obj.checksum
                 logging.info('No checksum available: '+obj.path)
                 return([(objPath, fsPath)], [], [], [])
-            if objCheck.startswith("sha2"):
-                sha2Obj = b64decode(objCheck.split('sha2:')[1])
-                with open(fsPath, "rb") as f:
-                    stream = f.read()
-                    sha2 = hashlib.sha256(stream).digest()
-                if sha2Obj != sha2:
-                    return([(objPath, fsPath)], [], [], [])
-                else:
-                    return ([], [], [], [(objPath, fsPath)])
-            elif objCheck:
-                #md5
-                with open(fsPath, "rb") as f:
-                    stream = f.read()
-                    md5 = hashlib.md5(stream).hexdigest()
-                if objCheck != md5:
-                    return([(objPath, fsPath)], [], [], [])
-                else:
-                    return ([], [], [], [(objPath, fsPath)]) 
+            if objCheck:
+                diff, same = compare_checksums([(objPath, fsPath, objCheck)])
+                return (diff, [], [], same)
 
 
     def diffIrodsLocalfs(self, coll, dirPath, scope="size"):
@@ -335,6 +319,7 @@ class IrodsConnectorAnonymous(IrodsConnector):
 
         diff = []
         same = []
+        toHash = []
         for locPartialPath in set(listDir).intersection(listColl):
             iPartialPath = locPartialPath.replace(os.sep, "/")
             _subcoll = self.session.collections.get(os.path.dirname(coll.path + '/' + iPartialPath))
@@ -355,26 +340,16 @@ class IrodsConnectorAnonymous(IrodsConnector):
                     diff.append((coll.path + '/' + iPartialPath, 
                                  os.path.join(dirPath, locPartialPath)))
                     continue
-                if objCheck.startswith("sha2"):
-                    sha2Obj = b64decode(objCheck.split('sha2:')[1])
-                    with open(os.path.join(dirPath, locPartialPath), "rb") as f:
-                        stream = f.read()
-                        sha2 = hashlib.sha256(stream).digest()
-                    if sha2Obj != sha2:
-                        diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                    else:
-                        same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                elif objCheck:
-                    #md5
-                    with open(os.path.join(dirPath, locPartialPath), "rb") as f:
-                        stream = f.read()
-                        md5 = hashlib.md5(stream).hexdigest();
-                    if objCheck != md5:
-                        diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
-                    else:
-                        same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
+                if objCheck:
+                    # Hashed in parallel after collecting all checksums.
+                    toHash.append((coll.path + '/' + iPartialPath,
+                                   os.path.join(dirPath, locPartialPath), objCheck))
             else: #same paths, no scope
                 diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
+        if toHash:
+            hashDiff, hashSame = compare_checksums(toHash)
+            diff.extend(hashDiff)
+            same.extend(hashSame)
 
         #adding files that are not on iRODS, only present on local FS
         #adding files that are not on local FS, only present in iRODS
@@ -13,8 +13,20 @@ class IrodsConnectorIcommands(utils.IrodsConnector.IrodsConnector):
 
     """
 
+    @property
+    def icommands(self):
+        """
+
+        Returns
+        -------
+        bool
+            Are the iCommands available?  Detected once per process.
+
+        """
+        return utils.icommands.available()
+
     def upload_data(self, source, destination, resource, size, buff=1024**3,
-                    force=False, diffs=None):
+                    force=False, diffs=None, resume=False):
         """
         source: absolute path to file or folder
         destination: iRODS collection where data is uploaded to
@@ -22,6 +34,7 @@ class IrodsConnectorIcommands(utils.IrodsConnector.IrodsConnector):
         size: size of data to be uploaded in bytes
         buf: buffer on resource that should be left over
         diffs: Leave empty, placeholder to be in sync with IrodsConnector class function
+        resume: Ignored, irsync only transfers what differs
 
         The function uploads the contents of a folder with all subfolders to 
         an iRODS collection.
@@ -65,9 +78,11 @@ class IrodsConnectorIcommands(utils.IrodsConnector.IrodsConnector):
         logging.info('IRODS UPLOAD: ' + cmd)
         p = subprocess.Popen([cmd], stdout=subprocess.PIPE, stdin=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
         out, err = p.communicate()
+        self._invalidate(destination.path)
         logging.info('IRODS UPLOAD INFO: out:' + str(out) + '\nerr: ' + str(err))
 
-    def download_data( self, source, destination, size, buff=1024**3, force=False, diffs=None):
+    def download_data( self, source, destination, size, buff=1024**3, force=False, diffs=None,
+                       resume=False):
         """
         Download object or collection.
         source: iRODS collection or data object
@@ -1,8 +1,18 @@
 """iBridges utility modules
 """
 
+from . import bundles
+from . import caches
+from . import catalog
+from . import checksums
+from . import diffs
 from . import elabConnector
+from . import icommands
 from . import IrodsConnectorAnonymous
 from . import IrodsConnectorIcommands
 from . import IrodsConnector
+from . import journal
+from . import metadata
+from . import permissions
+from . import transfers
 from . import utils
@@ -0,0 +1,173 @@
+"""Client-side aggregation of small files into tar bundles that are
+extracted on the iRODS server.
+
+"""
+import io
+import logging
+import os
+import tarfile
+import uuid
+
+import irods.exception
+import irods.keywords
+
+import utils
+
+# Keywords
+DEST_RESC_NAME_KW = irods.keywords.DEST_RESC_NAME_KW
+
+# Misc
+BUNDLE_PREFIX = '.ibridges_bundle_'
+# Fewer small files are not worth the extraction round trip.
+MIN_FILES = 10
+
+EXTRACT_RULE = """extract_rule {
+    msiTarFileExtract(*objPath, *collName, *rescName, *retExt);
+    if(bool(*retExt)) {
+        writeLine("stderr", "Error extracting *objPath to *collName");
+    }
+    else {
+        writeLine("stdout", "Extracted *objPath into *collName");
+    }
+}
+OUTPUT ruleExecOut
+"""
+
+
+def split_by_size(transfers: list, threshold: int) -> tuple:
+    """Separate the files of `transfers` smaller than `threshold` from
+    the others.
+
+    Parameters
+    ----------
+    transfers : list
+        Pairs of (local path, iRODS path).
+    threshold : int
+        Size [bytes] below which a file is considered small.
+
+    Returns
+    -------
+    tuple
+        Lists of the small and the large transfers: (small, large).
+
+    """
+    small, large = [], []
+    for local_path, irods_path in transfers:
+        if os.path.getsize(local_path) < threshold:
+            small.append((local_path, irods_path))
+        else:
+            large.append((local_path, irods_path))
+    return small, large
+
+
+def bundle_name() -> str:
+    """Create a unique name for a temporary bundle data object.
+
+    Returns
+    -------
+    str
+        Name of the tar file.
+
+    """
+    return f'{BUNDLE_PREFIX}{uuid.uuid4().hex}.tar'
+
+
+def stream_tar(fileobj, members: list):
+    """Write `members` as an uncompressed tar stream to `fileobj`.
+    Files are copied in blocks, so memory use does not depend on the
+    size of the bundle.
+
+    Parameters
+    ----------
+    fileobj : file-like
+        Writable (iRODS or local) file object.
+    members : list
+        Pairs of (local path, name in archive).
+
+    """
+    with tarfile.open(fileobj=fileobj, mode='w|') as tar:
+        for local_path, arcname in members:
+            tar.add(local_path, arcname=arcname, recursive=False)
+
+
+def upload_bundle(connector, transfers: list, coll_name: str,
+                  resc_name: str) -> list:
+    """Upload the small files of `transfers` as a single tar bundle
+    streamed into `coll_name` and extract it on the server.
+
+    Parameters
+    ----------
+    connector : IrodsConnector
+        Connection to upload and extract with.
+    transfers : list
+        Pairs of (local path, iRODS path) below `coll_name`.
+    coll_name : str
+        Name of the collection the bundle is extracted into.
+    resc_name : str
+        Name of the top-level iRODS resource.
+
+    Returns
+    -------
+    list
+        Transfers that still need a regular upload: the large files
+        and small files not verified after extraction.  Like a regular
+        upload, the checksums of the extracted files are registered
+        and compared with the local files.
+
+    """
+    session = connector.session
+    small, large = split_by_size(transfers, connector.bundle_threshold)
+    if len(small) < MIN_FILES:
+        return transfers
+    coll_name = utils.utils.IrodsPath(coll_name)
+    obj_path = coll_name.joinpath(bundle_name())
+    members = [
+        (local_path, str(utils.utils.IrodsPath(irods_path).path.relative_to(
+            coll_name.path)))
+        for local_path, irods_path in small]
+    options = {}
+    if resc_name:
+        options[DEST_RESC_NAME_KW] = resc_name
+    logging.info(
+        'IRODS UPLOAD bundling %d small files into %s', len(small), obj_path)
+    try:
+        with session.data_objects.open(obj_path, 'w', **options) as objfd:
+            stream_tar(objfd, members)
+        params = {
+            '*objPath': f'"{obj_path}"',
+            '*collName': f'"{coll_name}"',
+            '*rescName': f'"{resc_name or ""}"',
+        }
+        _, stderr = connector.execute_rule(io.StringIO(EXTRACT_RULE), params)
+        if stderr:
+            logging.info('BUNDLE EXTRACT ERROR for %s: %s', obj_path, stderr)
+    except (irods.exception.iRODSException, OSError, tarfile.TarError) as error:
+        # The files of the bundle fail verification and are uploaded
+        # one by one.
+        logging.info(
+            'BUNDLE UPLOAD ERROR for %s: %r', obj_path, error, exc_info=True)
+    finally:
+        if session.data_objects.exists(obj_path):
+            session.data_objects.unlink(obj_path, force=True)
+    # Check the extracted sizes with a catalog snapshot, then register
+    # and compare the checksums of the files of the right size.
+    sizes = {
+        entry.path: entry.size
+        for entry in utils.catalog.snapshot(session, coll_name).values()}
+    extracted = {
+        str(irods_path): str(local_path) for local_path, irods_path in small
+        if sizes.get(str(irods_path)) == os.path.getsize(local_path)}
+    checksums = utils.catalog.compute_checksums(
+        session, list(extracted), connector.transfer_workers)
+    _, same = utils.checksums.compare_checksums([
+        (irods_path, local_path, checksums[irods_path])
+        for irods_path, local_path in extracted.items()
+        if checksums.get(irods_path)])
+    verified = {irods_path for irods_path, _ in same}
+    unverified = [
+        (local_path, irods_path) for local_path, irods_path in small
+        if str(irods_path) not in verified]
+    logging.info(
+        'IRODS UPLOAD bundle verified %d of %d files',
+        len(small) - len(unverified), len(small))
+    return large + unverified
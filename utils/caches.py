@@ -0,0 +1,205 @@
+"""In-memory caches of iRODS catalog results with expiry, bounded size
+and invalidation by path.
+
+"""
+import collections
+import re
+import threading
+import time
+
+# Misc
+CATALOG_CACHE_TTL = 30
+CATALOG_CACHE_SIZE = 10000
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_SIZE = 100
+# Beyond this many changed paths, clearing is cheaper than matching.
+MAX_INVALIDATE_PATHS = 100
+
+
+class TTLCache:
+    """Thread-safe least recently used cache whose entries expire after
+    a time to live.
+
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        """Create an empty cache.
+
+        Parameters
+        ----------
+        ttl : float
+            Default time to live of an entry in seconds, 0 disables
+            caching.
+        max_entries : int
+            Maximum number of entries, the least recently used ones are
+            evicted first.
+
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> tuple:
+        """Look up `key`.
+
+        Returns
+        -------
+        tuple
+            Whether a valid entry was found and its value: (found,
+            value).
+
+        """
+        with self._lock:
+            if key in self._entries:
+                expires, value = self._entries[key]
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, ttl: float = None):
+        """Store `value` under `key`, evicting the least recently used
+        entries beyond the size bound.
+
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl: float = None):
+        """Read-through lookup of `key`, calling `loader` upon a miss.
+
+        Parameters
+        ----------
+        key : hashable
+            Cache key.
+        loader : callable
+            Called without arguments to produce the value.
+        ttl : float
+            Time to live of a new entry, default the cache's.
+
+        Returns
+        -------
+        object
+            Cached or newly loaded value.
+
+        """
+        found, value = self.get(key)
+        if not found:
+            value = loader()
+            self.put(key, value, ttl)
+        return value
+
+    def invalidate(self, predicate=None):
+        """Remove the entries whose key fulfills `predicate`, or all
+        entries if it is None.
+
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """Usage statistics.
+
+        Returns
+        -------
+        dict
+            Numbers of hits, misses, evictions and current entries.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+        }
+
+
+def search_key(key_vals: dict) -> tuple:
+    """Normalize search criteria into a hashable cache key.
+
+    Parameters
+    ----------
+    key_vals : dict
+        Attribute name mapping to values, see IrodsConnector.search.
+
+    Returns
+    -------
+    tuple
+        Sorted (name, value) pairs.
+
+    """
+    return tuple(sorted(
+        (str(key), str(val or '')) for key, val in (key_vals or {}).items()))
+
+
+def search_affected(criteria: tuple, paths: list) -> bool:
+    """Determine if a search with normalized `criteria` may find a
+    different result after a change of `paths` or their subtrees.
+
+    Parameters
+    ----------
+    criteria : tuple
+        Normalized search criteria, see search_key.
+    paths : list
+        iRODS paths of changed collections or data objects.
+
+    Returns
+    -------
+    bool
+        Whether the cached result should be invalidated.
+
+    """
+    pattern = dict(criteria).get('path', '')
+    # Literal start of the LIKE pattern.
+    prefix = re.split('[%_]', pattern)[0]
+    return any(
+        str(path).startswith(prefix) or prefix.startswith(str(path))
+        for path in paths)
+
+
+def path_affected(path: str, paths: list) -> bool:
+    """Determine if a cached lookup of `path` may be stale after a
+    change of `paths` or their subtrees.
+
+    Parameters
+    ----------
+    path : str
+        iRODS path of the cached lookup.
+    paths : list
+        iRODS paths of changed collections or data objects.
+
+    Returns
+    -------
+    bool
+        Whether `path` is one of `paths`, lies below one of them or is
+        the parent collection of one of them, listing it.
+
+    """
+    for changed in paths:
+        changed = str(changed).rstrip('/')
+        if path == changed or path.startswith(f'{changed}/'):
+            return True
+        if path == changed.rpartition('/')[0]:
+            return True
+    return False
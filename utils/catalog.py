@@ -0,0 +1,873 @@
+"""Bulk GenQuery access to the iRODS catalog, replacing per-object
+round trips.
+
+"""
+import collections
+import itertools
+import logging
+
+import irods.access
+import irods.column
+import irods.models
+
+import utils
+
+# Map model names to iquest attribute names
+ACL_COLL_NAME = irods.models.CollectionAccess.name
+ACL_COLL_USER_ID = irods.models.CollectionAccess.user_id
+ACL_DATA_NAME = irods.models.DataAccess.name
+ACL_DATA_USER_ID = irods.models.DataAccess.user_id
+COLL_CREATE_TIME = irods.models.Collection.create_time
+COLL_ID = irods.models.Collection.id
+COLL_MODIFY_TIME = irods.models.Collection.modify_time
+COLL_NAME = irods.models.Collection.name
+DATA_ID = irods.models.DataObject.id
+DATA_NAME = irods.models.DataObject.name
+DATA_SIZE = irods.models.DataObject.size
+DATA_CHECKSUM = irods.models.DataObject.checksum
+DATA_CREATE_TIME = irods.models.DataObject.create_time
+DATA_MODIFY_TIME = irods.models.DataObject.modify_time
+DATA_REPL_NUM = irods.models.DataObject.replica_number
+DATA_REPL_STATUS = irods.models.DataObject.replica_status
+META_COLL_ATTR_NAME = irods.models.CollectionMeta.name
+META_COLL_ATTR_UNITS = irods.models.CollectionMeta.units
+META_COLL_ATTR_VALUE = irods.models.CollectionMeta.value
+META_DATA_ATTR_NAME = irods.models.DataObjectMeta.name
+META_DATA_ATTR_UNITS = irods.models.DataObjectMeta.units
+META_DATA_ATTR_VALUE = irods.models.DataObjectMeta.value
+RESC_CONTEXT = irods.models.Resource.context
+RESC_FREE_SPACE = irods.models.Resource.free_space
+RESC_ID = irods.models.Resource.id
+RESC_NAME = irods.models.Resource.name
+RESC_PARENT = irods.models.Resource.parent
+RESC_STATUS = irods.models.Resource.status
+USER_ID = irods.models.User.id
+USER_NAME = irods.models.User.name
+USER_TYPE = irods.models.User.type
+USER_ZONE = irods.models.User.zone
+# Query operators
+IN = irods.column.In
+LIKE = irods.column.Like
+# Misc
+GOOD_REPLICA = '1'
+# Values per 'in' condition, keeping queries below GenQuery limits.
+IN_CHUNK_SIZE = 100
+
+CatalogEntry = collections.namedtuple(
+    'CatalogEntry', ['path', 'size', 'checksum', 'modify_time'])
+MetaEntry = collections.namedtuple(
+    'MetaEntry', ['path', 'name', 'value', 'units'])
+PathStat = collections.namedtuple(
+    'PathStat', ['path', 'kind', 'size', 'checksum', 'create_time',
+                 'modify_time', 'replicas'])
+
+
+def in_subtree(coll_name: str, coll_path: str) -> bool:
+    """Check whether the collection `coll_name` is `coll_path` or lies
+    below it.  LIKE conditions treat '_' and '%' in `coll_path` as
+    wildcards, so their rows need this check.
+
+    Parameters
+    ----------
+    coll_name : str
+        Path of a collection.
+    coll_path : str
+        Path of the root collection, without trailing slash.
+
+    Returns
+    -------
+    bool
+        Is `coll_name` in the subtree of `coll_path`?
+
+    """
+    return coll_name == coll_path or coll_name.startswith(coll_path + '/')
+
+
+def subtree_results(session, coll_path: str, *columns, recursive=True,
+                    order_by=()):
+    """Generate the rows selecting `columns` for the collection
+    `coll_path` and, if `recursive`, for all collections below it, with
+    paged queries.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+    columns : list
+        Columns to select, including COLL_NAME.
+    recursive : bool
+        Include the rows of the subcollections.
+    order_by : tuple
+        Columns to order the rows of each query by.
+
+    Yields
+    ------
+    dict
+        Query result row, first of the root collection and then of its
+        subcollections.
+
+    """
+    coll_path = coll_path.rstrip('/')
+    conditions = [COLL_NAME == coll_path]
+    if recursive:
+        conditions.append(LIKE(COLL_NAME, f'{coll_path}/%'))
+    for condition in conditions:
+        query = session.query(*columns).filter(condition)
+        for column in order_by:
+            query = query.order_by(column)
+        for result in query.get_results():
+            if in_subtree(result[COLL_NAME], coll_path):
+                yield result
+
+
+def iter_subtree(session, coll_path: str):
+    """Enumerate the collection `coll_path` and all collections and data
+    objects below it with paged queries.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+
+    Yields
+    ------
+    tuple
+        (path, kind) with `kind` 'collection' or 'data_object', first
+        the collections and then the data objects.
+
+    """
+    coll_path = coll_path.rstrip('/')
+    yield coll_path, 'collection'
+    for result in session.query(COLL_NAME).filter(
+            LIKE(COLL_NAME, f'{coll_path}/%')).get_results():
+        if in_subtree(result[COLL_NAME], coll_path):
+            yield result[COLL_NAME], 'collection'
+    for result in subtree_results(session, coll_path, COLL_NAME, DATA_NAME):
+        yield f'{result[COLL_NAME]}/{result[DATA_NAME]}', 'data_object'
+
+
+def snapshot(session, coll_path: str) -> dict:
+    """Take a snapshot of all data objects in and below the collection
+    `coll_path` using a few paged queries.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+
+    Returns
+    -------
+    dict
+        CatalogEntry per object path relative to `coll_path`.  Of
+        multiple replicas, the first one with a checksum is used.
+
+    """
+    coll_path = coll_path.rstrip('/')
+    entries = {}
+    for result in subtree_results(
+            session, coll_path, COLL_NAME, DATA_NAME, DATA_SIZE,
+            DATA_CHECKSUM, DATA_MODIFY_TIME):
+        path = f'{result[COLL_NAME]}/{result[DATA_NAME]}'
+        rel_path = path[len(coll_path) + 1:]
+        if rel_path in entries and entries[rel_path].checksum:
+            continue
+        entries[rel_path] = CatalogEntry(
+            path, result[DATA_SIZE], result[DATA_CHECKSUM] or None,
+            result[DATA_MODIFY_TIME])
+    return entries
+
+
+def compute_checksums(session, obj_paths: list, workers: int,
+                      progress=None) -> dict:
+    """Let the server calculate the checksums of `obj_paths`
+    concurrently.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session whose connection pool the workers share.
+    obj_paths : list
+        Paths of the data objects.
+    workers : int
+        Number of concurrent requests.
+    progress : callable
+        Optional, called as progress(done, total) after every data
+        object.
+
+    Returns
+    -------
+    dict
+        Checksum per data object path, failed ones are left out.
+
+    """
+    checksums = {}
+    done = []
+
+    def compute(obj_path, _):
+        checksums[obj_path] = session.data_objects.chksum(obj_path)
+
+    def callback(obj_path, _, error):
+        done.append(obj_path)
+        if progress is not None:
+            progress(len(done), len(obj_paths))
+
+    scheduler = utils.transfers.TransferScheduler(compute, workers=workers)
+    report = scheduler.run(
+        ((obj_path, None) for obj_path in obj_paths), callback)
+    if obj_paths:
+        logging.info('IRODS CHECKSUMS finished: %s', report.summary())
+    return checksums
+
+
+def chunked(values, size: int = IN_CHUNK_SIZE):
+    """Split `values` lazily into lists for use in 'in' conditions.
+
+    """
+    values = iter(values)
+    chunk = list(itertools.islice(values, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(values, size))
+
+
+def good_replica_size(session, *criteria, coll_path: str = None) -> tuple:
+    """Sum the sizes of the data objects matching `criteria` with
+    server-side aggregates over their good replicas, counting each data
+    object once.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    criteria : list
+        Query conditions selecting the data objects.
+    coll_path : str
+        Optional root collection, the data objects of collections
+        outside its subtree are left out, see in_subtree.
+
+    Returns
+    -------
+    tuple
+        Total size in bytes and number of data objects: (size, count).
+
+    """
+    criteria = (DATA_REPL_STATUS == GOOD_REPLICA,) + criteria
+
+    def wanted(result):
+        return coll_path is None or in_subtree(result[COLL_NAME], coll_path)
+
+    # The aggregates are grouped per collection, so the rows can be
+    # checked against `coll_path`.  GenQuery's COUNT counts distinct
+    # values: a data object with several good replicas counts once.
+    count = 0
+    for result in session.query(COLL_NAME, DATA_ID).count(DATA_ID).filter(
+            *criteria).get_results():
+        if wanted(result):
+            count += int(result[DATA_ID] or 0)
+    # Per replica number, each data object counts once as well, so more
+    # objects than `count` show that some have several good replicas,
+    # whose sizes the sums would add more than once.
+    size = replicas = 0
+    for result in session.query(
+            COLL_NAME, DATA_REPL_NUM, DATA_ID, DATA_SIZE).count(
+                DATA_ID).sum(DATA_SIZE).filter(*criteria).get_results():
+        if wanted(result):
+            replicas += int(result[DATA_ID] or 0)
+            size += int(result[DATA_SIZE] or 0)
+    if replicas == count:
+        return size, count
+    # Fall back on one (distinct) row per data object and size.
+    sizes = {}
+    for result in session.query(COLL_NAME, DATA_ID, DATA_SIZE).filter(
+            *criteria).get_results():
+        if wanted(result):
+            sizes[result[DATA_ID]] = result[DATA_SIZE]
+    return sum(int(value) for value in sizes.values()), len(sizes)
+
+
+def subtree_size(session, coll_path: str) -> tuple:
+    """Sum the sizes of all data objects in and below the collection
+    `coll_path`.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+
+    Returns
+    -------
+    tuple
+        Total size in bytes and number of data objects: (size, count).
+
+    """
+    coll_path = coll_path.rstrip('/')
+    root = good_replica_size(session, COLL_NAME == coll_path)
+    below = good_replica_size(
+        session, LIKE(COLL_NAME, f'{coll_path}/%'), coll_path=coll_path)
+    return root[0] + below[0], root[1] + below[1]
+
+
+def stat_many(session, paths: list) -> dict:
+    """Look up many collections and/or data objects with a few batched
+    queries: one 'in' query per chunk of paths for the collections and
+    one for the data objects among the rest.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    paths : list
+        Paths of collections and/or data objects.
+
+    Returns
+    -------
+    dict
+        PathStat per existing path, with `kind` 'collection' or
+        'data_object' and `replicas` mapping each replica number of a
+        data object to its status.  Of the replicas, a good one
+        provides the size and checksum if possible.  Non-existing paths
+        are left out.
+
+    """
+    paths = {str(path).rstrip('/') or '/' for path in paths}
+    stats = {}
+    for chunk in chunked(paths):
+        for result in session.query(
+                COLL_NAME, COLL_CREATE_TIME, COLL_MODIFY_TIME).filter(
+                    IN(COLL_NAME, chunk)).get_results():
+            stats[result[COLL_NAME]] = PathStat(
+                result[COLL_NAME], 'collection', None, None,
+                result[COLL_CREATE_TIME], result[COLL_MODIFY_TIME], {})
+    for chunk in chunked(paths - set(stats)):
+        wanted = set(chunk)
+        parents = {path.rpartition('/')[0] for path in chunk}
+        names = {path.rpartition('/')[2] for path in chunk}
+        # The 'in' conditions select a superset of the wanted paths.
+        rows = {}
+        for result in session.query(
+                COLL_NAME, DATA_NAME, DATA_SIZE, DATA_CHECKSUM,
+                DATA_CREATE_TIME, DATA_MODIFY_TIME, DATA_REPL_NUM,
+                DATA_REPL_STATUS).filter(
+                    IN(COLL_NAME, list(parents)),
+                    IN(DATA_NAME, list(names))).get_results():
+            path = f'{result[COLL_NAME]}/{result[DATA_NAME]}'
+            if path in wanted:
+                rows.setdefault(path, []).append(result)
+        for path, results in rows.items():
+            # Good replicas with a checksum first.
+            results.sort(key=lambda result: (
+                result[DATA_REPL_STATUS] != GOOD_REPLICA,
+                not result[DATA_CHECKSUM]))
+            best = results[0]
+            stats[path] = PathStat(
+                path, 'data_object', best[DATA_SIZE],
+                best[DATA_CHECKSUM] or None, best[DATA_CREATE_TIME],
+                best[DATA_MODIFY_TIME],
+                {result[DATA_REPL_NUM]: result[DATA_REPL_STATUS]
+                 for result in results})
+    return stats
+
+
+def iter_metadata(session, coll_path: str, recursive: bool = True):
+    """Generate the metadata of the collection `coll_path` and of the
+    collections and data objects in it with paged queries, so memory
+    use does not depend on the size of the tree.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+    recursive : bool
+        Include everything below the subcollections of `coll_path`.
+
+    Yields
+    ------
+    MetaEntry
+        Path, attribute name, value and units per AVU, first of the
+        collections and then of the data objects, each ordered by
+        path.
+
+    """
+    for result in subtree_results(
+            session, coll_path, COLL_NAME, META_COLL_ATTR_NAME,
+            META_COLL_ATTR_VALUE, META_COLL_ATTR_UNITS, recursive=recursive,
+            order_by=(COLL_NAME,)):
+        yield MetaEntry(
+            result[COLL_NAME], result[META_COLL_ATTR_NAME],
+            result[META_COLL_ATTR_VALUE], result[META_COLL_ATTR_UNITS])
+    for result in subtree_results(
+            session, coll_path, COLL_NAME, DATA_NAME, META_DATA_ATTR_NAME,
+            META_DATA_ATTR_VALUE, META_DATA_ATTR_UNITS, recursive=recursive,
+            order_by=(COLL_NAME, DATA_NAME)):
+        yield MetaEntry(
+            f'{result[COLL_NAME]}/{result[DATA_NAME]}',
+            result[META_DATA_ATTR_NAME], result[META_DATA_ATTR_VALUE],
+            result[META_DATA_ATTR_UNITS])
+
+
+def item_metadata(session, path: str) -> list:
+    """Fetch the metadata of one collection or data object.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    path : str
+        Path of a collection or data object.
+
+    Returns
+    -------
+    list
+        MetaEntry per AVU of `path`.
+
+    """
+    path = str(path).rstrip('/') or '/'
+    entries = [
+        MetaEntry(path, result[META_COLL_ATTR_NAME],
+                  result[META_COLL_ATTR_VALUE], result[META_COLL_ATTR_UNITS])
+        for result in session.query(
+            META_COLL_ATTR_NAME, META_COLL_ATTR_VALUE,
+            META_COLL_ATTR_UNITS).filter(COLL_NAME == path).get_results()]
+    if entries:
+        return entries
+    parent, _, name = path.rpartition('/')
+    return [
+        MetaEntry(path, result[META_DATA_ATTR_NAME],
+                  result[META_DATA_ATTR_VALUE], result[META_DATA_ATTR_UNITS])
+        for result in session.query(
+            META_DATA_ATTR_NAME, META_DATA_ATTR_VALUE,
+            META_DATA_ATTR_UNITS).filter(
+                COLL_NAME == parent, DATA_NAME == name).get_results()]
+
+
+def paths_metadata(session, targets: dict, names: list = None) -> dict:
+    """Fetch the metadata of many collections and/or data objects with
+    one 'in' query per chunk of paths.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    targets : dict
+        Kind, 'collection' or 'data_object', per path.
+    names : list
+        Optional, restrict to these attribute names.
+
+    Returns
+    -------
+    dict
+        List of MetaEntry per path of `targets`.
+
+    """
+    targets = {
+        str(path).rstrip('/') or '/': kind for path, kind in targets.items()}
+    metadata = {path: [] for path in targets}
+    colls = [path for path, kind in targets.items() if kind == 'collection']
+    objs = [path for path, kind in targets.items() if kind != 'collection']
+    for chunk in chunked(colls):
+        criteria = [IN(COLL_NAME, chunk)]
+        if names:
+            criteria.append(IN(META_COLL_ATTR_NAME, list(names)))
+        for result in session.query(
+                COLL_NAME, META_COLL_ATTR_NAME, META_COLL_ATTR_VALUE,
+                META_COLL_ATTR_UNITS).filter(*criteria).get_results():
+            metadata[result[COLL_NAME]].append(MetaEntry(
+                result[COLL_NAME], result[META_COLL_ATTR_NAME],
+                result[META_COLL_ATTR_VALUE], result[META_COLL_ATTR_UNITS]))
+    for chunk in chunked(objs):
+        wanted = set(chunk)
+        criteria = [
+            IN(COLL_NAME, list({path.rpartition('/')[0] for path in chunk})),
+            IN(DATA_NAME, list({path.rpartition('/')[2] for path in chunk}))]
+        if names:
+            criteria.append(IN(META_DATA_ATTR_NAME, list(names)))
+        # The 'in' conditions select a superset of the wanted paths.
+        for result in session.query(
+                COLL_NAME, DATA_NAME, META_DATA_ATTR_NAME,
+                META_DATA_ATTR_VALUE, META_DATA_ATTR_UNITS).filter(
+                    *criteria).get_results():
+            entry = MetaEntry(
+                f'{result[COLL_NAME]}/{result[DATA_NAME]}',
+                result[META_DATA_ATTR_NAME], result[META_DATA_ATTR_VALUE],
+                result[META_DATA_ATTR_UNITS])
+            if entry.path in wanted:
+                metadata[entry.path].append(entry)
+    return metadata
+
+
+def user_table(session, user_ids) -> dict:
+    """Fetch the users and groups with the IDs `user_ids`, resolving
+    the user IDs of the access tables without a query per ACL.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    user_ids : iterable
+        IDs of users and/or groups.
+
+    Returns
+    -------
+    dict
+        (name, zone, type) per existing user ID.
+
+    """
+    users = {}
+    for chunk in chunked({str(user_id) for user_id in user_ids}):
+        for result in session.query(
+                USER_ID, USER_NAME, USER_ZONE, USER_TYPE).filter(
+                    IN(USER_ID, chunk)).get_results():
+            users[str(result[USER_ID])] = (
+                result[USER_NAME], result[USER_ZONE], result[USER_TYPE])
+    return users
+
+
+def _resolve_users(session, users: dict, user_ids):
+    """Add the users and groups of `user_ids` missing from `users`,
+    unknown IDs as their own name.
+
+    """
+    missing = {str(user_id) for user_id in user_ids} - set(users)
+    if missing:
+        users.update(user_table(session, missing))
+        for user_id in missing - set(users):
+            users[user_id] = (user_id, '', None)
+
+
+def _access(users: dict, path: str, access_name: str, user_id):
+    """Create the iRODSAccess of one access table row.
+
+    """
+    name, zone, user_type = users[str(user_id)]
+    return irods.access.iRODSAccess(access_name, path, name, zone, user_type)
+
+
+def iter_acls(session, coll_path: str, users: dict = None):
+    """Generate the ACLs of the collection `coll_path` and of all
+    collections and data objects below it, with a few paged queries
+    on the access tables.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+    users : dict
+        Users and groups already known, see user_table, completed with
+        the ones encountered.
+
+    Yields
+    ------
+    iRODSAccess
+        One per path and user, collections first.
+
+    """
+    if users is None:
+        users = {}
+    coll_path = coll_path.rstrip('/')
+    for rows in chunked(subtree_results(
+            session, coll_path, COLL_NAME, ACL_COLL_NAME, ACL_COLL_USER_ID)):
+        _resolve_users(
+            session, users, [row[ACL_COLL_USER_ID] for row in rows])
+        for result in rows:
+            yield _access(
+                users, result[COLL_NAME], result[ACL_COLL_NAME],
+                result[ACL_COLL_USER_ID])
+    for rows in chunked(subtree_results(
+            session, coll_path, COLL_NAME, DATA_NAME, ACL_DATA_NAME,
+            ACL_DATA_USER_ID)):
+        _resolve_users(
+            session, users, [row[ACL_DATA_USER_ID] for row in rows])
+        for result in rows:
+            yield _access(
+                users, f'{result[COLL_NAME]}/{result[DATA_NAME]}',
+                result[ACL_DATA_NAME], result[ACL_DATA_USER_ID])
+
+
+def paths_acls(session, paths: list, users: dict = None) -> dict:
+    """Fetch the ACLs of many collections and/or data objects with a
+    few batched queries on the access tables.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    paths : list
+        Paths of collections and/or data objects.
+    users : dict
+        Users and groups already known, see user_table, completed with
+        the ones encountered.
+
+    Returns
+    -------
+    dict
+        List of iRODSAccess per path, empty for non-existing paths.
+
+    """
+    if users is None:
+        users = {}
+    paths = {str(path).rstrip('/') or '/' for path in paths}
+    # (path, access name, user ID) rows, resolved once all are known
+    rows = []
+    colls = set()
+    for chunk in chunked(paths):
+        for result in session.query(
+                COLL_NAME, ACL_COLL_NAME, ACL_COLL_USER_ID).filter(
+                    IN(COLL_NAME, chunk)).get_results():
+            colls.add(result[COLL_NAME])
+            rows.append((result[COLL_NAME], result[ACL_COLL_NAME],
+                         result[ACL_COLL_USER_ID]))
+    for chunk in chunked(paths - colls):
+        wanted = set(chunk)
+        parents = {path.rpartition('/')[0] for path in chunk}
+        names = {path.rpartition('/')[2] for path in chunk}
+        # The 'in' conditions select a superset of the wanted paths.
+        for result in session.query(
+                COLL_NAME, DATA_NAME, ACL_DATA_NAME, ACL_DATA_USER_ID).filter(
+                    IN(COLL_NAME, list(parents)),
+                    IN(DATA_NAME, list(names))).get_results():
+            path = f'{result[COLL_NAME]}/{result[DATA_NAME]}'
+            if path in wanted:
+                rows.append((path, result[ACL_DATA_NAME],
+                             result[ACL_DATA_USER_ID]))
+    _resolve_users(session, users, [row[2] for row in rows])
+    acls = {path: [] for path in paths}
+    for path, access_name, user_id in rows:
+        acls[path].append(_access(users, path, access_name, user_id))
+    return acls
+
+
+def paths_size(session, paths: list) -> tuple:
+    """Sum the sizes of many data objects and/or collections, batching
+    the queries.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    paths : list
+        Paths of data objects and/or collections.  Non-existing paths
+        are ignored.
+
+    Returns
+    -------
+    tuple
+        Total size in bytes and number of data objects: (size, count).
+
+    """
+    size = count = 0
+    for stat in stat_many(session, paths).values():
+        if stat.kind == 'collection':
+            coll_size, coll_count = subtree_size(session, stat.path)
+            size, count = size + coll_size, count + coll_count
+        else:
+            size, count = size + int(stat.size or 0), count + 1
+    return size, count
+
+
+def search_queries(session, key_vals: dict, coll_columns=(COLL_NAME,),
+                   data_columns=(COLL_NAME, DATA_NAME, DATA_CHECKSUM)) -> tuple:
+    """Build the collection and data object queries for the search
+    criteria `key_vals`, see IrodsConnector.search.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    key_vals : dict
+        Attribute name mapping to values.
+    coll_columns : tuple
+        Columns selected by the collection query.
+    data_columns : tuple
+        Columns selected by the data object query.
+
+    Returns
+    -------
+    tuple
+        Queries (collections, data objects), the former None when
+        only data objects are searched for.
+
+    """
+    coll_query = None
+    # data query
+    data_query = session.query(*data_columns)
+    if 'checksum' in key_vals or 'object' in key_vals:
+        if key_vals.get('object'):
+            data_query = data_query.filter(
+                LIKE(DATA_NAME, key_vals['object']))
+        if key_vals.get('checksum'):
+            data_query = data_query.filter(LIKE(
+                DATA_CHECKSUM, key_vals['checksum']))
+    else:
+        coll_query = session.query(*coll_columns)
+    if key_vals.get('path'):
+        if coll_query:
+            coll_query = coll_query.filter(LIKE(
+                COLL_NAME, key_vals['path']))
+        data_query = data_query.filter(LIKE(
+            COLL_NAME, key_vals['path']))
+    for key in key_vals:
+        if key not in ['checksum', 'path', 'object']:
+            data_query = data_query.filter(META_DATA_ATTR_NAME == key)
+            if coll_query:
+                coll_query = coll_query.filter(META_COLL_ATTR_NAME == key)
+            if key_vals[key]:
+                data_query = data_query.filter(
+                    META_DATA_ATTR_VALUE == key_vals[key])
+                if coll_query:
+                    coll_query = coll_query.filter(
+                        META_COLL_ATTR_VALUE == key_vals[key])
+    return coll_query, data_query
+
+
+def search_count(session, key_vals: dict) -> tuple:
+    """Count the collections and data objects fulfilling the search
+    criteria `key_vals` with server-side aggregates.  GenQuery's COUNT
+    counts distinct values, so a data object with several replicas or
+    an item with several matching AVUs counts once.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    key_vals : dict
+        Attribute name mapping to values.
+
+    Returns
+    -------
+    tuple
+        Number of collections (None when not searched for) and number
+        of data objects: (num_colls, num_objs).
+
+    """
+    num_colls = None
+    coll_query, data_query = search_queries(
+        session, key_vals, coll_columns=(COLL_ID,), data_columns=(DATA_ID,))
+    if coll_query:
+        result = coll_query.count(COLL_ID).first()
+        num_colls = int(result[COLL_ID] or 0) if result else 0
+    result = data_query.count(DATA_ID).first()
+    num_objs = int(result[DATA_ID] or 0) if result else 0
+    return num_colls, num_objs
+
+
+def search_page(session, key_vals: dict, kind: str, offset: int,
+                limit: int) -> list:
+    """Fetch one page of the collections or data objects fulfilling the
+    search criteria `key_vals`.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    key_vals : dict
+        Attribute name mapping to values.
+    kind : str
+        One of 'collections' or 'data_objects'.
+    offset : int
+        Number of results to skip.
+    limit : int
+        Maximum number of results.
+
+    Returns
+    -------
+    list
+        [Collection name, Object name, checksum] rows, ordered by
+        collection and object name.
+
+    """
+    coll_query, data_query = search_queries(session, key_vals)
+    if kind == 'collections':
+        if coll_query is None:
+            return []
+        query = coll_query.order_by(COLL_NAME)
+    else:
+        query = data_query.order_by(COLL_NAME).order_by(DATA_NAME)
+    # all() closes the server-side statement when more rows are left.
+    query = query.offset(offset).limit(limit)
+    return [
+        [res[COLL_NAME], res.get(DATA_NAME, ''),
+         res.get(DATA_CHECKSUM, '') or '']
+        for res in query.all()]
+
+
+def resource_table(session) -> dict:
+    """Fetch the whole resource table in a single query.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+
+    Returns
+    -------
+    dict
+        Per resource name its 'parent' (name, None for root resources),
+        'status', 'context' and annotated 'free_space' (None if not
+        annotated).
+
+    """
+    results = list(session.query(
+        RESC_ID, RESC_NAME, RESC_PARENT, RESC_STATUS, RESC_CONTEXT,
+        RESC_FREE_SPACE).get_results())
+    # Since iRODS 4.2 the parent is stored by ID instead of by name.
+    names = {str(result[RESC_ID]): result[RESC_NAME] for result in results}
+    table = {}
+    for result in results:
+        parent = result[RESC_PARENT] or None
+        free_space = result[RESC_FREE_SPACE]
+        table[result[RESC_NAME]] = {
+            'parent': names.get(str(parent), parent) if parent else None,
+            'status': result[RESC_STATUS],
+            'context': result[RESC_CONTEXT],
+            'free_space': None if free_space in (None, '') else int(free_space),
+        }
+    return table
+
+
+def hierarchy_free_space(table: dict) -> dict:
+    """Determine the free space of every resource hierarchy in memory.
+    A resource's annotated free space is used if present, otherwise the
+    sum of the annotated free space of all resources below it.
+
+    Parameters
+    ----------
+    table : dict
+        Resources as returned by resource_table.
+
+    Returns
+    -------
+    dict
+        Free space in bytes per resource name, 0 if nothing in its
+        hierarchy is annotated.
+
+    """
+    children = {}
+    for name, resc in table.items():
+        children.setdefault(resc['parent'], []).append(name)
+    below = {}
+
+    def annotated_below(name, seen=()):
+        # Guard against cycles in a corrupt hierarchy.
+        if name not in below:
+            below[name] = sum(
+                (table[child]['free_space'] or 0) + annotated_below(
+                    child, seen + (name,))
+                for child in children.get(name, []) if child not in seen)
+        return below[name]
+
+    return {
+        name: resc['free_space'] if resc['free_space'] is not None
+        else annotated_below(name)
+        for name, resc in table.items()}
@@ -0,0 +1,321 @@
+"""Streaming checksums of local files in the formats iRODS uses.
+
+"""
+import base64
+import concurrent.futures
+import contextlib
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+
+# Misc
+CHUNK_SIZE = 8 * 1024**2
+# Items handed to a hashing process at once, per worker.
+BATCHES_PER_WORKER = 4
+CACHE_PATH = os.path.join('~', '.ibridges', 'checksums.sqlite')
+CACHE_MAX_ENTRIES = 500000
+
+
+def checksum_algorithm(irods_checksum: str) -> str:
+    """Determine the algorithm of an iRODS checksum.
+
+    Parameters
+    ----------
+    irods_checksum : str
+        Checksum as stored in the iRODS catalog.
+
+    Returns
+    -------
+    str
+        'sha2' for 'sha2:<base64>' checksums, otherwise 'md5'.
+
+    """
+    if irods_checksum.startswith('sha2:'):
+        return 'sha2'
+    return 'md5'
+
+
+def local_checksum(path: str, algorithm: str = 'sha2') -> str:
+    """Calculate the checksum of the local file `path` in iRODS format.
+    The file is read in chunks into a reused buffer, so memory use
+    does not depend on the file size.
+
+    Parameters
+    ----------
+    path : str
+        Path of the local file.
+    algorithm : str
+        One of 'sha2' or 'md5'.
+
+    Returns
+    -------
+    str
+        'sha2:<base64 digest>' or '<hex digest>' for md5.
+
+    """
+    hasher = hashlib.sha256() if algorithm == 'sha2' else hashlib.md5()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as fileobj:
+        while True:
+            size = fileobj.readinto(buffer)
+            if not size:
+                break
+            hasher.update(view[:size])
+    if algorithm == 'sha2':
+        return f'sha2:{base64.b64encode(hasher.digest()).decode()}'
+    return hasher.hexdigest()
+
+
+def same_checksum(irods_checksum: str, path: str) -> bool:
+    """Compare an iRODS checksum with the local file `path` using the
+    algorithm of the former.
+
+    Parameters
+    ----------
+    irods_checksum : str
+        Checksum as stored in the iRODS catalog.
+    path : str
+        Path of the local file.
+
+    Returns
+    -------
+    bool
+        Whether the checksums are equal.
+
+    """
+    return local_checksum(
+        path, checksum_algorithm(irods_checksum)) == irods_checksum
+
+
+def _checksum_item(item: tuple) -> tuple:
+    """Calculate the checksum of one (path, algorithm) `item` in a
+    worker process.
+
+    """
+    path, algorithm = item
+    return item, local_checksum(path, algorithm)
+
+
+def checksum_many(items: list, workers: int = None) -> dict:
+    """Calculate the checksums of many local files in parallel worker
+    processes.  Results are merged by item, so the order in which the
+    workers finish does not matter.
+
+    Parameters
+    ----------
+    items : list
+        Pairs of (path, algorithm) as accepted by local_checksum.
+    workers : int
+        Number of processes, by default the number of CPUs.
+
+    Returns
+    -------
+    dict
+        Checksum for each (path, algorithm) item.
+
+    """
+    items = list(set(items))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return dict(map(_checksum_item, items))
+    chunksize = max(1, len(items) // (workers * BATCHES_PER_WORKER))
+    try:
+        # Forking a multithreaded (Qt) process can deadlock the children.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')) as executor:
+            return dict(executor.map(
+                _checksum_item, items, chunksize=chunksize))
+    except (OSError, concurrent.futures.process.BrokenProcessPool):
+        logging.info(
+            'Checksum processes unavailable, hashing sequentially',
+            exc_info=True)
+        return dict(map(_checksum_item, items))
+
+
+def compare_checksums(items: list, workers: int = None,
+                      cache=None) -> tuple:
+    """Compare iRODS checksums with the checksums of local files,
+    hashing the latter in parallel.  Files unchanged since they were
+    last hashed are looked up in the checksum `cache` instead.
+
+    Parameters
+    ----------
+    items : list
+        Triples of (iRODS path, local path, iRODS checksum).
+    workers : int
+        Number of processes, by default the number of CPUs.
+    cache : ChecksumCache
+        Cache of local checksums, by default the one at CACHE_PATH.
+
+    Returns
+    -------
+    tuple
+        Lists of (iRODS path, local path) pairs: (diff, same).
+
+    """
+    hash_items = [
+        (local_path, checksum_algorithm(irods_checksum))
+        for _, local_path, irods_checksum in items]
+    checksums, stats = {}, {}
+    try:
+        if cache is None:
+            cache = ChecksumCache()
+        checksums, stats = cache.lookup(hash_items)
+    except (OSError, sqlite3.Error):
+        logging.info('Checksum cache unavailable', exc_info=True)
+        cache = None
+    missing = [item for item in hash_items if item not in checksums]
+    if missing:
+        hashed = checksum_many(missing, workers)
+        if cache is not None:
+            try:
+                cache.store(hashed, stats)
+            except sqlite3.Error:
+                logging.info('Checksum cache not updated', exc_info=True)
+        checksums.update(hashed)
+    diff, same = [], []
+    for irods_path, local_path, irods_checksum in items:
+        item = (local_path, checksum_algorithm(irods_checksum))
+        if checksums[item] == irods_checksum:
+            same.append((irods_path, local_path))
+        else:
+            diff.append((irods_path, local_path))
+    return diff, same
+
+
+class ChecksumCache:
+    """Persistent cache of local checksums in an SQLite database.
+
+    Entries are keyed by path and algorithm, and are only valid as long
+    as size, modification time and inode of the file are unchanged.
+    The least recently used entries are evicted beyond `max_entries`.
+
+    """
+
+    def __init__(self, path: str = CACHE_PATH,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        """Open, and if needed create, the cache database.
+
+        Parameters
+        ----------
+        path : str
+            Path of the SQLite database file.
+        max_entries : int
+            Maximum number of cached checksums.
+
+        """
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS checksums ('
+                'path TEXT, algorithm TEXT, size INTEGER, mtime_ns INTEGER, '
+                'inode INTEGER, checksum TEXT, used REAL, '
+                'PRIMARY KEY (path, algorithm))')
+
+    @staticmethod
+    def _normpath(path) -> str:
+        """Spelling of `path` under which its entries are stored.
+
+        """
+        return os.path.abspath(os.path.normpath(str(path)))
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Short-lived connection, so the cache can be used from any
+        thread.
+
+        """
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def lookup(self, items: list) -> tuple:
+        """Find the cached checksums of unchanged files.
+
+        Parameters
+        ----------
+        items : list
+            Pairs of (path, algorithm).
+
+        Returns
+        -------
+        tuple
+            Dictionaries keyed by item: (checksums, stats), the latter
+            holding the identity of each file at the time of lookup.
+
+        """
+        checksums, stats = {}, {}
+        with self._connect() as conn:
+            for item in items:
+                try:
+                    stat = os.stat(item[0])
+                except OSError:
+                    continue
+                stats[item] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                row = conn.execute(
+                    'SELECT size, mtime_ns, inode, checksum FROM checksums '
+                    'WHERE path = ? AND algorithm = ?',
+                    (self._normpath(item[0]), item[1])).fetchone()
+                if row is not None and tuple(row[:3]) == stats[item]:
+                    checksums[item] = row[3]
+            conn.executemany(
+                'UPDATE checksums SET used = ? WHERE path = ? AND algorithm = ?',
+                [(time.time(), self._normpath(path), algorithm)
+                 for path, algorithm in checksums])
+        return checksums, stats
+
+    def store(self, checksums: dict, stats: dict):
+        """Cache newly calculated checksums and evict the least recently
+        used entries.
+
+        Parameters
+        ----------
+        checksums : dict
+            Checksum for each (path, algorithm) item.
+        stats : dict
+            Identity (size, mtime_ns, inode) of each item's file taken
+            before hashing, see lookup.
+
+        """
+        now = time.time()
+        rows = [(self._normpath(item[0]), item[1], *stats[item], checksum, now)
+                for item, checksum in checksums.items() if item in stats]
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows)
+            count, = conn.execute('SELECT COUNT(*) FROM checksums').fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    'DELETE FROM checksums WHERE rowid IN (SELECT rowid '
+                    'FROM checksums ORDER BY used LIMIT ?)',
+                    (count - self.max_entries,))
+
+    def invalidate(self, path: str = None):
+        """Remove cached checksums.
+
+        Parameters
+        ----------
+        path : str
+            Remove the entries of this file or of all files below this
+            folder, by default remove all entries.
+
+        """
+        with self._connect() as conn:
+            if path is None:
+                conn.execute('DELETE FROM checksums')
+            else:
+                path = self._normpath(path)
+                prefix = path.rstrip(os.sep) + os.sep
+                conn.execute(
+                    'DELETE FROM checksums WHERE path = ? '
+                    'OR substr(path, 1, ?) = ?', (path, len(prefix), prefix))
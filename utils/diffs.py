@@ -0,0 +1,155 @@
+"""Comparison of iRODS collections and data objects with local
+directories and files.
+
+"""
+import logging
+import os
+
+import utils
+
+
+def diff_object(session, objPath, fsPath, scope):
+    """Compare an iRODS data object to a local file.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    objPath : str
+        Path of the data object.
+    fsPath : str
+        Path of the local file.
+    scope : str
+        'size' or 'checksum'.
+
+    Returns
+    -------
+    tuple
+        ([(object, file)] if they differ, [file] if only local,
+        [object] if only in iRODS, [(object, file)] if the same).
+
+    """
+    if os.path.isdir(fsPath) and not os.path.isfile(fsPath):
+        raise IsADirectoryError("IRODS FS DIFF: file is a directory.")
+    if session.collections.exists(objPath):
+        raise IsADirectoryError("IRODS FS DIFF: object exists already as collection. "+objPath)
+
+    if not os.path.isfile(fsPath) and session.data_objects.exists(objPath):
+        return ([], [], [objPath], [])
+
+    elif not session.data_objects.exists(objPath) and os.path.isfile(fsPath):
+        return ([], [fsPath], [], [])
+
+    #both, file and object exist
+    obj = session.data_objects.get(objPath)
+    if scope == "size":
+        objSize = obj.size
+        fSize = os.path.getsize(fsPath)
+        if objSize != fSize:
+            return ([(objPath, fsPath)], [], [], [])
+        else:
+            return ([], [], [], [(objPath, fsPath)])
+    elif scope == "checksum":
+        objCheck = obj.checksum
+        if objCheck == None:
+            try:
+                obj.chksum()
+                objCheck = obj.checksum
+            except:
+                logging.info('No checksum for '+obj.path)
+                return([(objPath, fsPath)], [], [], [])
+        if objCheck:
+            diff, same = utils.checksums.compare_checksums([(objPath, fsPath, objCheck)])
+            return (diff, [], [], same)
+
+
+def diff_tree(session, coll, dirPath, scope, workers, catalog=None):
+    """Compare an iRODS tree to a directory with one catalog snapshot,
+    computing missing checksums and hashing local files in parallel.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll : iRODSCollection
+        Root of the iRODS tree, or None.
+    dirPath : str
+        Local directory, or None.
+    scope : str
+        'size' or 'checksum'.
+    workers : int
+        Number of concurrent checksum computations.
+    catalog : dict
+        Optional snapshot of `coll`, see catalog.snapshot, taken if not
+        given.
+
+    Returns
+    -------
+    tuple
+        ([(object, file)] that differ, [files] only local, [objects]
+        only in iRODS, [(object, file)] that are the same).
+
+    """
+    listDir = []
+    if not dirPath == None:
+        if not os.access(dirPath, os.R_OK):
+            raise PermissionError("IRODS FS DIFF: No rights to write to destination.")
+        if not os.path.isdir(dirPath):
+            raise IsADirectoryError("IRODS FS DIFF: directory is a file.")
+        for root, dirs, files in os.walk(dirPath, topdown=False):
+            for name in files:
+                listDir.append(os.path.join(root.split(dirPath)[1], name).strip(os.sep))
+    # One catalog snapshot instead of a round trip per object.
+    if coll == None:
+        catalog = {}
+    elif catalog is None:
+        catalog = utils.catalog.snapshot(session, coll.path)
+    listColl = [iPath.replace("/", os.sep) for iPath in catalog]
+    diff = []
+    same = []
+    toHash = []
+    toChksum = []
+    for locPartialPath in set(listDir).intersection(listColl):
+        iPartialPath = locPartialPath.replace(os.sep, "/")
+        if scope == "size":
+            objSize = catalog[iPartialPath].size
+            fSize = os.path.getsize(os.path.join(dirPath, iPartialPath))
+            if objSize != fSize:
+                diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
+            else:
+                same.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
+        elif scope == "checksum":
+            objCheck = catalog[iPartialPath].checksum
+            if objCheck == None:
+                # Calculated in bulk after the loop.
+                toChksum.append((coll.path + '/' + iPartialPath,
+                                 os.path.join(dirPath, locPartialPath)))
+                continue
+            if objCheck:
+                # Hashed in parallel after collecting all checksums.
+                toHash.append((coll.path + '/' + iPartialPath,
+                               os.path.join(dirPath, locPartialPath), objCheck))
+        else: #same paths, no scope
+            diff.append((coll.path + '/' + iPartialPath, os.path.join(dirPath, locPartialPath)))
+    if toChksum:
+        checksums = utils.catalog.compute_checksums(
+            session, [iPath for iPath, _ in toChksum],
+            workers)
+        for iPath, fsPath in toChksum:
+            if checksums.get(iPath):
+                toHash.append((iPath, fsPath, checksums[iPath]))
+            else:
+                logging.info('No checksum for '+iPath)
+                diff.append((iPath, fsPath))
+    if toHash:
+        hashDiff, hashSame = utils.checksums.compare_checksums(toHash)
+        diff.extend(hashDiff)
+        same.extend(hashSame)
+
+    #adding files that are not on iRODS, only present on local FS
+    #adding files that are not on local FS, only present in iRODS
+    #adding files that are stored on both devices with the same checksum/size
+    irodsOnly = list(set(listColl).difference(listDir))
+    for i in range(0, len(irodsOnly)):
+        irodsOnly[i] = irodsOnly[i].replace(os.sep, "/")
+    return (diff, list(set(listDir).difference(listColl)), irodsOnly, same)
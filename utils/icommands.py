@@ -0,0 +1,189 @@
+"""Bulk execution of iCommands transfers, one invocation per
+destination directory instead of one per file.
+
+"""
+import functools
+import logging
+import os
+import re
+import shutil
+import subprocess
+
+import utils
+
+# Misc
+# Files per invocation, keeping command lines well below OS limits.
+BATCH_SIZE = 200
+
+
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    """Determine once whether the iCommands are installed.
+
+    Returns
+    -------
+    bool
+        Are the iCommands available?
+
+    """
+    return shutil.which('iinit') is not None
+
+
+def run(command: list) -> str:
+    """Run a single iCommand without a shell.
+
+    Parameters
+    ----------
+    command : list
+        iCommand and its arguments.
+
+    Returns
+    -------
+    str
+        Standard output of the command.
+
+    Raises
+    ------
+    RuntimeError
+        If the command exits with a non-zero status.
+
+    """
+    proc = subprocess.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f'{command[0]} exited with status {proc.returncode}: '
+            f'{proc.stderr.strip()}')
+    return proc.stdout
+
+
+class BulkCommand:
+    """Transfer many items with an iCommand accepting multiple sources
+    and a single target directory, e.g. `iput` or `iget`.
+
+    Offers the same run interface as TransferScheduler.
+
+    """
+
+    def __init__(self, command: list, batch_size: int = BATCH_SIZE):
+        """Create the runner.
+
+        Parameters
+        ----------
+        command : list
+            iCommand and options, preferably including -v so per-file
+            progress can be parsed.
+        batch_size : int
+            Maximum number of sources per invocation.
+
+        """
+        self.command = command
+        self.batch_size = batch_size
+
+    def run(self, items, callback=None):
+        """Transfer all `items`, grouped by destination directory.
+
+        Parameters
+        ----------
+        items : iterable
+            Pairs of (source, destination) paths, where the basename of
+            the destination equals that of the source.
+        callback : callable
+            Optional, called as callback(src, dst, error) after every
+            item, with `error` None upon success.
+
+        Returns
+        -------
+        TransferReport
+            Per-item results of the job.
+
+        """
+        report = utils.transfers.TransferReport()
+        groups = {}
+        for src, dst in items:
+            groups.setdefault(os.path.dirname(str(dst)), []).append(
+                (str(src), str(dst)))
+        for dst_dir, group in groups.items():
+            for start in range(0, len(group), self.batch_size):
+                self._run_batch(
+                    dst_dir, group[start:start + self.batch_size], report,
+                    callback)
+        return report
+
+    def _run_batch(self, dst_dir, batch, report, callback):
+        """Run one invocation for `batch` and report each item from the
+        parsed output.
+
+        """
+        cmd = self.command + [src for src, _ in batch] + [dst_dir]
+        logging.info('ICOMMANDS: %s (%d items)', cmd[0], len(batch))
+        proc = subprocess.run(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, check=False)
+        errors = parse_errors(proc.stderr, batch)
+        done = parse_progress(proc.stdout)
+        for src, dst in batch:
+            if src in errors:
+                error = RuntimeError(errors[src])
+            elif os.path.basename(dst) in done or proc.returncode == 0:
+                error = None
+            else:
+                error = RuntimeError(
+                    f'{cmd[0]} exited with status {proc.returncode}')
+            if error is None:
+                report.add_success(src, dst)
+            else:
+                logging.info('TRANSFER ERROR: %s --> %s: %r', src, dst, error)
+                report.add_failure(src, dst, error)
+            if callback is not None:
+                callback(src, dst, error)
+
+
+def parse_progress(stdout: str) -> set:
+    """Find the names of the transferred files in verbose (-v) iCommand
+    output such as '   name   0.012 MB | 0.05 sec | 0 thr | 0.2 MB/s'.
+
+    Parameters
+    ----------
+    stdout : str
+        Standard output of the iCommand.
+
+    Returns
+    -------
+    set
+        Basenames of the transferred files.
+
+    """
+    names = set()
+    for line in stdout.splitlines():
+        if ' MB | ' in line:
+            names.add(line.split(' MB | ')[0].strip().rsplit(None, 1)[0])
+    return names
+
+
+def parse_errors(stderr: str, batch: list) -> dict:
+    """Relate the ERROR lines of an iCommand to the items of `batch`.
+
+    Parameters
+    ----------
+    stderr : str
+        Standard error of the iCommand.
+    batch : list
+        Pairs of (source, destination) paths.
+
+    Returns
+    -------
+    dict
+        Error line per failed source path.
+
+    """
+    errors = {}
+    for line in stderr.splitlines():
+        if 'ERROR' not in line:
+            continue
+        for src, dst in batch:
+            # A path is followed by a separator, not by more of a name.
+            if re.search(f'({re.escape(src)}|{re.escape(dst)})([\\s,]|$)', line):
+                errors[src] = line.strip()
+    return errors
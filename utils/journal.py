@@ -0,0 +1,213 @@
+"""Persistent journal of multi-file transfers, allowing interrupted
+up- and downloads to resume without a new diff.
+
+A journal is an append-only file of JSON lines under
+~/.ibridges/journals.  It is written when a job is planned, updated
+for every item started, completed or failed, and removed once all
+items are transferred.  Resuming is an explicit choice of the caller
+and only offered for journals younger than JOURNAL_MAX_AGE; otherwise
+a new diff replaces the journal.
+
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+import utils
+
+# Misc
+JOURNAL_DIR = os.path.join('~', '.ibridges', 'journals')
+# Seconds since the last update after which a journal is not resumed.
+JOURNAL_MAX_AGE = 7 * 24 * 3600
+
+
+class TransferJournal:
+    """Journal of one transfer job identified by its operation, source
+    and destination.
+
+    """
+
+    def __init__(self, operation: str, src_path: str, dst_path: str,
+                 journal_dir: str = JOURNAL_DIR,
+                 max_age: float = JOURNAL_MAX_AGE):
+        """Locate the journal of the job, without creating it.
+
+        Parameters
+        ----------
+        operation : str
+            One of 'upload' or 'download'.
+        src_path : str
+            Local or iRODS path of the source folder/collection.
+        dst_path : str
+            iRODS or local path of the destination collection/folder.
+        journal_dir : str
+            Directory holding the journals.
+        max_age : float
+            Seconds since the last update after which the journal is
+            no longer resumable.
+
+        """
+        self.operation = operation
+        self.src_path = str(src_path)
+        self.dst_path = str(dst_path)
+        self.max_age = max_age
+        job_id = hashlib.sha1(
+            f'{operation}\0{self.src_path}\0{self.dst_path}'.encode()
+        ).hexdigest()
+        self.path = utils.utils.LocalPath(journal_dir).expanduser().joinpath(
+            f'{operation}-{job_id}.jsonl')
+        self._lock = threading.Lock()
+        self._fd = None
+
+    @property
+    def exists(self) -> bool:
+        """Whether an unfinished job was journaled.
+
+        Returns
+        -------
+        bool
+            Journal file is present.
+
+        """
+        return self.path.is_file()
+
+    @property
+    def resumable(self) -> bool:
+        """Whether an unfinished job was journaled recently enough to be
+        resumed.
+
+        Returns
+        -------
+        bool
+            Journal file is present and not older than `max_age`.
+
+        """
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return age <= self.max_age
+
+    def load(self) -> tuple:
+        """Read the state of every journaled item.  Lines truncated by
+        an interruption are ignored.
+
+        Returns
+        -------
+        tuple
+            Lists of (source, destination) pairs:
+            (planned, in_flight, completed).
+
+        """
+        states = {}
+        with open(self.path, encoding='utf-8') as journalfd:
+            for line in journalfd:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'src' in entry:
+                    states[(entry['src'], entry['dst'])] = entry['event']
+        planned = [item for item, event in states.items()
+                   if event in ('planned', 'failed')]
+        in_flight = [item for item, event in states.items()
+                     if event == 'started']
+        completed = [item for item, event in states.items()
+                     if event == 'done']
+        return planned, in_flight, completed
+
+    def pending(self) -> list:
+        """Items of the job still to be transferred.  In-flight items
+        may be partially written and are transferred again.
+
+        Returns
+        -------
+        list
+            Pairs of (source, destination) paths.
+
+        """
+        planned, in_flight, _ = self.load()
+        return in_flight + planned
+
+    def plan(self, transfers: list):
+        """Start a new journal for the `transfers` of the job,
+        replacing an existing one.
+
+        Parameters
+        ----------
+        transfers : list
+            Pairs of (source, destination) paths.
+
+        """
+        self.close()
+        utils.utils.ensure_dir(str(self.path.parent))
+        self._fd = open(self.path, 'w', encoding='utf-8')
+        self._write({
+            'event': 'job',
+            'operation': self.operation,
+            'src_path': self.src_path,
+            'dst_path': self.dst_path,
+            'created': datetime.datetime.now().isoformat(),
+        })
+        for src, dst in transfers:
+            self._write({'event': 'planned', 'src': str(src), 'dst': str(dst)})
+        self._fd.flush()
+
+    def started(self, src, dst):
+        """Record that the transfer of `src` to `dst` started.
+
+        """
+        self._record('started', src, dst)
+
+    def done(self, src, dst):
+        """Record that `src` was transferred to `dst`.
+
+        """
+        self._record('done', src, dst)
+
+    def failed(self, src, dst):
+        """Record that the transfer of `src` to `dst` failed.
+
+        """
+        self._record('failed', src, dst)
+
+    def finish(self):
+        """Remove the journal of a completed job.
+
+        """
+        self.discard()
+
+    def discard(self):
+        """Remove the journal, e.g. when the user does not want to
+        resume the job.
+
+        """
+        self.close()
+        if self.exists:
+            self.path.unlink()
+
+    def close(self):
+        """Close the journal file, keeping it for a later resume.
+
+        """
+        with self._lock:
+            if self._fd is not None:
+                self._fd.close()
+                self._fd = None
+
+    def _record(self, event, src, dst):
+        """Append and flush one item `event`, safe for concurrent
+        workers.
+
+        """
+        with self._lock:
+            if self._fd is None:
+                self._fd = open(self.path, 'a', encoding='utf-8')
+            self._write({'event': event, 'src': str(src), 'dst': str(dst)})
+            self._fd.flush()
+
+    def _write(self, entry):
+        self._fd.write(json.dumps(entry) + '\n')
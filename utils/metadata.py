@@ -0,0 +1,338 @@
+"""Bulk metadata operations: the AVU operations of each collection or
+data object are applied in one atomic request, and many of them
+concurrently over the connections of the session pool.
+
+"""
+import collections
+import itertools
+import logging
+
+import irods.collection
+import irods.exception
+import irods.meta
+import irods.models
+
+import utils
+
+# Map kinds of paths to their models
+MODELS = {
+    'collection': irods.models.Collection,
+    'data_object': irods.models.DataObject,
+}
+
+ImportSummary = collections.namedtuple(
+    'ImportSummary', ['items', 'avus', 'missing', 'report'])
+
+
+def item_kind(item) -> str:
+    """Determine the kind of an iRODS item, as used by PathStat.
+
+    Parameters
+    ----------
+    item : iRODSCollection, iRODSDataObject
+        Instance of an iRODS collection or data object.
+
+    Returns
+    -------
+    str
+        'collection' or 'data_object'.
+
+    """
+    if isinstance(item, irods.collection.iRODSCollection):
+        return 'collection'
+    return 'data_object'
+
+
+def add_operations(avus: list) -> list:
+    """Create the operations adding `avus`.
+
+    Parameters
+    ----------
+    avus : list
+        (attribute, value, units) triplets.
+
+    Returns
+    -------
+    list
+        AVUOperation per triplet.
+
+    """
+    return [
+        irods.meta.AVUOperation(
+            operation='add', avu=irods.meta.iRODSMeta(name, value, units))
+        for name, value, units in avus]
+
+
+def upsert_operations(current: list, avus: list) -> list:
+    """Compute the minimal operations giving each attribute of `avus`
+    exactly the value and units given, leaving other attributes alone.
+
+    Parameters
+    ----------
+    current : list
+        MetaEntry per present AVU of the item.
+    avus : list
+        (attribute, value, units) triplets, one per attribute.
+
+    Returns
+    -------
+    list
+        AVUOperation to remove the other values of the attributes and
+        to add the missing AVUs, empty if nothing changes.
+
+    """
+    wanted = {name: (value, units or '') for name, value, units in avus}
+    present = set()
+    operations = []
+    for entry in current:
+        if entry.name not in wanted:
+            continue
+        if (entry.value, entry.units or '') == wanted[entry.name]:
+            present.add(entry.name)
+        else:
+            operations.append(irods.meta.AVUOperation(
+                operation='remove', avu=irods.meta.iRODSMeta(
+                    entry.name, entry.value, entry.units or None)))
+    operations.extend(add_operations(
+        (name, value, units) for name, (value, units) in wanted.items()
+        if name not in present))
+    return operations
+
+
+def _apply(session, path: str, kind: str, operations: list):
+    """Apply the `operations` to one item in a single atomic request.
+    Should an added AVU already exist, the additions are repeated one by
+    one, skipping the existing ones.
+
+    """
+    model = MODELS[kind]
+    try:
+        session.metadata.apply_atomic_operations(model, path, *operations)
+    except irods.exception.iRODSException as error:
+        if any(operation.operation != 'add' for operation in operations):
+            raise
+        logging.info('ATOMIC METADATA failed for %s: %r', path, error)
+        for operation in operations:
+            try:
+                session.metadata.add(model, path, operation.avu)
+            except irods.exception.CATALOG_ALREADY_HAS_ITEM_BY_THAT_NAME:
+                pass
+
+
+def apply_operations(session, targets, workers: int, callback=None):
+    """Apply AVU operations to many collections and/or data objects
+    without aborting on failed ones.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session whose connection pool the workers share.
+    targets : iterable
+        Triples of (path, kind, operations), `kind` being
+        'collection' or 'data_object' and `operations` a list of
+        AVUOperation.  Consumed lazily.
+    workers : int
+        Number of concurrent requests.
+    callback : callable
+        Optional, called as callback(path, kind, error) after every
+        target, with `error` None upon success.
+
+    Returns
+    -------
+    TransferReport
+        (path, kind) per succeeded or failed target.
+
+    """
+    report = utils.transfers.TransferReport()
+
+    def items():
+        for path, kind, target_operations in targets:
+            yield str(path), (kind, target_operations)
+
+    def apply(path, target):
+        _apply(session, path, *target)
+
+    def collect(path, target, error):
+        kind = target[0]
+        if error is None:
+            report.add_success(path, kind)
+        else:
+            report.add_failure(path, kind, error)
+        if callback is not None:
+            callback(path, kind, error)
+
+    scheduler = utils.transfers.TransferScheduler(apply, workers=workers)
+    scheduler.run(items(), collect)
+    logging.info('METADATA operations finished: %s', report.summary())
+    return report
+
+
+def upsert(session, targets: dict, avus: list, workers: int,
+           callback=None):
+    """Set attributes of many collections and/or data objects, reading
+    their present values with a few batched queries and only sending
+    the differences.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query and write with.
+    targets : dict
+        Kind, 'collection' or 'data_object', per path.
+    avus : list
+        (attribute, value, units) triplets, one per attribute.
+    workers : int
+        Number of concurrent requests.
+    callback : callable
+        Optional, see apply_operations.
+
+    Returns
+    -------
+    TransferReport
+        (path, kind) per changed item; unchanged items are left out.
+
+    """
+    names = {name for name, _, _ in avus}
+    current = utils.catalog.paths_metadata(session, targets, names)
+    changes = []
+    for path, kind in targets.items():
+        operations = upsert_operations(
+            current.get(str(path).rstrip('/') or '/', []), avus)
+        if operations:
+            changes.append((path, kind, operations))
+    logging.info(
+        'METADATA upsert: %d of %d items change', len(changes), len(targets))
+    return apply_operations(session, changes, workers, callback)
+
+
+def group_entries(entries, base: str = ''):
+    """Group consecutive metadata entries of the same path.
+
+    Parameters
+    ----------
+    entries : iterable
+        (path, attribute, value, units) tuples.
+    base : str
+        Collection that relative paths are relative to, and the path of
+        entries without one.
+
+    Yields
+    ------
+    tuple
+        Absolute path and list of its (attribute, value, units).
+
+    """
+    base = base.rstrip('/')
+    for path, group in itertools.groupby(entries, key=lambda entry: entry[0]):
+        path = str(path or '').rstrip('/')
+        if not path.startswith('/'):
+            path = f'{base}/{path}' if path else base
+        yield path, [(name, value, units) for _, name, value, units in group]
+
+
+def import_entries(session, entries, workers: int, base: str = '',
+                   dry_run: bool = False, callback=None):
+    """Add path-mapped metadata, e.g. from a metadata file, streaming
+    the entries: the entries of a chunk are merged per path, the kinds
+    of the paths are looked up per chunk, and the AVUs of each path are
+    added in one atomic request per chunk.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query and write with.
+    entries : iterable
+        (path, attribute, value, units) tuples, preferably ordered by
+        path.
+    workers : int
+        Number of concurrent requests.
+    base : str
+        See group_entries.
+    dry_run : bool
+        Only look up the paths and count, without changing metadata.
+    callback : callable
+        Optional, see apply_operations.
+
+    Returns
+    -------
+    ImportSummary
+        Number of items and AVUs to add, paths not found and the
+        TransferReport of the additions (None for a dry run).  An item
+        whose entries are spread over several chunks counts once per
+        chunk.
+
+    """
+    summary = {'items': 0, 'avus': 0}
+    missing = []
+
+    def targets():
+        for chunk in utils.catalog.chunked(group_entries(entries, base)):
+            merged = {}
+            for path, avus in chunk:
+                merged.setdefault(path, []).extend(avus)
+            stats = utils.catalog.stat_many(session, list(merged))
+            for path, avus in merged.items():
+                if path not in stats:
+                    missing.append(path)
+                    continue
+                summary['items'] += 1
+                summary['avus'] += len(avus)
+                yield path, stats[path].kind, add_operations(avus)
+
+    report = None
+    if dry_run:
+        collections.deque(targets(), maxlen=0)
+    else:
+        report = apply_operations(session, targets(), workers, callback)
+    logging.info(
+        'METADATA import%s: %d AVUs of %d items, %d paths not found',
+        ' (dry run)' if dry_run else '', summary['avus'], summary['items'],
+        len(missing))
+    return ImportSummary(summary['items'], summary['avus'], missing, report)
+
+
+def tag_tree(session, coll_path: str, avus: list, workers: int,
+             progress=None, cancel=None):
+    """Add AVUs to a collection and everything below it, enumerating
+    the items with paged queries and adding the AVUs in one atomic
+    request per item, concurrently.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query and write with.
+    coll_path : str
+        Path of the root collection.
+    avus : list
+        (attribute, value, units) triplets.
+    workers : int
+        Number of concurrent requests.
+    progress : callable
+        Optional, called as progress(count) with the number of items
+        done so far.
+    cancel : threading.Event
+        Optional, once set no further items are started.
+
+    Returns
+    -------
+    TransferReport
+        (path, kind) per tagged or failed item.
+
+    """
+    operations = add_operations(avus)
+    done = 0
+
+    def targets():
+        for path, kind in utils.catalog.iter_subtree(session, coll_path):
+            if cancel is not None and cancel.is_set():
+                logging.info('METADATA tagging of %s cancelled', coll_path)
+                return
+            yield path, kind, operations
+
+    def callback(path, kind, error):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done)
+
+    return apply_operations(session, targets(), workers, callback)
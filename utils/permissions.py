@@ -0,0 +1,133 @@
+"""Recursive permission changes that only touch the collections and data
+objects whose access actually changes, applied concurrently over the
+connections of the session pool.
+
+"""
+import collections
+import logging
+
+import irods.access
+
+import utils
+
+# Access names of the catalog as accepted when setting them.
+ACCESS_NAMES = {
+    'read object': 'read',
+    'read_object': 'read',
+    'modify object': 'write',
+    'modify_object': 'write',
+}
+
+AclChange = collections.namedtuple(
+    'AclChange', ['path', 'kind', 'before', 'after'])
+AclSummary = collections.namedtuple(
+    'AclSummary', ['changes', 'unchanged', 'report'])
+
+
+def access_name(name: str) -> str:
+    """Normalize an access name of the catalog to the name used to set
+    it, e.g. 'modify object' to 'write'.
+
+    """
+    return ACCESS_NAMES.get(name, name)
+
+
+def user_access(session, coll_path: str, user: str, zone: str = '',
+                users: dict = None) -> dict:
+    """Take a snapshot of the direct access of one user to a collection
+    and everything below it.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query with.
+    coll_path : str
+        Path of the root collection.
+    user : str
+        Name of the user or group.
+    zone : str
+        Zone of the user, any if empty.
+    users : dict
+        Users and groups already known, see catalog.iter_acls.
+
+    Returns
+    -------
+    dict
+        Normalized access name per path the user has access to.
+
+    """
+    access = {}
+    for acl in utils.catalog.iter_acls(session, coll_path, users):
+        if acl.user_name == user and (not zone or acl.user_zone == zone):
+            access[acl.path] = access_name(acl.access_name)
+    return access
+
+
+def propagate(session, coll_path: str, perm: str, user: str, zone: str,
+              workers: int, admin: bool = False, dry_run: bool = False,
+              progress=None):
+    """Give a user a permission on a collection and everything below
+    it, setting it only where it differs.
+
+    Parameters
+    ----------
+    session : iRODSSession
+        Session to query and write with.
+    coll_path : str
+        Path of the root collection.
+    perm : str
+        Permission to set: own, write, read or null.
+    user : str
+        Name of the user or group.
+    zone : str
+        Zone of the user.
+    workers : int
+        Number of concurrent requests.
+    admin : bool
+        If a 'rodsadmin' set the permission for another user.
+    dry_run : bool
+        Only compute the changes.
+    progress : callable
+        Optional, called as progress(done, total) after every change.
+
+    Returns
+    -------
+    AclSummary
+        AclChange per item whose permission differs, with its present
+        permission ('null' if none), the number of items left unchanged
+        and the TransferReport of the changes, (path, kind) per item
+        (None for a dry run).
+
+    """
+    perm = access_name(perm)
+    access = user_access(session, coll_path, user, zone)
+    changes = []
+    unchanged = 0
+    for path, kind in utils.catalog.iter_subtree(session, coll_path):
+        before = access.get(path, 'null')
+        if before == perm:
+            unchanged += 1
+        else:
+            changes.append(AclChange(path, kind, before, perm))
+    logging.info(
+        'ACL %s for %s on %s: %d items change, %d unchanged%s', perm, user,
+        coll_path, len(changes), unchanged, ' (dry run)' if dry_run else '')
+    if dry_run:
+        return AclSummary(changes, unchanged, None)
+    done = 0
+
+    def apply(path, kind):
+        acl = irods.access.iRODSAccess(perm, path, user, zone)
+        session.permissions.set(acl, recursive=False, admin=admin)
+
+    def callback(path, kind, error):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(changes))
+
+    scheduler = utils.transfers.TransferScheduler(apply, workers=workers)
+    report = scheduler.run(
+        ((change.path, change.kind) for change in changes), callback)
+    logging.info('ACL changes finished: %s', report.summary())
+    return AclSummary(changes, unchanged, report)
@@ -0,0 +1,463 @@
+"""Concurrent transfer scheduling for iRODS up- and downloads.
+
+"""
+import concurrent.futures
+import json
+import logging
+import os
+import statistics
+import threading
+
+import utils
+
+# Misc
+DEFAULT_WORKERS = 4
+# Submitted, but not yet finished, transfers per worker.
+QUEUE_DEPTH = 4
+# Streams per file transfer.
+DEFAULT_THREADS = 4
+# iRODS transfers smaller files in a single buffer anyway.
+PARALLEL_THRESHOLD = 32 * 1024**2
+HISTORY_PATH = os.path.join('~', '.ibridges', 'transfer_history.json')
+# Throughput samples per size class and thread count.
+MIN_SAMPLES = 2
+MAX_SAMPLES = 20
+
+
+class TransferError(Exception):
+    """Custom Exception for when one or more items of a transfer job
+    failed.
+
+    """
+
+    def __init__(self, message, report):
+        """Keep the `report` of the failed job with the exception.
+
+        Parameters
+        ----------
+        message : str
+            Error message.
+        report : TransferReport
+            Per-item results of the job.
+
+        """
+        super().__init__(message)
+        self.report = report
+
+
+class TransferReport:
+    """Thread-safe aggregation of the per-item results of a transfer
+    job.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.succeeded = []
+        self.failed = []
+
+    def __len__(self) -> int:
+        """Number of items reported.
+
+        Returns
+        -------
+        int
+            Sum of succeeded and failed items.
+
+        """
+        return len(self.succeeded) + len(self.failed)
+
+    @property
+    def ok(self) -> bool:
+        """Whether all items were transferred.
+
+        Returns
+        -------
+        bool
+            No failed items.
+
+        """
+        return len(self.failed) == 0
+
+    def add_success(self, src, dst):
+        """Record a successful transfer of `src` to `dst`.
+
+        Parameters
+        ----------
+        src : str
+            Source path.
+        dst : str
+            Destination path.
+
+        """
+        with self._lock:
+            self.succeeded.append((src, dst))
+
+    def add_failure(self, src, dst, error):
+        """Record a failed transfer of `src` to `dst`.
+
+        Parameters
+        ----------
+        src : str
+            Source path.
+        dst : str
+            Destination path.
+        error : Exception
+            Reason of the failure.
+
+        """
+        with self._lock:
+            self.failed.append((src, dst, error))
+
+    def summary(self) -> str:
+        """Render the results into a short human readable text.
+
+        Returns
+        -------
+        str
+            Counts of the (un)successful items and the first failures.
+
+        """
+        lines = [f'{len(self.succeeded)} of {len(self)} items transferred']
+        for src, dst, error in self.failed[:5]:
+            lines.append(f'FAILED: {src} --> {dst}: {error!r}')
+        if len(self.failed) > 5:
+            lines.append(f'... and {len(self.failed) - 5} more failures')
+        return '\n'.join(lines)
+
+
+class TransferScheduler:
+    """Run a transfer function for many items with a bounded number of
+    worker threads.
+
+    Each call of the transfer function is expected to check out its
+    own connection from the (thread-safe) iRODS session pool, so that
+    workers do not share a connection.
+
+    """
+
+    def __init__(self, transfer_func, workers: int = DEFAULT_WORKERS):
+        """Create the scheduler.
+
+        Parameters
+        ----------
+        transfer_func : callable
+            Called as transfer_func(src, dst) for every item.
+        workers : int
+            Maximum number of concurrent transfers.
+
+        """
+        self.transfer_func = transfer_func
+        self.workers = max(1, int(workers))
+
+    def _transfer(self, src, dst):
+        """Transfer one item, ignoring the return value.
+
+        """
+        self.transfer_func(src, dst)
+
+    def run(self, items, callback=None) -> TransferReport:
+        """Transfer all `items` without aborting on failed ones.
+
+        Parameters
+        ----------
+        items : iterable
+            Pairs of (source, destination) paths.
+        callback : callable
+            Optional, called as callback(src, dst, error) after every
+            item, with `error` None upon success.
+
+        Returns
+        -------
+        TransferReport
+            Per-item results of the job.
+
+        """
+        report = TransferReport()
+        max_pending = self.workers * QUEUE_DEPTH
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers) as executor:
+            pending = {}
+            for src, dst in items:
+                if len(pending) >= max_pending:
+                    self._collect(pending, report, callback)
+                future = executor.submit(self._transfer, src, dst)
+                pending[future] = (src, dst)
+            while pending:
+                self._collect(pending, report, callback)
+        return report
+
+    @staticmethod
+    def _collect(pending, report, callback):
+        """Wait for at least one of the `pending` transfers to finish
+        and record its result in `report`.
+
+        """
+        done, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            src, dst = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                report.add_success(src, dst)
+            else:
+                logging.info(
+                    'TRANSFER ERROR: %s --> %s: %r', src, dst, error)
+                report.add_failure(src, dst, error)
+            if callback is not None:
+                callback(src, dst, error)
+
+
+class ThreadPolicy:
+    """Choose the number of streams of a single file transfer from the
+    size of the file and the throughput observed for earlier transfers
+    of similar size.
+
+    Files below the parallel threshold use a single stream.  Larger
+    files are grouped into size classes by power of two.  Per class,
+    each candidate thread count is tried MIN_SAMPLES times, after which
+    the count with the best median throughput is used.
+
+    """
+
+    def __init__(self, max_threads: int = DEFAULT_THREADS,
+                 threshold: int = PARALLEL_THRESHOLD, autotune: bool = True,
+                 history_path: str = HISTORY_PATH):
+        """Create the policy and load the transfer history.
+
+        Parameters
+        ----------
+        max_threads : int
+            Maximum number of streams per file.
+        threshold : int
+            Size [bytes] from which files are transferred in parallel.
+        autotune : bool
+            Choose from the transfer history instead of always using
+            `max_threads` for large files.
+        history_path : str
+            JSON file holding the transfer history.
+
+        """
+        self.max_threads = max(1, int(max_threads))
+        self.threshold = int(threshold)
+        self.autotune = autotune
+        self.history_path = os.path.expanduser(history_path)
+        self._lock = threading.Lock()
+        self._history = {}
+        if autotune and os.path.isfile(self.history_path):
+            try:
+                with open(self.history_path, encoding='utf-8') as histfd:
+                    self._history = json.load(histfd)
+            except (OSError, ValueError):
+                logging.info('Transfer history not loaded', exc_info=True)
+
+    @property
+    def candidates(self) -> list:
+        """Thread counts considered for large files, highest first.
+
+        Returns
+        -------
+        list
+            Powers of two from 2 up to and including `max_threads`.
+
+        """
+        counts = {self.max_threads}
+        threads = 2
+        while threads < self.max_threads:
+            counts.add(threads)
+            threads *= 2
+        return sorted(counts, reverse=True)
+
+    @staticmethod
+    def size_class(size: int) -> str:
+        """Key of the power-of-two size class of `size`.
+
+        """
+        return str(int(size).bit_length())
+
+    def threads(self, size: int = None) -> int:
+        """Number of streams for transferring a file of `size` bytes.
+
+        Parameters
+        ----------
+        size : int
+            File size, unknown if None.
+
+        Returns
+        -------
+        int
+            Number of streams.
+
+        """
+        if size is None:
+            return self.max_threads
+        if size < self.threshold or self.max_threads == 1:
+            return 1
+        if not self.autotune:
+            return self.max_threads
+        with self._lock:
+            samples = self._history.get(self.size_class(size), {})
+            for threads in self.candidates:
+                if len(samples.get(str(threads), [])) < MIN_SAMPLES:
+                    return threads
+            return max(
+                self.candidates,
+                key=lambda threads: statistics.median(samples[str(threads)]))
+
+    def record(self, size: int, threads: int, seconds: float):
+        """Add the throughput of a finished transfer to the history.
+
+        Parameters
+        ----------
+        size : int
+            File size in bytes.
+        threads : int
+            Number of streams used.
+        seconds : float
+            Duration of the transfer.
+
+        """
+        if not self.autotune or size < self.threshold or seconds <= 0:
+            return
+        with self._lock:
+            samples = self._history.setdefault(
+                self.size_class(size), {}).setdefault(str(threads), [])
+            samples.append(size / seconds)
+            del samples[:-MAX_SAMPLES]
+
+    def save(self):
+        """Write the transfer history to its JSON file.
+
+        """
+        if not self.autotune:
+            return
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+                with open(self.history_path, 'w', encoding='utf-8') as histfd:
+                    json.dump(self._history, histfd)
+            except OSError:
+                logging.info('Transfer history not saved', exc_info=True)
+
+
+def upload_plan(src_path, cmp_path, diff: list, only_fs: list) -> tuple:
+    """Pair the files of a folder upload with their data objects.
+
+    Parameters
+    ----------
+    src_path : LocalPath
+        Folder being uploaded.
+    cmp_path : IrodsPath
+        Collection the folder is uploaded to.
+    diff : list
+        (data object, file) pairs that differ, see diffs.diff_tree.
+    only_fs : list
+        Paths, relative to `src_path`, of the files not in iRODS.
+
+    Returns
+    -------
+    tuple
+        (file, data object) pairs replacing existing data objects and
+        those creating new ones: (replacements, additions).
+
+    """
+    replacements = [
+        (local_path, irods_path) for irods_path, local_path in diff]
+    additions = []
+    for rel_path in only_fs:
+        rel_path = utils.utils.PurePath(rel_path)
+        additions.append((
+            src_path.joinpath(rel_path), cmp_path.joinpath(*rel_path.parts)))
+    return replacements, additions
+
+
+def download_plan(src_path, cmp_path, diff: list, only_irods: list) -> list:
+    """Pair the data objects of a collection download with their files.
+
+    Parameters
+    ----------
+    src_path : IrodsPath
+        Collection being downloaded.
+    cmp_path : LocalPath
+        Folder the collection is downloaded to.
+    diff : list
+        (data object, file) pairs that differ, see diffs.diff_tree.
+    only_irods : list
+        Paths, relative to `src_path`, of the data objects not on the
+        local side.
+
+    Returns
+    -------
+    list
+        (data object, file) pairs.
+
+    """
+    transfers = list(diff)
+    for rel_path in only_irods:
+        rel_path = utils.utils.PurePath(rel_path)
+        transfers.append((
+            src_path.joinpath(rel_path), cmp_path.joinpath(rel_path)))
+    return transfers
+
+
+def run_job(transfer_func, transfers: list, operation: str, workers: int,
+            journal=None, scheduler=None) -> TransferReport:
+    """Run `transfer_func` for all `transfers` concurrently and report
+    the results.
+
+    Parameters
+    ----------
+    transfer_func : callable
+        Called as transfer_func(src, dst) for every item.
+    transfers : list
+        Pairs of (source, destination) paths.
+    operation : str
+        One of 'upload' or 'download' for reference.
+    workers : int
+        Number of concurrent transfers.
+    journal : TransferJournal
+        Optional, records the progress of every item and is removed
+        when all items succeeded.
+    scheduler : object
+        Optional replacement of the TransferScheduler offering the same
+        run interface, e.g. icommands.BulkCommand.
+
+    Returns
+    -------
+    TransferReport
+        Per-item results of the job.
+
+    Raises
+    ------
+    TransferError
+        When one or more items failed.
+
+    """
+    def journaled_func(src, dst):
+        journal.started(src, dst)
+        transfer_func(src, dst)
+
+    def journaled_callback(src, dst, error):
+        if error is None:
+            journal.done(src, dst)
+        else:
+            journal.failed(src, dst)
+
+    if journal is None:
+        func, callback = transfer_func, None
+    else:
+        func, callback = journaled_func, journaled_callback
+    if scheduler is None:
+        scheduler = TransferScheduler(func, workers=workers)
+    try:
+        report = scheduler.run(transfers, callback)
+    finally:
+        if journal is not None:
+            journal.close()
+    logging.info('IRODS %s finished: %s', operation.upper(), report.summary())
+    if journal is not None and report.ok:
+        journal.finish()
+    if not report.ok:
+        raise TransferError(
+            f'ERROR iRODS {operation}: {report.summary()}', report)
+    return report
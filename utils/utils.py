@@ -17,6 +17,8 @@ import irods.data_object
 import irods.exception
 import irods.path
 
+from . import catalog
+
 
 def is_posix() -> bool:
     """Determine POSIXicity.
@@ -728,7 +730,8 @@ def get_data_size(obj: irods.data_object.iRODSDataObject) -> int:
 def get_coll_size(coll: irods.collection.iRODSCollection) -> int:
     """For an iRODS collection, sum the sizes of data objects
     recursively as reported by the ICAT.  This should be considered an
-    estimate if the sizes cannot be verified.
+    estimate if the sizes cannot be verified.  The sum is calculated by
+    the server over the good replicas.
 
     Parameters
     ----------
@@ -741,8 +744,7 @@ def get_coll_size(coll: irods.collection.iRODSCollection) -> int:
         Estimated sum of total sizes of data objects in `coll`.
 
     """
-    return sum(
-        sum(get_data_size(obj) for obj in objs) for _, _, objs in coll.walk())
+    return catalog.subtree_size(coll.manager.sess, coll.path)[0]
 
 
 def can_connect(hostname: str) -> bool: